@@ -1,3 +1,6 @@
+import html
+
+
 def build_chat_response(message: str, response: str) -> str:
     return f"""
     <hr>
@@ -9,4 +12,16 @@ def build_error_response(error_msg: str) -> str:
     return f"<div class='message error'><strong>Error:</strong> {error_msg}</div>"
 
 def build_system_message(message: str) -> str:
-    return f"<div class='message system'><em>{message}</em></div>"
\ No newline at end of file
+    return f"<div class='message system'><em>{message}</em></div>"
+
+def build_stream_open(message: str) -> str:
+    return f"""
+    <hr>
+    <div class='message user'><strong>Usuario:</strong> {message}</div>
+    <div class='message bot'><strong>Asistente:</strong> <span class='stream'>"""
+
+def build_stream_chunk(chunk: str) -> str:
+    return html.escape(chunk)
+
+def build_stream_close() -> str:
+    return "</span></div>"
@@ -0,0 +1,9 @@
+import json
+
+
+def build_sse_event(data: dict, event: str = None) -> str:
+    """
+    Formats one Server-Sent Event frame with a JSON payload.
+    """
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -1,21 +1,22 @@
-from fastapi import Request, APIRouter, Form
+from fastapi import Request, APIRouter, Form, Depends
 from fastapi.responses import JSONResponse
 
 from app.web.htmx_templates import htmx_fragment, htmx_error
 from app.core.chat_core import ChatCore
+from app.core.container import get_chat_core
+from app.utils.utils import use_response_cache
 
 router = APIRouter()
-chat_core = ChatCore()
 
 
 @router.post("/chat")
-async def chat(request: Request, message: str = Form(None)):
+async def chat(request: Request, message: str = Form(None), chat_core: ChatCore = Depends(get_chat_core)):
     try:
         if message is not None:
-            return await handle_htmx_request(message)
+            return await handle_htmx_request(chat_core, message, use_response_cache(request))
         else:
             data = await request.json()
-            return await handle_json_request(data)
+            return await handle_json_request(chat_core, data, use_response_cache(request, data.get("cache")))
     except Exception as e:
         print(f"[ERROR] Fallo en /chat: {str(e)}")
         return handle_error_response(e, is_htmx=(message is not None))
@@ -23,22 +24,22 @@ async def chat(request: Request, message: str = Form(None)):
 
 # --- Processors ---
 
-async def handle_json_request(data):
+async def handle_json_request(chat_core, data, use_cache=True):
     message = extract_message(data)
-    response = process_message(message)
+    response = await process_message(chat_core, message, use_cache)
     return JSONResponse(content={"response": response})
 
 
-async def handle_htmx_request(message):
-    response = process_message(message)
-    return htmx_fragment("Usuario", message, "Asistente", response)
+async def handle_htmx_request(chat_core, message, use_cache=True):
+    response = await process_message(chat_core, message, use_cache)
+    return htmx_fragment(message, response)
 
 
-def process_message(message):
+async def process_message(chat_core, message, use_cache=True):
     if not message:
         raise ValueError("No se proporcionó ningún mensaje.")
 
-    return chat_core.handle_message(message)
+    return await chat_core.handle_message_async(message, use_cache=use_cache)
 
 
 # --- Builders ---
@@ -1,6 +1,17 @@
+import time
+from typing import List, Optional
+
 from app.memory.memory_orchestrator import MemoryOrchestrator
 from app.llm_clients.llm_orchestrator import LLMOrchestrator
-from app.utils.utils import render_template
+from app.llm_clients.response_cache import SemanticResponseCache
+from app.llm_clients.prompt_registry import get_prompt_registry
+from app.core.context_assembler import ContextAssembler, estimate_tokens
+from app.core.request_context import RequestContext
+from app.memory.store.memory_store_interface import ScoredHit
+from app.utils.tracing import span
+from app.utils.utils import run_blocking
+
+PROMPT_TEMPLATE = "enriched_prompt.j2"
 
 
 class ChatCore:
@@ -8,16 +19,49 @@ class ChatCore:
     Core class responsible for handling chat interactions between the user and the system.
     It retrieves memory context, constructs prompts, invokes the LLM orchestrator, and stores interactions.
     """
-    def __init__(self):
+    def __init__(self, memory_orchestrator: MemoryOrchestrator = None, llm_orchestrator: LLMOrchestrator = None,
+                 response_cache: Optional[SemanticResponseCache] = None,
+                 context_assembler: Optional[ContextAssembler] = None):
         """
         Initializes the ChatCore with:
         - A memory orchestrator that routes queries to long- and short-term memory.
         - A smart LLM orchestrator for parallel model selection and meta-ranking.
+        - An optional semantic response cache, keyed by the message embedding.
+        - A context assembler that fits retrieved memory into the models' token budget.
+
+        The collaborators can be injected (benchmarks, tests); otherwise the defaults are built.
         """
-        self.memory_orchestrator = MemoryOrchestrator()
-        self.llm_orchestrator = LLMOrchestrator()
+        self.memory_orchestrator = memory_orchestrator or MemoryOrchestrator()
+        self.llm_orchestrator = llm_orchestrator or LLMOrchestrator()
+        self.response_cache = response_cache
+        self.context_assembler = context_assembler or ContextAssembler.from_env()
 
-    def handle_message(self, message: str) -> str:
+    def _cached_response(self, context: RequestContext, use_cache: bool) -> Optional[str]:
+        """
+        Cached answer for the message, if any. The lookup uses the same message embedding
+        as memory retrieval, so it costs no extra embedding call.
+        """
+        if self.response_cache is None:
+            return None
+        if not use_cache:
+            self.response_cache.record_bypass()
+            return None
+        embedding = context.embedding("llm", self.memory_orchestrator.embed_query)
+        return self.response_cache.get(self.llm_orchestrator.cache_namespace(), embedding)
+
+    async def _cached_response_async(self, context: RequestContext, use_cache: bool) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        with span("cache"):
+            return await run_blocking(self._cached_response, context, use_cache)
+
+    def _cache_response(self, context: RequestContext, response: str, latency: float) -> None:
+        if self.response_cache is None or not response:
+            return
+        embedding = context.embedding("llm", self.memory_orchestrator.embed_query)
+        self.response_cache.put(self.llm_orchestrator.cache_namespace(), embedding, response, latency)
+
+    def handle_message(self, message: str, use_cache: bool = True) -> str:
         """
         Handles a user message by:
         1. Retrieving context from short- and long-term memory.
@@ -25,8 +69,11 @@ class ChatCore:
         3. Sending the prompt to the LLM orchestrator.
         4. Storing the message and response in memory.
 
+        With a response cache, a cached answer to a near-identical message skips steps 1-3.
+
         Args:
             message (str): User's input message.
+            use_cache (bool): False bypasses the response cache lookup for this request.
 
         Returns:
             str: Generated response from the LLM orchestrator.
@@ -34,23 +81,128 @@ class ChatCore:
         if not message:
             raise ValueError("Mensaje vacío.")
 
+        # One context per message: the query embedding is computed once and reused downstream
+        context = RequestContext(message)
+
+        with span("cache"):
+            cached = self._cached_response(context, use_cache)
+        if cached is not None:
+            with span("memory_write"):
+                self.memory_orchestrator.add_interaction(message, cached, context=context)
+            return cached
+
         # Step 1: Retrieve relevant memory context
-        memory_context = self.memory_orchestrator.query(message)
+        with span("retrieval"):
+            hits = self.memory_orchestrator.search(message, context=context)
 
         # Step 2: Build the enriched prompt
-        enriched_prompt = render_template(
-                            "enriched_prompt.j2",
-                            {
-                                "short_context": "",  # Add short context if needed
-                                "long_context": "\n".join(memory_context),
-                                "question": message
-                            }
-                        )
+        with span("prompt"):
+            enriched_prompt = self._build_prompt(message, hits, context)
 
         # Step 3: Use LLM orchestrator to generate a response
-        response = self.llm_orchestrator.ask(enriched_prompt)
+        start = time.perf_counter()
+        with span("llm"):
+            response = self.llm_orchestrator.respond(enriched_prompt, query=message)
+        self._cache_response(context, response, time.perf_counter() - start)
 
         # Step 4: Store the interaction in memory
-        self.memory_orchestrator.update_memory(message, response)
+        with span("memory_write"):
+            self.memory_orchestrator.add_interaction(message, response, context=context)
 
         return response
+
+    async def handle_message_async(self, message: str, use_cache: bool = True) -> str:
+        """
+        Async variant of `handle_message` for the FastAPI routes.
+
+        LLM calls use the adapters' async HTTP clients; memory retrieval (embeddings, FAISS,
+        DB drivers) runs in the blocking executor, so a slow model or store no longer
+        freezes every other request in the worker. Persistence goes to the memory write
+        queue, so the response returns as soon as the LLM answer is ready.
+
+        Args:
+            message (str): User's input message.
+            use_cache (bool): False bypasses the response cache lookup for this request.
+
+        Returns:
+            str: Generated response from the LLM orchestrator.
+        """
+        if not message:
+            raise ValueError("Mensaje vacío.")
+
+        context = RequestContext(message)
+        cached = await self._cached_response_async(context, use_cache)
+        if cached is not None:
+            with span("memory_write"):
+                await self.memory_orchestrator.add_interaction_async(message, cached, context=context)
+            return cached
+
+        with span("retrieval"):
+            hits = await self.memory_orchestrator.search_async(message, context=context)
+        with span("prompt"):
+            enriched_prompt = self._build_prompt(message, hits, context)
+        start = time.perf_counter()
+        with span("llm"):
+            response = await self.llm_orchestrator.respond_async(enriched_prompt, query=message)
+        if self.response_cache is not None:
+            await run_blocking(self._cache_response, context, response, time.perf_counter() - start)
+        with span("memory_write"):
+            await self.memory_orchestrator.add_interaction_async(message, response, context=context)
+
+        return response
+
+    async def handle_message_stream(self, message: str, use_cache: bool = True):
+        """
+        Streaming variant of `handle_message_async`: yields response chunks as the model
+        produces them. The interaction is stored once the stream completes, so memory never
+        holds a truncated answer.
+
+        Args:
+            message (str): User's input message.
+            use_cache (bool): False bypasses the response cache lookup for this request.
+
+        Yields:
+            str: Response chunks from the LLM orchestrator (a cached answer comes as one chunk).
+        """
+        if not message:
+            raise ValueError("Mensaje vacío.")
+
+        context = RequestContext(message)
+        cached = await self._cached_response_async(context, use_cache)
+        if cached is not None:
+            yield cached
+            await self.memory_orchestrator.add_interaction_async(message, cached, context=context)
+            return
+
+        with span("retrieval"):
+            hits = await self.memory_orchestrator.search_async(message, context=context)
+        with span("prompt"):
+            enriched_prompt = self._build_prompt(message, hits, context)
+
+        chunks = []
+        start = time.perf_counter()
+        async for chunk in self.llm_orchestrator.respond_stream(enriched_prompt):
+            chunks.append(chunk)
+            yield chunk
+
+        response = "".join(chunks)
+        if self.response_cache is not None:
+            await run_blocking(self._cache_response, context, response, time.perf_counter() - start)
+        await self.memory_orchestrator.add_interaction_async(message, response, context=context)
+
+    def _build_prompt(self, message: str, hits: List[ScoredHit], context: RequestContext) -> str:
+        """
+        Renders the enriched prompt with the retrieved snippets that fit the context budget
+        of the enabled models, and records its estimated size.
+        """
+        budget = self.llm_orchestrator.context_budget(self.context_assembler.budget_tokens)
+        assembled = self.context_assembler.assemble(hits, budget)
+        prompt = get_prompt_registry().render(
+            PROMPT_TEMPLATE,
+            short_context=assembled["short_context"],
+            long_context=assembled["long_context"],
+            question=message,
+        )
+        context.prompt_tokens = estimate_tokens(prompt)
+        self.context_assembler.record(context.prompt_tokens, assembled)
+        return prompt
@@ -0,0 +1,102 @@
+import os
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from app.core.chat_core import ChatCore
+from app.memory.memory_orchestrator import MemoryOrchestrator
+from app.llm_clients.llm_orchestrator import LLMOrchestrator
+from app.llm_clients.response_cache import SemanticResponseCache
+from app.utils.http_pool import http_pool
+from app.utils.utils import run_blocking
+
+
+class AppContainer:
+    """
+    Application-scoped owner of everything that is expensive to build: the memory stack
+    (embedding models, store connections, session index), the LLM orchestrator and the
+    ChatCore that ties them together.
+
+    Exactly one is created per process by the FastAPI lifespan handler in `app.main` and
+    stored on `app.state.container`; routes reach it through `get_chat_core`. `start()`
+    builds the stack off the event loop, so the server answers `/ready` while models load.
+    """
+
+    def __init__(self, chat_core: Optional[ChatCore] = None):
+        self.chat_core = chat_core
+        self.error: Optional[str] = None
+
+    @classmethod
+    def build(cls) -> "AppContainer":
+        container = cls()
+        container.initialize()
+        return container
+
+    def initialize(self) -> None:
+        memory_orchestrator = MemoryOrchestrator()
+        llm_orchestrator = LLMOrchestrator()
+        # Semantic response cache, opt-in: it changes what users get back
+        response_cache = None
+        if os.getenv("RESPONSE_CACHE", "false").lower() == "true":
+            response_cache = SemanticResponseCache.from_env()
+        self.chat_core = ChatCore(
+            memory_orchestrator=memory_orchestrator,
+            llm_orchestrator=llm_orchestrator,
+            response_cache=response_cache,
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.chat_core is not None
+
+    @property
+    def memory_orchestrator(self) -> MemoryOrchestrator:
+        return self.chat_core.memory_orchestrator
+
+    @property
+    def llm_orchestrator(self) -> LLMOrchestrator:
+        return self.chat_core.llm_orchestrator
+
+    async def start(self) -> None:
+        try:
+            if self.chat_core is None:
+                await run_blocking(self.initialize)
+            self.memory_orchestrator.short_term_memory.start_background_snapshots()
+        except Exception as e:
+            self.error = str(e)
+            print(f"[ERROR] Falló la inicialización de la aplicación: {e}")
+
+    async def close(self) -> None:
+        if self.ready:
+            # Pending writes first, then the final snapshot so a clean restart does not
+            # need to replay the WAL
+            timeout = float(os.getenv("MEMORY_WRITE_FLUSH_TIMEOUT", "10"))
+            await run_blocking(self.memory_orchestrator.close, timeout)
+            await self.memory_orchestrator.aclose()
+        await http_pool.aclose()
+
+    def status(self) -> Dict:
+        """
+        Readiness report: "starting", "failed", "degraded" (some long-term stores are
+        unavailable) or "ready".
+        """
+        if self.error is not None:
+            return {"status": "failed", "error": self.error}
+        if not self.ready:
+            return {"status": "starting"}
+        memory = self.memory_orchestrator.long_term_memory.status()
+        return {
+            "status": "degraded" if memory["unavailable"] else "ready",
+            "memory": memory,
+        }
+
+
+def get_container(request: Request) -> AppContainer:
+    return request.app.state.container
+
+
+def get_chat_core(request: Request) -> ChatCore:
+    container = request.app.state.container
+    if not container.ready:
+        raise HTTPException(status_code=503, detail="Servicio iniciándose, reintenta en unos segundos.")
+    return container.chat_core
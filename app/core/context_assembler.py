@@ -0,0 +1,149 @@
+import os
+import re
+import threading
+from typing import Dict, List, Optional, TypedDict
+
+from app.memory.retrieval import dedup_key
+from app.memory.store.memory_store_interface import ScoredHit
+
+# Words and single punctuation marks; BPE tokenizers split long words, so a word
+# counts one token per started 4 characters.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast token count estimate, close to (and usually above) what the models' BPE
+    tokenizers report for Spanish and English prose, without loading a tokenizer.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_RE.findall(text))
+
+
+def _min_tokens(text: str) -> int:
+    # Lower bound of estimate_tokens: every non-space character is in some piece
+    return (len(text) - sum(text.count(c) for c in " \n\t\r")) // 4
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """
+    Longest prefix of `text`, cut at a word boundary, that fits in `budget` estimated tokens.
+    """
+    used = 0
+    end = 0
+    for match in _TOKEN_RE.finditer(text):
+        used += (len(match.group()) + 3) // 4
+        if used > budget:
+            break
+        end = match.end()
+    return text[:end]
+
+
+class AssembledContext(TypedDict):
+    short_context: str
+    long_context: str
+    tokens: int
+    snippets: int
+    duplicates: int
+    over_budget: int
+    truncated: bool
+
+
+class ContextAssembler:
+    """
+    Packs retrieved memory into the prompt's context budget.
+
+    Hits are taken in rank order; repeated snippets (same text ignoring case and
+    whitespace, or contained in a snippet already taken) are dropped, and a snippet that
+    does not fit in what is left of the budget is skipped in favour of smaller,
+    lower-ranked ones. Only the best-ranked snippet is ever truncated, when it alone is
+    larger than the whole budget. Short-term hits go to the prompt's short-term section,
+    the rest to the long-term one.
+
+    It also keeps the per-request prompt size statistics behind /api/metrics/prompt.
+    """
+
+    def __init__(self, budget_tokens: int = 1500):
+        self.budget_tokens = budget_tokens
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self.last_prompt_tokens = 0
+        self.context_tokens = 0
+        self.duplicates = 0
+        self.over_budget = 0
+        self.truncated = 0
+
+    @classmethod
+    def from_env(cls) -> "ContextAssembler":
+        """
+        PROMPT_CONTEXT_TOKENS: default budget for models without `context_tokens` in llm_config.json.
+        """
+        return cls(budget_tokens=int(os.getenv("PROMPT_CONTEXT_TOKENS", "1500")))
+
+    def assemble(self, hits: List[ScoredHit], budget_tokens: Optional[int] = None) -> AssembledContext:
+        budget = self.budget_tokens if budget_tokens is None else budget_tokens
+        sections: Dict[str, List[str]] = {"short_term": [], "long_term": []}
+        taken: List[str] = []
+        seen = set()
+        used = 0
+        duplicates = over_budget = 0
+        truncated = False
+
+        for hit in hits:
+            text = hit["text"].strip()
+            key = dedup_key(text)
+            if not key or key in seen or any(key in other for other in taken):
+                duplicates += 1
+                continue
+            seen.add(key)
+            remaining = budget - used
+            # The cheap lower bound rules out large snippets without estimating all of them
+            cost = estimate_tokens(text) if _min_tokens(text) <= remaining else remaining + 1
+            if cost > remaining:
+                if taken or budget <= 0:
+                    over_budget += 1
+                    continue
+                text = truncate_to_tokens(text, budget)
+                cost = estimate_tokens(text)
+                truncated = True
+            taken.append(key)
+            used += cost
+            section = "short_term" if hit["source"] == "short_term" else "long_term"
+            sections[section].append(text)
+
+        return {
+            "short_context": "\n".join(sections["short_term"]),
+            "long_context": "\n".join(sections["long_term"]),
+            "tokens": used,
+            "snippets": len(taken),
+            "duplicates": duplicates,
+            "over_budget": over_budget,
+            "truncated": truncated,
+        }
+
+    def record(self, prompt_tokens: int, assembled: AssembledContext) -> None:
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.max_prompt_tokens = max(self.max_prompt_tokens, prompt_tokens)
+            self.last_prompt_tokens = prompt_tokens
+            self.context_tokens += assembled["tokens"]
+            self.duplicates += assembled["duplicates"]
+            self.over_budget += assembled["over_budget"]
+            self.truncated += int(assembled["truncated"])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "budget_tokens": self.budget_tokens,
+                "requests": self.requests,
+                "avg_prompt_tokens": self.prompt_tokens / self.requests if self.requests else 0.0,
+                "max_prompt_tokens": self.max_prompt_tokens,
+                "last_prompt_tokens": self.last_prompt_tokens,
+                "avg_context_tokens": self.context_tokens / self.requests if self.requests else 0.0,
+                "duplicates_dropped": self.duplicates,
+                "over_budget_dropped": self.over_budget,
+                "truncated": self.truncated,
+            }
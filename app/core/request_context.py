@@ -0,0 +1,31 @@
+import threading
+from typing import Callable, Dict, List
+
+
+class RequestContext:
+    """
+    Per-message state created once by ChatCore and passed down the memory stack.
+
+    It memoizes the query embedding per embedding model, so the orchestrator, long-term
+    memory and the vector stores reuse one computation instead of each re-embedding the text.
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+        self._embeddings: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        # One lock per model, so embeddings for different models can be computed concurrently
+        self._model_locks: Dict[str, threading.Lock] = {}
+        # Estimated size of the prompt sent to the LLMs, set when the prompt is built
+        self.prompt_tokens = 0
+
+    def embedding(self, model_key: str, embed: Callable[[str], List[float]]) -> List[float]:
+        """
+        Returns the message embedding for `model_key`, computing it with `embed` on first use.
+        """
+        with self._lock:
+            model_lock = self._model_locks.setdefault(model_key, threading.Lock())
+        with model_lock:
+            if model_key not in self._embeddings:
+                self._embeddings[model_key] = embed(self.message)
+            return self._embeddings[model_key]
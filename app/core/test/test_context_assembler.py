@@ -0,0 +1,38 @@
+from app.core.context_assembler import ContextAssembler, estimate_tokens
+from app.llm_clients.prompt_registry import PromptRegistry
+from app.memory.store.memory_store_interface import hits_from_texts
+
+
+def test_estimate_tokens_counts_words_punctuation_and_long_words():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hola, mundo") == 4
+    assert estimate_tokens("internacionalización") == 5
+
+
+def test_dedupes_and_splits_sections():
+    hits = hits_from_texts(["user: hola\nassistant: qué tal", "hola", "otro dato"], "short_term")
+    hits += hits_from_texts(["USER:  hola assistant: qué tal", "dato de largo plazo"], "long_term")
+    assembled = ContextAssembler(budget_tokens=100).assemble(hits)
+    assert assembled["short_context"] == "user: hola\nassistant: qué tal\notro dato"
+    assert assembled["long_context"] == "dato de largo plazo"
+    assert (assembled["snippets"], assembled["duplicates"]) == (3, 2)
+
+
+def test_packs_into_budget_and_truncates_only_the_best_hit():
+    hits = hits_from_texts(["uno dos tres ocho", "cinco seis siete", "diez"], "long_term")
+    assembled = ContextAssembler().assemble(hits, budget_tokens=5)
+    assert assembled["long_context"] == "uno dos tres ocho\ndiez"
+    assert (assembled["tokens"], assembled["over_budget"]) == (5, 1)
+
+    assembled = ContextAssembler().assemble(hits, budget_tokens=2)
+    assert assembled["long_context"] == "uno dos"
+    assert assembled["truncated"] and assembled["snippets"] == 1
+
+
+def test_registry_compiles_each_template_once(tmp_path):
+    (tmp_path / "saludo.j2").write_text("Hola {{ nombre }}")
+    registry = PromptRegistry(str(tmp_path))
+    assert registry.render("saludo.j2", nombre="Ana") == "Hola Ana"
+    (tmp_path / "saludo.j2").write_text("Adiós {{ nombre }}")
+    assert registry.get("saludo.j2") is registry.get("saludo.j2")
+    assert registry.render("saludo.j2", nombre="Ana") == "Hola Ana"
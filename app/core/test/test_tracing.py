@@ -0,0 +1,70 @@
+import pytest
+
+from app.utils import tracing
+from app.utils.tracing import Histogram, finish_request, span, start_request
+
+
+def test_histogram_exposes_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(("llm",), value)
+    lines = histogram.expose()
+    assert 'latency_seconds_bucket{stage="llm",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="llm",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="llm",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{stage="llm"} 4' in lines
+
+
+def test_server_timing_sums_repeated_stages():
+    token = start_request()
+    with span("retrieval"):
+        pass
+    for _ in range(2):
+        with span("llm.ollama"):
+            pass
+    with pytest.raises(ValueError):
+        with span("memory_write"):
+            raise ValueError()
+    header = finish_request(token)
+    assert [entry.split(";")[0] for entry in header.split(", ")] == ["retrieval", "llm.ollama", "memory_write"]
+    # Outside a request spans still feed the histograms, but no header
+    with span("retrieval"):
+        pass
+    assert tracing._request_timings.get() is None
+    assert 'ai_assist_stage_errors_total{stage="memory_write"}' in tracing.render_metrics()
+
+
+def test_disabled_tracing_is_a_shared_noop(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+    assert span("llm") is span("retrieval")
+    assert start_request() is None and finish_request(None) is None
+
+
+def test_middleware_records_failed_and_streamed_requests():
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError()
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            with span("llm"):
+                yield "a"
+            yield "b"
+        return StreamingResponse(chunks())
+
+    app.middleware("http")(tracing.tracing_middleware)
+    client = TestClient(app, raise_server_exceptions=False)
+    assert client.get("/boom").status_code == 500
+    response = client.get("/stream")
+    assert response.text == "ab" and response.headers["server-timing"].startswith("total;dur=")
+    metrics = tracing.render_metrics()
+    assert 'ai_assist_http_request_duration_seconds_count{method="GET",route="/boom",status="500"} 1' in metrics
+    assert 'ai_assist_http_request_duration_seconds_count{method="GET",route="/stream",status="200"} 1' in metrics
+    assert tracing._request_timings.get() is None
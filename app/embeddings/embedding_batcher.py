@@ -0,0 +1,162 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from app.embeddings.embeddings import EmbeddingFunction
+
+
+class BatchingEmbeddingFunction(EmbeddingFunction):
+    """
+    Coalesces concurrent embed calls into batched requests to the wrapped function.
+
+    Callers block as usual; a dispatcher thread collects their texts for up to `window_ms`
+    (or until `max_batch_size` texts), sends one call with the unique texts and hands each
+    caller its own vectors. Requests are never split across batches, so a call with
+    `max_batch_size` texts or more skips the queue and goes straight through.
+    Up to `max_inflight` batches run at once.
+    """
+
+    def __init__(
+        self,
+        embedding_fn,
+        window_ms: float = 5.0,
+        max_batch_size: int = 32,
+        max_inflight: int = 4,
+        name: str = "embeddings"
+    ):
+        self.embedding_fn = embedding_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_inflight = max_inflight
+        self.name = name
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.items = 0
+        self.batches = 0
+        self.deduplicated = 0
+        self.errors = 0
+        # Batch sizes as sent to the provider, bucketed by powers of two
+        self._buckets = [1]
+        while self._buckets[-1] < max_batch_size:
+            self._buckets.append(self._buckets[-1] * 2)
+        self.histogram = {bucket: 0 for bucket in self._buckets}
+
+    @classmethod
+    def from_env(cls, embedding_fn, name: str = "embeddings", max_inflight: Optional[int] = None) -> "BatchingEmbeddingFunction":
+        """
+        EMBEDDING_BATCH_WINDOW_MS, EMBEDDING_BATCH_MAX_SIZE and EMBEDDING_BATCH_MAX_INFLIGHT.
+        """
+        return cls(
+            embedding_fn,
+            window_ms=float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5")),
+            max_batch_size=int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32")),
+            max_inflight=max_inflight or int(os.getenv("EMBEDDING_BATCH_MAX_INFLIGHT", "4")),
+            name=name,
+        )
+
+    def __call__(self, texts):
+        if not isinstance(texts, list):
+            texts = [texts]
+        if not texts:
+            return []
+
+        if self.window <= 0 or len(texts) >= self.max_batch_size:
+            return self._run_batch([(texts, None)])
+
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def _ensure_started(self) -> None:
+        if self._executor is not None:
+            return
+        with self._start_lock:
+            if self._executor is None:
+                threading.Thread(
+                    target=self._dispatch_loop, name=f"{self.name}-batcher", daemon=True).start()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_inflight, thread_name_prefix=f"{self.name}-batch")
+
+    def _dispatch_loop(self) -> None:
+        carry = None
+        while True:
+            first = carry or self._queue.get()
+            carry = None
+            batch = [first]
+            size = len(first[0])
+            deadline = time.monotonic() + self.window
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if size + len(item[0]) > self.max_batch_size:
+                    # Would overflow: it opens the next batch instead
+                    carry = item
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[tuple]):
+        texts = [text for request, _ in batch for text in request]
+        unique = list(dict.fromkeys(texts))
+        try:
+            vectors = dict(zip(unique, self.embedding_fn(unique)))
+        except Exception as e:
+            with self._stats_lock:
+                self.errors += 1
+            for _, future in batch:
+                if future is None:
+                    raise
+                future.set_exception(e)
+            return None
+
+        self._record(len(batch), len(texts), len(unique))
+        result = None
+        for request, future in batch:
+            vectors_for_request = [vectors[text] for text in request]
+            if future is None:
+                result = vectors_for_request
+            else:
+                future.set_result(vectors_for_request)
+        return result
+
+    def _record(self, requests: int, items: int, sent: int) -> None:
+        bucket = next((b for b in self._buckets if sent <= b), self._buckets[-1])
+        with self._stats_lock:
+            self.requests += requests
+            self.items += items
+            self.batches += 1
+            self.deduplicated += items - sent
+            self.histogram[bucket] += 1
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "name": self.name,
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "max_inflight": self.max_inflight,
+                "requests": self.requests,
+                "items": self.items,
+                "batches": self.batches,
+                "avg_batch_size": (self.items - self.deduplicated) / self.batches if self.batches else 0.0,
+                "deduplicated": self.deduplicated,
+                "errors": self.errors,
+                "queued": self._queue.qsize(),
+                "batch_size_histogram": {f"<={bucket}": count for bucket, count in self.histogram.items()},
+            }
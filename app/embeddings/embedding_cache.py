@@ -0,0 +1,233 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.embeddings.embeddings import EmbeddingFunction
+
+
+class DiskEmbeddingCache:
+    """
+    Persistent tier: float32 vectors in a SQLite file, evicted by least-recent access
+    once the stored vectors exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+        self.connection.commit()
+        self.total_bytes = self.connection.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+            ).fetchall()
+            if rows:
+                now = time.time()
+                self.connection.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key, _ in rows])
+                self.connection.commit()
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+
+    def put_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for key, vector in items.items():
+                cursor = self.connection.execute(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                    (key, vector.tobytes(), now))
+                if cursor.rowcount:
+                    self.total_bytes += vector.nbytes
+            self._evict()
+            self.connection.commit()
+
+    def _evict(self) -> None:
+        # Drop the coldest ~10% in one statement instead of row by row.
+        while self.total_bytes > self.max_bytes:
+            count = self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count == 0:
+                self.total_bytes = 0
+                return
+            victims = self.connection.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT ?",
+                (max(1, count // 10),)).fetchall()
+            self.connection.executemany(
+                "DELETE FROM embeddings WHERE key = ?", [(key,) for key, _ in victims])
+            self.total_bytes -= sum(size for _, size in victims)
+            self.evictions += len(victims)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.connection.execute("DELETE FROM embeddings")
+            self.connection.commit()
+            self.total_bytes = 0
+
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    """
+    Caching wrapper around any embedding function, keyed by (provider, model, text hash).
+
+    Tier 1 is a bounded in-process LRU (entry count and bytes); tier 2 is an optional
+    SQLite file shared across restarts. Only the misses of a call reach the wrapped
+    function, in a single batched request.
+    """
+
+    def __init__(
+        self,
+        embedding_fn,
+        provider: str,
+        model: str,
+        max_entries: int = 4096,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+        disk_max_bytes: int = 512 * 1024 * 1024
+    ):
+        self.embedding_fn = embedding_fn
+        self.provider = provider
+        self.model = model
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk = DiskEmbeddingCache(disk_path, disk_max_bytes) if disk_path else None
+
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls, embedding_fn, provider: str, model: str) -> "CachedEmbeddingFunction":
+        """
+        EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_MAX_MB, EMBEDDING_CACHE_PATH
+        (empty disables the disk tier) and EMBEDDING_CACHE_DISK_MAX_MB.
+        """
+        return cls(
+            embedding_fn,
+            provider=provider,
+            model=model,
+            max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096")),
+            max_bytes=int(float(os.getenv("EMBEDDING_CACHE_MAX_MB", "64")) * 1024 * 1024),
+            disk_path=os.getenv(
+                "EMBEDDING_CACHE_PATH", "./memory_snapshot/embedding_cache.sqlite3") or None,
+            disk_max_bytes=int(float(os.getenv("EMBEDDING_CACHE_DISK_MAX_MB", "512")) * 1024 * 1024),
+        )
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(
+            f"{self.provider}\0{self.model}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        # Caller holds self._lock
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory and (
+            len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes
+        ):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def __call__(self, texts):
+        if not isinstance(texts, list):
+            texts = [texts]
+
+        keys = [self._key(text) for text in texts]
+        found: Dict[bytes, np.ndarray] = {}
+
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            self.memory_hits += len(found)
+
+        pending = [key for key in dict.fromkeys(keys) if key not in found]
+        if pending and self.disk is not None:
+            from_disk = self.disk.get_many(pending)
+            with self._lock:
+                self.disk_hits += len(from_disk)
+                for key, vector in from_disk.items():
+                    self._remember(key, vector)
+            found.update(from_disk)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            embeddings = self.embedding_fn(list(missing.values()))
+            computed = {
+                key: np.asarray(embedding, dtype=np.float32)
+                for key, embedding in zip(missing, embeddings)
+            }
+            with self._lock:
+                self.misses += len(computed)
+                for key, vector in computed.items():
+                    self._remember(key, vector)
+            if self.disk is not None:
+                self.disk.put_many(computed)
+            found.update(computed)
+
+        return [found[key].tolist() for key in keys]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                "provider": self.provider,
+                "model": self.model,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_evictions": self.evictions,
+            }
+        if self.disk is not None:
+            stats["disk_bytes"] = self.disk.total_bytes
+            stats["disk_evictions"] = self.disk.evictions
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.disk is not None:
+            self.disk.clear()
@@ -1,6 +1,19 @@
-from chromadb.utils.embedding_functions import EmbeddingFunction
 import os
-import requests
+from app.utils.http_pool import http_pool
+
+# requests had no timeout at all; httpx defaults to 5s, too short for a cold local model.
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "60"))
+
+
+class EmbeddingFunction:
+    """
+    Base for embedding callables: list of texts in, list of vectors out. Mirrors
+    chromadb's EmbeddingFunction without importing chromadb, which is slow to load;
+    Chroma only needs the callable.
+    """
+
+    def __call__(self, texts):
+        raise NotImplementedError
 
 
 class OpenAIEmbedding(EmbeddingFunction):
@@ -24,7 +37,7 @@ class CohereEmbedding(EmbeddingFunction):
 
 
 class OllamaEmbedding(EmbeddingFunction):
-    """Generic Ollama embedding function using local model."""
+    """Generic Ollama embedding function using local model; one /api/embed call per batch."""
 
     def __init__(self, model="mistral", host="http://localhost:11434"):
         self.model = model
@@ -34,9 +47,10 @@ class OllamaEmbedding(EmbeddingFunction):
         if not isinstance(texts, list):
             texts = [texts]
 
-        response = requests.post(
-            f"{self.host}/api/embeddings",
-            json={"model": self.model, "prompt": texts}
+        response = http_pool.client(self.host).post(
+            f"{self.host}/api/embed",
+            json={"model": self.model, "input": texts},
+            timeout=EMBEDDING_TIMEOUT
         )
         response.raise_for_status()
         return response.json()["embeddings"]
@@ -51,10 +65,11 @@ class DeepSeekEmbedding(EmbeddingFunction):
         if not isinstance(texts, list):
             texts = [texts]
 
-        response = requests.post(
+        response = http_pool.client(self.endpoint).post(
             self.endpoint,
             headers={"Authorization": f"Bearer {self.api_key}"},
-            json={"input": texts}
+            json={"input": texts},
+            timeout=EMBEDDING_TIMEOUT
         )
         response.raise_for_status()
         return [item["embedding"] for item in response.json()["data"]]
@@ -72,7 +87,7 @@ class MistralEmbedding(EmbeddingFunction):
         if not isinstance(texts, list):
             texts = [texts]
 
-        response = requests.post(
+        response = http_pool.client(self.endpoint).post(
             self.endpoint,
             headers={
                 "Authorization": f"Bearer {self.api_key}",
@@ -81,7 +96,8 @@ class MistralEmbedding(EmbeddingFunction):
             json={
                 "model": self.model,
                 "input": texts
-            }
+            },
+            timeout=EMBEDDING_TIMEOUT
         )
         response.raise_for_status()
         return [item["embedding"] for item in response.json()["data"]]
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from app.embeddings.embedding_batcher import BatchingEmbeddingFunction
+
+
+class CountingProvider:
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+def call_concurrently(batcher, requests):
+    """
+    Runs one batcher call per request at the same moment; returns results (or the
+    exception raised) in request order.
+    """
+    results = [None] * len(requests)
+    barrier = threading.Barrier(len(requests))
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = batcher(requests[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_calls_share_a_batch_and_get_their_own_vectors():
+    provider = CountingProvider()
+    batcher = BatchingEmbeddingFunction(provider, window_ms=100, max_batch_size=64)
+    requests = [[f"texto {i}" * (i + 1), "compartido"] for i in range(8)]
+    results = call_concurrently(batcher, requests)
+    assert results == [[[float(len(text))] for text in request] for request in requests]
+    assert len(provider.calls) <= 2
+    # "compartido" is sent once per batch, not once per caller
+    assert sum(call.count("compartido") for call in provider.calls) == len(provider.calls)
+    stats = batcher.stats()
+    assert stats["requests"] == 8 and stats["deduplicated"] == 8 - len(provider.calls)
+
+
+def test_batches_never_exceed_max_batch_size():
+    provider = CountingProvider()
+    batcher = BatchingEmbeddingFunction(provider, window_ms=100, max_batch_size=4)
+    results = call_concurrently(batcher, [[f"t{i}", f"u{i}"] for i in range(6)])
+    assert all(not isinstance(result, Exception) for result in results)
+    assert len(provider.calls) >= 3 and max(len(call) for call in provider.calls) <= 4
+
+    # A request at least as big as a batch goes straight through, in one call
+    big = [f"v{i}" for i in range(5)]
+    assert batcher(big) == [[2.0]] * 5 and provider.calls[-1] == big
+
+
+def test_provider_error_reaches_every_waiting_caller():
+    error = ConnectionError("proveedor caído")
+    batcher = BatchingEmbeddingFunction(CountingProvider(error), window_ms=100, max_batch_size=64)
+    results = call_concurrently(batcher, [[f"t{i}"] for i in range(5)])
+    assert all(result is error for result in results)
+    assert batcher.stats()["errors"] >= 1
+    with pytest.raises(ConnectionError):
+        BatchingEmbeddingFunction(CountingProvider(error), window_ms=0)(["directo"])
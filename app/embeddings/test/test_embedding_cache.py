@@ -0,0 +1,68 @@
+from app.embeddings.embedding_cache import CachedEmbeddingFunction
+
+
+class CountingProvider:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(ord(text[0])), 0.0, 1.0] for text in texts]
+
+
+def vector(text):
+    return [float(len(text)), float(ord(text[0])), 0.0, 1.0]
+
+
+def make_cache(provider, tmp_path=None, **kwargs):
+    disk_path = str(tmp_path / "cache.sqlite3") if tmp_path is not None else None
+    return CachedEmbeddingFunction(provider, provider="ollama", model="mistral", disk_path=disk_path, **kwargs)
+
+
+def test_mixed_hits_and_misses_keep_input_order():
+    provider = CountingProvider()
+    cache = make_cache(provider)
+    assert cache(["a", "bb"]) == [vector("a"), vector("bb")]
+    # Only the misses reach the provider, each once, in one call
+    assert cache(["bb", "ccc", "a", "ccc"]) == [vector("bb"), vector("ccc"), vector("a"), vector("ccc")]
+    assert provider.calls == [["a", "bb"], ["ccc"]]
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"]) == (2, 3)
+
+
+def test_memory_tier_evicts_least_recent_past_max_bytes():
+    provider = CountingProvider()
+    cache = make_cache(provider, max_bytes=32)  # two 4-d float32 vectors
+    cache(["a", "b"])
+    cache(["a"])  # "a" is now the most recent
+    cache(["c"])
+    assert cache.stats()["memory_evictions"] == 1 and cache.stats()["memory_bytes"] <= 32
+    cache(["a", "b"])
+    assert provider.calls[-1] == ["b"]
+
+
+def test_disk_tier_survives_restart_and_stays_under_disk_max_bytes(tmp_path):
+    provider = CountingProvider()
+    cache = make_cache(provider, tmp_path, disk_max_bytes=160)
+    cache([f"t{i}" for i in range(20)])
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= 160 and stats["disk_evictions"] > 0
+    cache.disk.connection.close()
+
+    provider = CountingProvider()
+    restarted = make_cache(provider, tmp_path, disk_max_bytes=160)
+    assert restarted(["t19"]) == [vector("t19")]
+    assert provider.calls == [] and restarted.stats()["disk_hits"] == 1
+    # Evicted from disk: computed again
+    restarted(["t0"])
+    assert provider.calls == [["t0"]]
+
+
+def test_keys_are_isolated_by_provider_and_model(tmp_path):
+    make_cache(CountingProvider(), tmp_path)(["hola"])
+    for provider_name, model in [("deepseek", "mistral"), ("ollama", "llama3")]:
+        provider = CountingProvider()
+        cache = CachedEmbeddingFunction(
+            provider, provider=provider_name, model=model, disk_path=str(tmp_path / "cache.sqlite3"))
+        cache(["hola"])
+        assert provider.calls == [["hola"]]
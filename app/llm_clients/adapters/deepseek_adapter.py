@@ -1,9 +1,11 @@
 import os
-import requests
+import httpx
 from dotenv import load_dotenv
 import logging
 from app.embeddings.embeddings import DeepSeekEmbedding
+from app.utils.http_pool import http_pool
 from .adapter_registry import register_adapter
+from .streaming import iter_openai_deltas
 
 # Load environment variables
 load_dotenv()
@@ -30,20 +32,84 @@ def ask(prompt, model="deepseek-chat"):
     }
 
     try:
-        response = requests.post(url, headers=headers,
-                                 json=payload, timeout=15)
+        response = http_pool.client(url).post(
+            url, headers=headers, json=payload, timeout=15)
         response.raise_for_status()  # Will raise an HTTPError if the response code is 4xx/5xx
         return response.json()["choices"][0]["message"]["content"]
-    except requests.exceptions.HTTPError as http_err:
+    except httpx.HTTPStatusError as http_err:
         logging.error(
             f"HTTP error occurred while asking DeepSeek model: {http_err}")
         raise
-    except requests.exceptions.RequestException as req_err:
+    except httpx.RequestError as req_err:
         logging.error(
             f"Request error occurred while asking DeepSeek model: {req_err}")
         raise
 
 
+@register_adapter("deepseek")
+async def ask_async(prompt, model="deepseek-chat"):
+    """
+    Async variant of `ask`, so the event loop keeps serving while DeepSeek answers.
+    """
+    url = "https://api.deepseek.com/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7
+    }
+
+    try:
+        response = await http_pool.async_client(url).post(
+            url, headers=headers, json=payload, timeout=15)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+    except httpx.HTTPStatusError as http_err:
+        logging.error(
+            f"HTTP error occurred while asking DeepSeek model: {http_err}")
+        raise
+    except httpx.RequestError as req_err:
+        logging.error(
+            f"Request error occurred while asking DeepSeek model: {req_err}")
+        raise
+
+
+@register_adapter("deepseek")
+async def ask_stream(prompt, model="deepseek-chat"):
+    """
+    Streams the DeepSeek completion, yielding content chunks as they arrive.
+    """
+    url = "https://api.deepseek.com/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "stream": True
+    }
+
+    try:
+        client = http_pool.async_client(url)
+        async with client.stream("POST", url, headers=headers, json=payload, timeout=15) as response:
+            response.raise_for_status()
+            async for chunk in iter_openai_deltas(response):
+                yield chunk
+    except httpx.HTTPStatusError as http_err:
+        logging.error(
+            f"HTTP error occurred while streaming DeepSeek model: {http_err}")
+        raise
+    except httpx.RequestError as req_err:
+        logging.error(
+            f"Request error occurred while streaming DeepSeek model: {req_err}")
+        raise
+
+
 @register_adapter("deepseek")
 def get_embedding_function(model: str = "deepseek-chat"):
     """
@@ -1,9 +1,11 @@
 import os
-import requests
+import httpx
 from dotenv import load_dotenv
 import logging
 from app.embeddings.embeddings import MistralEmbedding
+from app.utils.http_pool import http_pool
 from .adapter_registry import register_adapter
+from .streaming import iter_openai_deltas
 
 # Load environment variables
 load_dotenv()
@@ -12,8 +14,20 @@ MISTRAL_API_KEY = os.getenv("MISTRAL_APIKEY")
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
+# A missing key must not break importing the app: only calls to Mistral fail, and the
+# router falls back to the next model.
 if not MISTRAL_API_KEY:
-    raise ValueError("MISTRAL_APIKEY not set in environment.")
+    logging.warning("MISTRAL_APIKEY not set in environment; Mistral calls will fail.")
+
+
+def _headers():
+    if not MISTRAL_API_KEY:
+        raise ValueError("MISTRAL_APIKEY not set in environment.")
+    return {
+        "Authorization": f"Bearer {MISTRAL_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
 
 @register_adapter("mistral")
 def ask(prompt, model="mistral-small"):
@@ -21,10 +35,7 @@ def ask(prompt, model="mistral-small"):
     Ask the Mistral model for a response based on the prompt.
     """
     url = "https://api.mistral.ai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {MISTRAL_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    headers = _headers()
     payload = {
         "model": model,
         "messages": [{"role": "user", "content": prompt}],
@@ -32,16 +43,68 @@ def ask(prompt, model="mistral-small"):
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
+        response = http_pool.client(url).post(url, headers=headers, json=payload, timeout=15)
         response.raise_for_status()  # Will raise an HTTPError if the response code is 4xx/5xx
         return response.json()["choices"][0]["message"]["content"]
-    except requests.exceptions.HTTPError as http_err:
+    except httpx.HTTPStatusError as http_err:
         logging.error(f"HTTP error occurred while asking Mistral model: {http_err}")
         raise
-    except requests.exceptions.RequestException as req_err:
+    except httpx.RequestError as req_err:
         logging.error(f"Request error occurred while asking Mistral model: {req_err}")
         raise
 
+@register_adapter("mistral")
+async def ask_async(prompt, model="mistral-small"):
+    """
+    Async variant of `ask`, so the event loop keeps serving while Mistral answers.
+    """
+    url = "https://api.mistral.ai/v1/chat/completions"
+    headers = _headers()
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7
+    }
+
+    try:
+        response = await http_pool.async_client(url).post(
+            url, headers=headers, json=payload, timeout=15)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+    except httpx.HTTPStatusError as http_err:
+        logging.error(f"HTTP error occurred while asking Mistral model: {http_err}")
+        raise
+    except httpx.RequestError as req_err:
+        logging.error(f"Request error occurred while asking Mistral model: {req_err}")
+        raise
+
+@register_adapter("mistral")
+async def ask_stream(prompt, model="mistral-small"):
+    """
+    Streams the Mistral completion, yielding content chunks as they arrive.
+    """
+    url = "https://api.mistral.ai/v1/chat/completions"
+    headers = _headers()
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "stream": True
+    }
+
+    try:
+        client = http_pool.async_client(url)
+        async with client.stream("POST", url, headers=headers, json=payload, timeout=15) as response:
+            response.raise_for_status()
+            async for chunk in iter_openai_deltas(response):
+                yield chunk
+    except httpx.HTTPStatusError as http_err:
+        logging.error(f"HTTP error occurred while streaming Mistral model: {http_err}")
+        raise
+    except httpx.RequestError as req_err:
+        logging.error(f"Request error occurred while streaming Mistral model: {req_err}")
+        raise
+
 @register_adapter("mistral")
 def get_embedding_function(model: str = "mistral-small"):
     """
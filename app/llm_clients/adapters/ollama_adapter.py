@@ -1,7 +1,9 @@
-import requests
+import httpx
 import logging
 from app.embeddings.embeddings import OllamaEmbedding
+from app.utils.http_pool import http_pool
 from .adapter_registry import register_adapter
+from .streaming import iter_ollama_chunks
 
 # Set up the Ollama API URL
 OLLAMA_URL = "http://host.docker.internal:11434/api/generate"
@@ -22,16 +24,63 @@ def ask(prompt: str, model: str = "mistral") -> str:
 
     try:
         # Make a POST request to Ollama API
-        response = requests.post(OLLAMA_URL, json=payload, timeout=10)
+        response = http_pool.client(OLLAMA_URL).post(OLLAMA_URL, json=payload, timeout=10)
         response.raise_for_status()  # Will raise an HTTPError if the response code is 4xx/5xx
         return response.json().get("response", "")
-    except requests.exceptions.HTTPError as http_err:
+    except httpx.HTTPStatusError as http_err:
         logging.error(f"HTTP error occurred while asking Ollama model: {http_err}")
         raise
-    except requests.exceptions.RequestException as req_err:
+    except httpx.RequestError as req_err:
         logging.error(f"Request error occurred while asking Ollama model: {req_err}")
         raise
 
+@register_adapter("ollama")
+async def ask_async(prompt: str, model: str = "mistral") -> str:
+    """
+    Async variant of `ask`, so the event loop keeps serving while Ollama answers.
+    """
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": False
+    }
+
+    try:
+        response = await http_pool.async_client(OLLAMA_URL).post(
+            OLLAMA_URL, json=payload, timeout=10)
+        response.raise_for_status()
+        return response.json().get("response", "")
+    except httpx.HTTPStatusError as http_err:
+        logging.error(f"HTTP error occurred while asking Ollama model: {http_err}")
+        raise
+    except httpx.RequestError as req_err:
+        logging.error(f"Request error occurred while asking Ollama model: {req_err}")
+        raise
+
+@register_adapter("ollama")
+async def ask_stream(prompt: str, model: str = "mistral"):
+    """
+    Streams the Ollama completion, yielding response fragments as they arrive.
+    """
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": True
+    }
+
+    try:
+        client = http_pool.async_client(OLLAMA_URL)
+        async with client.stream("POST", OLLAMA_URL, json=payload, timeout=10) as response:
+            response.raise_for_status()
+            async for chunk in iter_ollama_chunks(response):
+                yield chunk
+    except httpx.HTTPStatusError as http_err:
+        logging.error(f"HTTP error occurred while streaming Ollama model: {http_err}")
+        raise
+    except httpx.RequestError as req_err:
+        logging.error(f"Request error occurred while streaming Ollama model: {req_err}")
+        raise
+
 @register_adapter("ollama")
 def get_embedding_function(model: str = "mistral"):
     """
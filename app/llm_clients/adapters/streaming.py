@@ -0,0 +1,35 @@
+import json
+from typing import AsyncIterator
+
+import httpx
+
+
+async def iter_openai_deltas(response: httpx.Response) -> AsyncIterator[str]:
+    """
+    Yields the content deltas of an OpenAI-compatible SSE completion stream
+    (DeepSeek, Mistral): `data: {...}` lines terminated by `data: [DONE]`.
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        choices = json.loads(data).get("choices") or [{}]
+        content = choices[0].get("delta", {}).get("content")
+        if content:
+            yield content
+
+
+async def iter_ollama_chunks(response: httpx.Response) -> AsyncIterator[str]:
+    """
+    Yields the `response` fragments of an Ollama NDJSON generate stream.
+    """
+    async for line in response.aiter_lines():
+        if not line.strip():
+            continue
+        chunk = json.loads(line)
+        if chunk.get("response"):
+            yield chunk["response"]
+        if chunk.get("done"):
+            break
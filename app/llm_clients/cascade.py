@@ -0,0 +1,244 @@
+import re
+import asyncio
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.utils import run_blocking
+
+# Answers that decline or hedge instead of answering (Spanish and English)
+REFUSAL_RE = re.compile(
+    r"\b(no (lo )?s[eé]|no estoy segur[oa]|no puedo (ayudar|responder)|no tengo (esa )?informaci[oó]n|"
+    r"lo siento|como (modelo|ia)|i don'?t know|i'?m not sure|i cannot|i can'?t help|as an ai)\b",
+    re.IGNORECASE,
+)
+
+
+class HeuristicScorer:
+    """
+    Confidence from the answer alone: empty answers score 0; refusals, answers shorter
+    than `min_chars` and degenerate repetition (few distinct words) lower the score.
+    """
+
+    extra_samples = 0
+
+    def __init__(self, min_chars: int = 20, refusal_penalty: float = 0.6,
+                 short_penalty: float = 0.4, repetition_penalty: float = 0.4):
+        self.min_chars = min_chars
+        self.refusal_penalty = refusal_penalty
+        self.short_penalty = short_penalty
+        self.repetition_penalty = repetition_penalty
+
+    def __call__(self, query: str, responses: List[str]) -> float:
+        answer = (responses[0] or "").strip()
+        if not answer:
+            return 0.0
+        score = 1.0
+        if REFUSAL_RE.search(answer[:300]):
+            score -= self.refusal_penalty
+        if len(answer) < self.min_chars:
+            score -= self.short_penalty
+        words = answer.lower().split()
+        if len(words) >= 20 and len(set(words)) / len(words) < 0.3:
+            score -= self.repetition_penalty
+        return max(0.0, score)
+
+
+class SelfConsistencyScorer:
+    """
+    Asks the same tier `samples` more times and scores how much the answers agree: the
+    mean cosine similarity of their embeddings to the first one, capped by the heuristic
+    score. The cascade only resamples tiers that can still escalate, so the extra calls
+    go to the cheap models, never to the last tier.
+    """
+
+    def __init__(self, samples: int = 2, embedding_fn: Optional[Callable] = None, **heuristic):
+        self.extra_samples = samples
+        self._embedding_fn = embedding_fn
+        self.heuristic = HeuristicScorer(**heuristic)
+
+    @property
+    def embedding_fn(self):
+        if self._embedding_fn is None:
+            from app.llm_clients.llm_router import get_embedding_function
+            self._embedding_fn = get_embedding_function()
+        return self._embedding_fn
+
+    def __call__(self, query: str, responses: List[str]) -> float:
+        heuristic = self.heuristic(query, responses)
+        answers = [response for response in responses if response]
+        if heuristic == 0.0 or len(answers) < 2:
+            return heuristic
+        vectors = np.asarray(self.embedding_fn(answers), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        consistency = float(np.mean(vectors[1:] @ vectors[0]))
+        return min(heuristic, max(0.0, consistency))
+
+
+SCORERS = {
+    "heuristic": HeuristicScorer,
+    "self_consistency": SelfConsistencyScorer,
+}
+
+
+def build_scorer(spec: Dict[str, Any]):
+    """
+    `spec["name"]` is a key of SCORERS or "package.module:callable" (a scorer class or
+    function taking (query, responses) -> confidence in [0, 1]); the other keys are
+    passed to classes as keyword arguments.
+    """
+    options = {key: value for key, value in spec.items() if key != "name"}
+    name = spec.get("name", "heuristic")
+    if name in SCORERS:
+        return SCORERS[name](**options)
+    module_name, _, attr = name.partition(":")
+    scorer = getattr(importlib.import_module(module_name), attr)
+    return scorer(**options) if isinstance(scorer, type) else scorer
+
+
+class CascadeStrategy:
+    """
+    Asks the cheapest tier first and escalates to the next tier only when the answer's
+    confidence is below that tier's `threshold`. The last tier's answer is always taken;
+    if it fails, the most confident answer seen so far is returned instead.
+
+    `tiers` come from the "cascade" section of llm_config.json:
+    [{"model": "ollama", "threshold": 0.7}, {"model": "deepseek"}]. Disabled models and
+    models whose circuit breaker is open are skipped.
+    """
+
+    def __init__(self, tiers: List[Dict[str, Any]], scorer: Callable):
+        self.tiers = tiers
+        self.scorer = scorer
+        self._lock = threading.Lock()
+        self.stats_by_tier = {
+            tier["model"]: {"attempts": 0, "accepted": 0, "escalated": 0, "failed": 0, "skipped": 0,
+                            "confidence": 0.0, "latency": 0.0}
+            for tier in tiers
+        }
+        self.requests = 0
+        self.unanswered = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "CascadeStrategy":
+        cascade = config.get("cascade", {})
+        tiers = cascade.get("tiers") or [{"model": model_key} for model_key in config["priority"]]
+        return cls(tiers, build_scorer(cascade.get("scorer", {"name": "heuristic"})))
+
+    def _record(self, model_key: str, outcome: str, confidence: float = None, latency: float = None) -> None:
+        with self._lock:
+            stats = self.stats_by_tier[model_key]
+            stats[outcome] += 1
+            if outcome in ("accepted", "escalated"):
+                stats["attempts"] += 1
+                stats["confidence"] += confidence
+                stats["latency"] += latency
+            elif outcome == "failed":
+                stats["attempts"] += 1
+
+    def _extra_samples(self, tier_index: int) -> int:
+        # The last tier's answer is taken anyway: no point resampling the remote model
+        if tier_index == len(self.tiers) - 1:
+            return 0
+        return getattr(self.scorer, "extra_samples", 0)
+
+    def _decide(self, tier: Dict[str, Any], is_last: bool, answer: Dict[str, Any], confidence: float) -> bool:
+        accepted = is_last or confidence >= tier.get("threshold", 0.0)
+        self._record(tier["model"], "accepted" if accepted else "escalated", confidence, answer["latency"])
+        return accepted
+
+    def respond(self, prompt: str, query: str, models: Dict[str, Dict[str, Any]],
+                acquire: Callable[[str], bool], ask_one: Callable) -> Optional[str]:
+        """
+        `models` are the enabled model configs by key, `acquire` the router's breaker check
+        and `ask_one(model_key, model_conf, prompt)` the orchestrator's single-model call.
+        """
+        with self._lock:
+            self.requests += 1
+        best = None
+        for i, tier in enumerate(self.tiers):
+            model_key = tier["model"]
+            model_conf = models.get(model_key)
+            if model_conf is None or not acquire(model_key):
+                self._record(model_key, "skipped")
+                continue
+            try:
+                answer = ask_one(model_key, model_conf, prompt)
+            except Exception as e:
+                print(f"[WARN] Cascada: falló el modelo {model_key}: {e}")
+                self._record(model_key, "failed")
+                continue
+            samples = [answer["response"]]
+            for _ in range(self._extra_samples(i)):
+                try:
+                    if acquire(model_key):
+                        samples.append(ask_one(model_key, model_conf, prompt)["response"])
+                except Exception:
+                    pass  # fewer samples, the scorer copes
+            confidence = self.scorer(query, samples)
+            if best is None or confidence > best[0]:
+                best = (confidence, answer["response"])
+            if self._decide(tier, i == len(self.tiers) - 1, answer, confidence):
+                return answer["response"]
+        return self._fallback(best)
+
+    async def respond_async(self, prompt: str, query: str, models: Dict[str, Dict[str, Any]],
+                            acquire: Callable[[str], bool], ask_one_async: Callable) -> Optional[str]:
+        """
+        Async variant of `respond`; extra self-consistency samples are requested concurrently.
+        """
+        with self._lock:
+            self.requests += 1
+        best = None
+        for i, tier in enumerate(self.tiers):
+            model_key = tier["model"]
+            model_conf = models.get(model_key)
+            if model_conf is None or not acquire(model_key):
+                self._record(model_key, "skipped")
+                continue
+            extra = [ask_one_async(model_key, model_conf, prompt)
+                     for _ in range(self._extra_samples(i)) if acquire(model_key)]
+            results = await asyncio.gather(
+                ask_one_async(model_key, model_conf, prompt), *extra, return_exceptions=True)
+            # Any sample that answered stands in for a failed first one
+            answers = [result for result in results if not isinstance(result, BaseException)]
+            if not answers:
+                print(f"[WARN] Cascada: falló el modelo {model_key}: {results[0]!r}")
+                self._record(model_key, "failed")
+                continue
+            answer = answers[0]
+            samples = [result["response"] for result in answers]
+            confidence = await run_blocking(self.scorer, query, samples)
+            if best is None or confidence > best[0]:
+                best = (confidence, answer["response"])
+            if self._decide(tier, i == len(self.tiers) - 1, answer, confidence):
+                return answer["response"]
+        return self._fallback(best)
+
+    def _fallback(self, best) -> Optional[str]:
+        if best is None:
+            with self._lock:
+                self.unanswered += 1
+            return None
+        return best[1]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            tiers = {}
+            for tier in self.tiers:
+                stats = dict(self.stats_by_tier[tier["model"]])
+                answered = stats["accepted"] + stats["escalated"]
+                stats["confidence"] = stats["confidence"] / answered if answered else 0.0
+                stats["latency"] = stats["latency"] / answered if answered else 0.0
+                stats["hit_rate"] = stats["accepted"] / self.requests if self.requests else 0.0
+                stats["threshold"] = tier.get("threshold")
+                tiers[tier["model"]] = stats
+            return {
+                "enabled": True,
+                "requests": self.requests,
+                "unanswered": self.unanswered,
+                "tiers": tiers,
+            }
@@ -0,0 +1,48 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class LatencyTracker:
+    """
+    Rolling window of observed latencies (seconds) per model.
+    Thread-safe: sync fan-out records from worker threads.
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_key: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(model_key)
+            if samples is None:
+                samples = self._samples[model_key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, model_key: str) -> int:
+        with self._lock:
+            return len(self._samples.get(model_key, ()))
+
+    def percentile(self, model_key: str, q: float) -> Optional[float]:
+        """
+        Returns the q-th percentile (0-100) of the window, or None without samples.
+        """
+        with self._lock:
+            samples = list(self._samples.get(model_key, ()))
+        if not samples:
+            return None
+        return float(np.percentile(samples, q))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {
+            model_key: {
+                "samples": self.count(model_key),
+                "p50": self.percentile(model_key, 50),
+                "p95": self.percentile(model_key, 95),
+            }
+            for model_key in list(self._samples)
+        }
@@ -1,59 +1,303 @@
-import json
-from typing import List, Dict, Tuple, Any
-from app.llm_clients.adapters.adapter_registry import adapter_map
-from app.llm_clients.llm_router import ask_llm
-from app.utils.utils import load_template, render_template
-
-TEMPLATE_PATH = "app/llm_clients/prompts/rank_candidates.j2"
-
-
-class LLMOrchestrator:
-    def __init__(self, config_path: str = "app/llm_clients/llm_config.json"):
-        with open(config_path) as f:
-            self.config = json.load(f)
-        self.adapters = adapter_map
-
-    def ask_all(self, prompt: str) -> List[Dict[str, Any]]:
-        """
-        Send the same prompt to all enabled models in parallel (sync for now).
-        Returns list of dicts with model and response.
-        """
-        candidates = []
-        for model_key in self.config["priority"]:
-            model_conf = self.config["models"].get(model_key)
-            if not model_conf or not model_conf.get("enabled"):
-                continue
-
-            model_name = model_conf["model_name"]
-            try:
-                response = self.adapters[model_key]["ask"](prompt, model_name)
-                candidates.append({
-                    "model": model_key,
-                    "response": response
-                })
-            except Exception as e:
-                print(f"[WARN] Model {model_key} failed: {e}")
-
-        return candidates
-
-    def rank_candidates(self, query: str, candidates: List[str]) -> Tuple[str, str]:
-        """
-        Uses the meta-LLM to select the best answer among candidates.
-        Returns the selected candidate.
-        """
-        prompt_str = load_template(TEMPLATE_PATH)
-        rendered_prompt = render_template(prompt_str, {
-            "query": query,
-            "candidates": candidates
-        })
-
-        best_answer = ask_llm(rendered_prompt)
-        return best_answer, rendered_prompt
-
-    def respond(self, prompt: str) -> str:
-        """
-        Main entrypoint. Ask all LLMs, evaluate, and return best response.
-        """
-        candidates = self.ask_all(prompt)
-        best = self.rank_candidates(prompt, candidates)
-        return best["response"]
+import json
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import List, Dict, Tuple, Any
+from app.llm_clients.adapters.adapter_registry import adapter_map
+from app.llm_clients.llm_router import ask_llm, ask_llm_async, ask_llm_stream, model_router
+from app.llm_clients.prompt_registry import get_prompt_registry
+from app.llm_clients.ranking import CandidateRanker, LocalRanker, MetaLLMRanker
+from app.llm_clients.cascade import CascadeStrategy
+from app.utils.tracing import span
+
+RANK_TEMPLATE = "rank_candidates.j2"
+
+# Threads for the sync fan-out; a timed-out model call keeps its thread until the adapter gives up.
+_fanout_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-fanout")
+
+
+class LLMOrchestrator:
+    def __init__(self, config_path: str = "app/llm_clients/llm_config.json"):
+        with open(config_path) as f:
+            self.config = json.load(f)
+        self.adapters = adapter_map
+        self.fanout = self.config.get("fanout", {})
+        self.router = model_router
+        # The router's tracker: hedging delays and routing decisions see the same samples
+        self.latency = self.router.latency
+        self.ranker = self._build_ranker()
+        # "fanout" (every model, best answer ranked) or "cascade" (cheapest tier first)
+        self.strategy = self.config.get("strategy", "fanout")
+        self.cascade = CascadeStrategy.from_config(self.config) if self.strategy == "cascade" else None
+
+    def _build_ranker(self) -> CandidateRanker:
+        """
+        "ranking" section of the config: strategy "local" (default, embeddings, escalates to
+        the meta-LLM only when too close to call) or "meta_llm" (always a meta-LLM completion).
+        """
+        ranking = self.config.get("ranking", {})
+        meta_llm = MetaLLMRanker(self.rank_candidates, self.rank_candidates_async)
+        if ranking.get("strategy", "local") == "meta_llm":
+            return meta_llm
+        return LocalRanker(
+            escalation=meta_llm if ranking.get("escalate", True) else None,
+            agreement_threshold=ranking.get("agreement_threshold", 0.92),
+            min_margin=ranking.get("min_margin", 0.02),
+            query_weight=ranking.get("query_weight", 0.5),
+        )
+
+    def _enabled_models(self) -> List[Tuple[str, Dict[str, Any]]]:
+        models = []
+        for model_key in self.config["priority"]:
+            model_conf = self.config["models"].get(model_key)
+            if not model_conf or not model_conf.get("enabled"):
+                continue
+            models.append((model_key, model_conf))
+        return models
+
+    def _routed_models(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Enabled models whose circuit breaker lets a request through, in routing order.
+        """
+        return [(model_key, model_conf) for model_key, model_conf in self.router.route(self._enabled_models())
+                if self.router.acquire(model_key)]
+
+    def cache_namespace(self) -> str:
+        """
+        Response-cache namespace: the enabled models, so answers from one model set are
+        never served for another.
+        """
+        return "+".join(f"{model_key}:{model_conf['model_name']}" for model_key, model_conf in self._enabled_models())
+
+    def context_budget(self, default: int) -> int:
+        """
+        Token budget for retrieved context: the smallest `context_tokens` among the enabled
+        models (`default` for models without one), since the same prompt goes to all of them.
+        """
+        budgets = [model_conf.get("context_tokens", default) for _, model_conf in self._enabled_models()]
+        return min(budgets, default=default)
+
+    def _timeout_for(self, model_conf: Dict[str, Any]) -> float:
+        return model_conf.get("timeout_seconds", self.fanout.get("timeout_seconds", 15))
+
+    def _quorum(self, n_models: int) -> int:
+        quorum = self.fanout.get("quorum") or n_models
+        return max(1, min(quorum, n_models))
+
+    def _ask_one(self, model_key: str, model_conf: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            with span(f"llm.{model_key}"):
+                response = self.adapters[model_key]["ask"](prompt, model_conf["model_name"])
+        except Exception as e:
+            self.router.record_failure(model_key, e)
+            raise
+        latency = time.perf_counter() - start
+        self.router.record_success(model_key, latency)
+        return {"model": model_key, "response": response, "latency": latency}
+
+    async def _ask_one_async(self, model_key: str, model_conf: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            with span(f"llm.{model_key}"):
+                response = await asyncio.wait_for(
+                    self.adapters[model_key]["ask_async"](prompt, model_conf["model_name"]),
+                    timeout=self._timeout_for(model_conf)
+                )
+        except asyncio.CancelledError:
+            # Straggler cancelled after quorum: no outcome to record
+            self.router.release(model_key)
+            raise
+        except Exception as e:
+            self.router.record_failure(model_key, e)
+            raise
+        latency = time.perf_counter() - start
+        self.router.record_success(model_key, latency)
+        return {"model": model_key, "response": response, "latency": latency}
+
+    def ask_all(self, prompt: str) -> List[Dict[str, Any]]:
+        """
+        Send the same prompt to all enabled models in parallel (thread fan-out).
+        Returns as soon as `quorum` models answered or the slowest per-model timeout expires;
+        stragglers are abandoned.
+        Returns list of dicts with model and response.
+        """
+        models = self._routed_models()
+        if not models:
+            return []
+
+        quorum = self._quorum(len(models))
+        deadline = max(self._timeout_for(conf) for _, conf in models)
+        futures = {
+            _fanout_executor.submit(contextvars.copy_context().run, self._ask_one, model_key, model_conf, prompt): model_key
+            for model_key, model_conf in models
+        }
+
+        candidates = []
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                try:
+                    candidates.append(future.result())
+                except Exception as e:
+                    print(f"[WARN] Model {futures[future]} failed: {e}")
+                    continue
+                if len(candidates) >= quorum:
+                    break
+        except FuturesTimeoutError:
+            print(f"[WARN] Fan-out timeout after {deadline}s, {len(candidates)} answers")
+        finally:
+            for future in futures:
+                if future.cancel():
+                    self.router.release(futures[future])
+
+        return candidates
+
+    async def ask_all_async(self, prompt: str, hedge: bool = None) -> List[Dict[str, Any]]:
+        """
+        Async variant of `ask_all`: every enabled model is queried concurrently, each under its
+        own timeout. Returns once `quorum` good answers arrived and cancels the stragglers.
+
+        With hedging enabled only the primary model is asked; if it has not answered after its
+        observed p95 latency a backup request goes to the next model, and the first good answer wins.
+        Returns list of dicts with model and response.
+        """
+        hedging = self.fanout.get("hedging", {})
+        if hedge is None:
+            hedge = hedging.get("enabled", False)
+        if hedge:
+            # Backups claim their breaker slot only if they are actually launched
+            return await self._ask_hedged(prompt, self.router.route(self._enabled_models()), hedging)
+
+        models = self._routed_models()
+        if not models:
+            return []
+
+        quorum = self._quorum(len(models))
+        tasks = {
+            asyncio.create_task(self._ask_one_async(model_key, model_conf, prompt)): model_key
+            for model_key, model_conf in models
+        }
+
+        candidates = []
+        pending = set(tasks)
+        try:
+            while pending and len(candidates) < quorum:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        print(f"[WARN] Model {tasks[task]} failed: {task.exception()!r}")
+                        continue
+                    candidates.append(task.result())
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return candidates[:quorum]
+
+    def _hedge_delay(self, model_key: str, hedging: Dict[str, Any]) -> float:
+        if self.latency.count(model_key) < hedging.get("min_samples", 20):
+            return hedging.get("default_delay_seconds", 2.0)
+        return self.latency.percentile(model_key, hedging.get("percentile", 95))
+
+    async def _ask_hedged(self, prompt: str, models, hedging: Dict[str, Any]) -> List[Dict[str, Any]]:
+        backups = list(models)
+        tasks = {}
+        pending = set()
+
+        def launch():
+            while backups:
+                model_key, model_conf = backups.pop(0)
+                if not self.router.acquire(model_key):
+                    continue
+                task = asyncio.create_task(self._ask_one_async(model_key, model_conf, prompt))
+                tasks[task] = model_key
+                pending.add(task)
+                return model_key
+            return None
+
+        last_launched = launch()
+        try:
+            while pending:
+                delay = self._hedge_delay(last_launched, hedging) if backups else None
+                done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+
+                for task in done:
+                    if task.exception() is None:
+                        return [task.result()]
+                    print(f"[WARN] Model {tasks[task]} failed: {task.exception()!r}")
+
+                # Primary is past its p95 (or failed outright): fire the backup request.
+                if backups and (not done or not pending):
+                    last_launched = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return []
+
+    def rank_candidates(self, query: str, candidates: List[str]) -> Tuple[str, str]:
+        """
+        Asks the meta-LLM which candidate is best. Returns its answer (the candidate
+        number, see `parse_choice`) and the rendered prompt.
+        """
+        rendered_prompt = get_prompt_registry().render(RANK_TEMPLATE, query=query, candidates=candidates)
+
+        best_answer = ask_llm(rendered_prompt)
+        return best_answer, rendered_prompt
+
+    async def rank_candidates_async(self, query: str, candidates: List[str]) -> Tuple[str, str]:
+        """
+        Async variant of `rank_candidates`.
+        """
+        rendered_prompt = get_prompt_registry().render(RANK_TEMPLATE, query=query, candidates=candidates)
+
+        best_answer = await ask_llm_async(rendered_prompt)
+        return best_answer, rendered_prompt
+
+    def respond(self, prompt: str, query: str = None) -> str:
+        """
+        Main entrypoint. Ask all LLMs, evaluate, and return best response.
+        `query` is the user question the candidates are ranked against (the prompt if omitted).
+        """
+        if self.cascade is not None:
+            response = self.cascade.respond(
+                prompt, query or prompt, dict(self._enabled_models()), self.router.acquire, self._ask_one)
+            if response is None:
+                raise RuntimeError("No hay modelos disponibles o todos fallaron.")
+            return response
+        candidates = self.ask_all(prompt)
+        if not candidates:
+            raise RuntimeError("No hay modelos disponibles o todos fallaron.")
+        if len(candidates) == 1:
+            return candidates[0]["response"]
+        with span("ranking"):
+            return self.ranker.rank(query or prompt, candidates)["response"]
+
+    async def respond_async(self, prompt: str, query: str = None) -> str:
+        """
+        Async entrypoint, same flow as `respond` without blocking the event loop.
+        """
+        if self.cascade is not None:
+            response = await self.cascade.respond_async(
+                prompt, query or prompt, dict(self._enabled_models()), self.router.acquire, self._ask_one_async)
+            if response is None:
+                raise RuntimeError("No hay modelos disponibles o todos fallaron.")
+            return response
+        candidates = await self.ask_all_async(prompt)
+        if not candidates:
+            raise RuntimeError("No hay modelos disponibles o todos fallaron.")
+        if len(candidates) == 1:
+            return candidates[0]["response"]
+        with span("ranking"):
+            result = await self.ranker.rank_async(query or prompt, candidates)
+        return result["response"]
+
+    async def respond_stream(self, prompt: str):
+        """
+        Streaming entrypoint. Candidates cannot be ranked before they are complete, so the
+        stream comes from the highest-priority model that answers.
+        """
+        async for chunk in ask_llm_stream(prompt):
+            yield chunk
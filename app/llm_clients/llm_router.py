@@ -1,32 +1,131 @@
+import os
 import json
+import time
+import asyncio
+import threading
 import app.llm_clients.adapters.deepseek_adapter
 import app.llm_clients.adapters.ollama_adapter
 import app.llm_clients.adapters.mistral_adapter
 from .adapters.adapter_registry import adapter_map
+from app.embeddings.embedding_cache import CachedEmbeddingFunction
+from app.embeddings.embedding_batcher import BatchingEmbeddingFunction
+from app.llm_clients.model_router import ModelRouter
+from app.utils.tracing import TRACING_ENABLED, TracedEmbeddingFunction, span
 
 # Carga la configuración de prioridad y modelos habilitados
 with open("app/llm_clients/llm_config.json") as f:
     config = json.load(f)
 
+# Circuit breakers and latency/error statistics per model, shared by every request
+model_router = ModelRouter.from_config(config)
 
-def ask_llm(prompt):
+_embedding_function = None
+_embedding_lock = threading.Lock()
+
+
+def _enabled_models():
+    models = []
     for model_key in config["priority"]:
         model_conf = config["models"].get(model_key)
         if not model_conf or not model_conf.get("enabled"):
             continue
+        models.append((model_key, model_conf))
+    return models
+
+
+def ask_llm(prompt):
+    for model_key, model_conf in model_router.route(_enabled_models()):
+        if not model_router.acquire(model_key):
+            continue
+
+        start = time.perf_counter()
+        try:
+            model_name = model_conf["model_name"]
+            with span(f"llm.{model_key}"):
+                response = adapter_map[model_key]["ask"](prompt, model_name)
+        except Exception as e:
+            model_router.record_failure(model_key, e)
+            print(f"[WARN] Falló el modelo {model_key}: {e}")
+            if not config.get("fallback_enabled"):
+                raise
+            continue
+        model_router.record_success(model_key, time.perf_counter() - start)
+        return response
+
+    raise RuntimeError("No hay modelos disponibles o todos fallaron.")
+
+
+async def ask_llm_async(prompt):
+    for model_key, model_conf in model_router.route(_enabled_models()):
+        if not model_router.acquire(model_key):
+            continue
 
+        start = time.perf_counter()
         try:
             model_name = model_conf["model_name"]
-            return adapter_map[model_key]["ask"](prompt, model_name)
+            with span(f"llm.{model_key}"):
+                response = await adapter_map[model_key]["ask_async"](prompt, model_name)
+        except asyncio.CancelledError:
+            model_router.release(model_key)
+            raise
         except Exception as e:
+            model_router.record_failure(model_key, e)
             print(f"[WARN] Falló el modelo {model_key}: {e}")
             if not config.get("fallback_enabled"):
                 raise
+            continue
+        model_router.record_success(model_key, time.perf_counter() - start)
+        return response
+
+    raise RuntimeError("No hay modelos disponibles o todos fallaron.")
+
+
+async def ask_llm_stream(prompt):
+    """
+    Streams chunks from the first model that answers. Falling back to the next model is
+    only possible before the first chunk was emitted.
+    """
+    for model_key, model_conf in model_router.route(_enabled_models()):
+        if not model_router.acquire(model_key):
+            continue
+
+        started = False
+        start = time.perf_counter()
+        try:
+            model_name = model_conf["model_name"]
+            async for chunk in adapter_map[model_key]["ask_stream"](prompt, model_name):
+                if not started:
+                    # Time to first chunk: what a fallback would have to beat
+                    model_router.record_success(model_key, time.perf_counter() - start)
+                    started = True
+                yield chunk
+            return
+        except (asyncio.CancelledError, GeneratorExit):
+            if not started:
+                model_router.release(model_key)
+            raise
+        except Exception as e:
+            model_router.record_failure(model_key, e)
+            print(f"[WARN] Falló el modelo {model_key}: {e}")
+            if started or not config.get("fallback_enabled"):
+                raise
 
     raise RuntimeError("No hay modelos disponibles o todos fallaron.")
 
 
 def get_embedding_function():
+    """
+    Returns the process-wide embedding function, cached (LRU + disk) unless EMBEDDING_CACHE=false.
+    Every memory layer shares it, so a message embedded once is a cache hit for the others.
+    """
+    global _embedding_function
+    with _embedding_lock:
+        if _embedding_function is None:
+            _embedding_function = _build_embedding_function()
+        return _embedding_function
+
+
+def _build_embedding_function():
     for model_key in config["priority"]:
         model_conf = config["models"].get(model_key)
         if not model_conf or not model_conf.get("enabled"):
@@ -34,9 +133,20 @@ def get_embedding_function():
 
         try:
             model_name = model_conf["model_name"]
-            return adapter_map[model_key]["get_embedding_function"](
+            embedding_fn = adapter_map[model_key]["get_embedding_function"](
                 model=model_name
             )
+            if TRACING_ENABLED:
+                embedding_fn = TracedEmbeddingFunction(embedding_fn, stage="embedding.provider")
+            # cache -> batcher -> provider: only cache misses are queued for batching
+            if os.getenv("EMBEDDING_BATCH", "true").lower() == "true":
+                embedding_fn = BatchingEmbeddingFunction.from_env(embedding_fn, name=model_key)
+            if os.getenv("EMBEDDING_CACHE", "true").lower() == "true":
+                embedding_fn = CachedEmbeddingFunction.from_env(
+                    embedding_fn, provider=model_key, model=model_name)
+            if TRACING_ENABLED:
+                embedding_fn = TracedEmbeddingFunction(embedding_fn, stage="embedding")
+            return embedding_fn
         except Exception as e:
             print(f"[WARN] Falló función de embedding para {model_key}: {e}")
             if not config.get("fallback_enabled"):
@@ -45,6 +155,16 @@ def get_embedding_function():
     raise RuntimeError("No hay funciones de embedding disponibles.")
 
 
+def get_embedding_batcher():
+    """
+    The BatchingEmbeddingFunction inside the shared embedding function, or None if disabled.
+    """
+    embedding_fn = get_embedding_function()
+    while embedding_fn is not None and not isinstance(embedding_fn, BatchingEmbeddingFunction):
+        embedding_fn = getattr(embedding_fn, "embedding_fn", None)
+    return embedding_fn
+
+
 def get_embedding_model_and_config():
     for model_key in config["priority"]:
         model_conf = config["models"].get(model_key)
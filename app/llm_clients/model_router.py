@@ -0,0 +1,264 @@
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.llm_clients.latency_tracker import LatencyTracker
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-model circuit breaker. Trips (`open`) after `failure_threshold` consecutive
+    failures, so the model is skipped instead of costing a full timeout on every request.
+    After `recovery_seconds` it lets up to `half_open_probes` requests through
+    (`half_open`): a successful probe closes it again, a failed one re-opens it.
+
+    Not thread-safe on its own; ModelRouter serializes access.
+    """
+
+    def __init__(self, failure_threshold: int = 3, recovery_seconds: float = 30.0, half_open_probes: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probes_in_flight = 0
+        self.probe_started: Optional[float] = None
+        self.times_opened = 0
+
+    def _refresh(self, now: float) -> None:
+        if self.state == OPEN and now - self.opened_at >= self.recovery_seconds:
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+        elif self.state == HALF_OPEN and self.probes_in_flight and now - self.probe_started >= self.recovery_seconds:
+            # A probe that never reported back must not keep the model out forever
+            self.probes_in_flight = 0
+
+    def available(self, now: float) -> bool:
+        self._refresh(now)
+        return self.state == CLOSED or (self.state == HALF_OPEN and self.probes_in_flight < self.half_open_probes)
+
+    def acquire(self, now: float) -> bool:
+        if not self.available(now):
+            return False
+        if self.state == HALF_OPEN:
+            self.probes_in_flight += 1
+            self.probe_started = now
+        return True
+
+    def release(self) -> None:
+        if self.state == HALF_OPEN and self.probes_in_flight:
+            self.probes_in_flight -= 1
+
+    def success(self) -> bool:
+        """True if this closed a half-open breaker."""
+        if self.state == OPEN:
+            # A slow call started before the breaker tripped: only a probe may close it
+            return False
+        recovered = self.state == HALF_OPEN
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.probes_in_flight = 0
+        return recovered
+
+    def failure(self, now: float) -> bool:
+        """True if this opened the breaker."""
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.state = OPEN
+            self.opened_at = now
+            self.probes_in_flight = 0
+            self.times_opened += 1
+            return True
+        return False
+
+    def retry_in(self, now: float) -> Optional[float]:
+        if self.state != OPEN:
+            return None
+        return max(0.0, self.recovery_seconds - (now - self.opened_at))
+
+
+class ModelRouter:
+    """
+    Decides which models a request goes to, and in what order, from what the models did
+    recently: rolling latency percentiles (LatencyTracker) and outcomes per model, and a
+    circuit breaker per model.
+
+    `route()` drops models whose breaker is open and, with `adaptive` routing, orders the
+    rest by expected latency, p50 plus the error rate times the model timeout (what a
+    failure costs before falling back). Priority still counts: each position down the
+    configured priority multiplies a model's expected latency by `latency_margin`, so a
+    lower-priority model only moves ahead when it is clearly faster. Models are reordered
+    only once every candidate has `min_samples` latency samples.
+
+    Callers `acquire()` a model right before calling it (this claims half-open probe
+    slots) and report the outcome with `record_success` / `record_failure`, or `release`
+    when the call was abandoned without one (a cancelled fan-out straggler).
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        recovery_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        adaptive: bool = False,
+        latency_margin: float = 1.25,
+        min_samples: int = 20,
+        window: int = 200,
+        history: int = 50,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_probes = half_open_probes
+        self.adaptive = adaptive
+        self.latency_margin = latency_margin
+        self.min_samples = min_samples
+        self.window = window
+        self.clock = clock
+
+        self.latency = LatencyTracker(window=window)
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._outcomes: Dict[str, deque] = {}
+        self._timeouts: Dict[str, float] = {}
+        self.decisions: deque = deque(maxlen=history)
+        self.events: deque = deque(maxlen=history)
+        self.skipped = 0
+        self.reordered = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ModelRouter":
+        """
+        Built from the "routing" section of llm_config.json.
+        """
+        routing = config.get("routing", {})
+        breaker = routing.get("circuit_breaker", {})
+        return cls(
+            failure_threshold=breaker.get("failure_threshold", 3),
+            recovery_seconds=breaker.get("recovery_seconds", 30.0),
+            half_open_probes=breaker.get("half_open_probes", 1),
+            adaptive=routing.get("adaptive", False),
+            latency_margin=routing.get("latency_margin", 1.25),
+            min_samples=routing.get("min_samples", 20),
+            window=routing.get("window", 200),
+        )
+
+    def _breaker(self, model_key: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model_key)
+        if breaker is None:
+            breaker = self._breakers[model_key] = CircuitBreaker(
+                self.failure_threshold, self.recovery_seconds, self.half_open_probes)
+            self._outcomes[model_key] = deque(maxlen=self.window)
+        return breaker
+
+    def _event(self, model_key: str, event: str, detail: str = "") -> None:
+        self.events.append({"time": time.time(), "model": model_key, "event": event, "detail": detail})
+
+    def _error_rate(self, model_key: str) -> float:
+        outcomes = self._outcomes.get(model_key)
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+    def _expected_latency(self, model_key: str) -> Optional[float]:
+        if self.latency.count(model_key) < self.min_samples:
+            return None
+        p50 = self.latency.percentile(model_key, 50)
+        return p50 + self._error_rate(model_key) * self._timeouts.get(model_key, 0.0)
+
+    # --- Decisiones ---
+
+    def route(self, models: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        The enabled `models` (in priority order) that may be called now, in the order to try them.
+        """
+        now = self.clock()
+        with self._lock:
+            candidates, skipped = [], []
+            for position, (model_key, model_conf) in enumerate(models):
+                self._timeouts[model_key] = model_conf.get("timeout_seconds", 15)
+                if self._breaker(model_key).available(now):
+                    candidates.append((position, model_key, model_conf))
+                else:
+                    skipped.append(model_key)
+
+            mode = "priority"
+            if self.adaptive and len(candidates) > 1:
+                expected = {model_key: self._expected_latency(model_key) for _, model_key, _ in candidates}
+                if all(value is not None for value in expected.values()):
+                    mode = "adaptive"
+                    candidates.sort(key=lambda c: expected[c[1]] * self.latency_margin ** c[0])
+
+            order = [model_key for _, model_key, _ in candidates]
+            if mode == "adaptive" and order != [model_key for model_key, _ in models if model_key in order]:
+                self.reordered += 1
+            self.skipped += len(skipped)
+            self.decisions.append({"time": time.time(), "mode": mode, "order": order, "skipped": skipped})
+        return [(model_key, model_conf) for _, model_key, model_conf in candidates]
+
+    def acquire(self, model_key: str) -> bool:
+        with self._lock:
+            return self._breaker(model_key).acquire(self.clock())
+
+    def release(self, model_key: str) -> None:
+        with self._lock:
+            self._breaker(model_key).release()
+
+    def record_success(self, model_key: str, seconds: Optional[float] = None) -> None:
+        if seconds is not None:
+            self.latency.record(model_key, seconds)
+        with self._lock:
+            breaker = self._breaker(model_key)
+            self._outcomes[model_key].append(True)
+            if breaker.success():
+                self._event(model_key, "closed", "probe succeeded")
+                print(f"[INFO] Circuito cerrado para {model_key}: el modelo vuelve a responder.")
+
+    def record_failure(self, model_key: str, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            breaker = self._breaker(model_key)
+            self._outcomes[model_key].append(False)
+            if breaker.failure(self.clock()):
+                self._event(model_key, "opened", repr(error) if error is not None else "")
+                print(f"[WARN] Circuito abierto para {model_key} tras {breaker.consecutive_failures} fallos; "
+                      f"reintento en {self.recovery_seconds:.0f}s.")
+
+    # --- Estado ---
+
+    def state(self) -> Dict[str, Any]:
+        now = self.clock()
+        with self._lock:
+            models = {}
+            for model_key, breaker in self._breakers.items():
+                breaker._refresh(now)
+                models[model_key] = {
+                    "state": breaker.state,
+                    "consecutive_failures": breaker.consecutive_failures,
+                    "times_opened": breaker.times_opened,
+                    "retry_in_seconds": breaker.retry_in(now),
+                    "requests": len(self._outcomes[model_key]),
+                    "error_rate": self._error_rate(model_key),
+                    "samples": self.latency.count(model_key),
+                    "p50": self.latency.percentile(model_key, 50),
+                    "p95": self.latency.percentile(model_key, 95),
+                    "expected_latency": self._expected_latency(model_key),
+                }
+            return {
+                "adaptive": self.adaptive,
+                "latency_margin": self.latency_margin,
+                "min_samples": self.min_samples,
+                "circuit_breaker": {
+                    "failure_threshold": self.failure_threshold,
+                    "recovery_seconds": self.recovery_seconds,
+                    "half_open_probes": self.half_open_probes,
+                },
+                "models": models,
+                "skipped": self.skipped,
+                "reordered": self.reordered,
+                "decisions": list(self.decisions),
+                "events": list(self.events),
+            }
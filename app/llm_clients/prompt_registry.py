@@ -0,0 +1,51 @@
+import os
+import threading
+from typing import Optional
+
+from jinja2 import Environment, FileSystemLoader, Template
+
+PROMPTS_DIR = os.path.join(os.path.dirname(__file__), "prompts")
+
+
+class PromptRegistry:
+    """
+    Prompt templates by file name, compiled once by a shared `jinja2.Environment`.
+
+    With `auto_reload` (PROMPT_TEMPLATES_AUTO_RELOAD=true, for editing prompts while the
+    app runs) Jinja checks the file's mtime on every lookup; otherwise a template is read
+    and compiled on first use only.
+    """
+
+    def __init__(self, directory: str = PROMPTS_DIR, auto_reload: bool = False):
+        self.directory = directory
+        self.environment = Environment(
+            loader=FileSystemLoader(directory),
+            auto_reload=auto_reload,
+            cache_size=-1,
+            keep_trailing_newline=True,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+
+    def get(self, name: str) -> Template:
+        return self.environment.get_template(name)
+
+    def render(self, name: str, **variables) -> str:
+        return self.get(name).render(**variables)
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """
+    Process-wide registry for the templates in `app/llm_clients/prompts`.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry(
+                    auto_reload=os.getenv("PROMPT_TEMPLATES_AUTO_RELOAD", "false").lower() == "true")
+    return _registry
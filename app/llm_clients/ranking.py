@@ -0,0 +1,218 @@
+import re
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypedDict
+
+import numpy as np
+
+from app.utils.utils import run_blocking
+
+
+class RankResult(TypedDict):
+    response: str
+    model: Optional[str]
+    decision: str  # "agreement", "local" or "meta_llm"
+    scores: List[float]
+
+
+class CandidateRanker:
+    """
+    Picks the answer to return among the candidates of a fan-out. `candidates` are the
+    orchestrator's {"model", "response", "latency"} dicts; `query` is the user question.
+    """
+
+    name = "ranker"
+
+    def rank(self, query: str, candidates: List[Dict[str, Any]]) -> RankResult:
+        raise NotImplementedError
+
+    async def rank_async(self, query: str, candidates: List[Dict[str, Any]]) -> RankResult:
+        return await run_blocking(self.rank, query, candidates)
+
+    def stats(self) -> Dict:
+        return {"ranker": self.name}
+
+
+def _pick(candidates: List[Dict[str, Any]], index: int, decision: str, scores: List[float]) -> RankResult:
+    return {
+        "response": candidates[index]["response"],
+        "model": candidates[index].get("model"),
+        "decision": decision,
+        "scores": scores,
+    }
+
+
+def parse_choice(answer: str, n_candidates: int) -> Optional[int]:
+    """
+    0-based index of the candidate the meta-LLM chose ("2", "[2]", "Respuesta 2..."), or None.
+    """
+    for match in re.finditer(r"\d+", answer or ""):
+        choice = int(match.group())
+        if 1 <= choice <= n_candidates:
+            return choice - 1
+    return None
+
+
+class MetaLLMRanker(CandidateRanker):
+    """
+    Asks a model to choose: one more completion per answer. `rank_fn` / `rank_fn_async`
+    are `LLMOrchestrator.rank_candidates(_async)`, which return the meta-LLM's answer and
+    the rendered prompt.
+    """
+
+    name = "meta_llm"
+
+    def __init__(self, rank_fn: Callable, rank_fn_async: Callable):
+        self.rank_fn = rank_fn
+        self.rank_fn_async = rank_fn_async
+        self._lock = threading.Lock()
+        self.rankings = 0
+        self.unparsed = 0
+        self.seconds = 0.0
+
+    def _result(self, answer: str, candidates: List[Dict[str, Any]], seconds: float) -> RankResult:
+        choice = parse_choice(answer, len(candidates))
+        with self._lock:
+            self.rankings += 1
+            self.seconds += seconds
+            self.unparsed += choice is None
+        if choice is None:
+            print(f"[WARN] Respuesta del meta-LLM sin candidato válido: {answer[:80]!r}")
+            choice = 0
+        return _pick(candidates, choice, "meta_llm", [])
+
+    def rank(self, query: str, candidates: List[Dict[str, Any]]) -> RankResult:
+        start = time.perf_counter()
+        answer, _ = self.rank_fn(query, candidates)
+        return self._result(answer, candidates, time.perf_counter() - start)
+
+    async def rank_async(self, query: str, candidates: List[Dict[str, Any]]) -> RankResult:
+        start = time.perf_counter()
+        answer, _ = await self.rank_fn_async(query, candidates)
+        return self._result(answer, candidates, time.perf_counter() - start)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "ranker": self.name,
+                "rankings": self.rankings,
+                "unparsed": self.unparsed,
+                "avg_latency_seconds": self.seconds / self.rankings if self.rankings else 0.0,
+            }
+
+
+class LocalRanker(CandidateRanker):
+    """
+    Ranks candidates with embeddings instead of a completion.
+
+    Each candidate scores `query_weight` x its cosine similarity to the question plus the
+    rest x its mean similarity to the other candidates (agreement: answers most models
+    converge on are rarely the wrong one). When every pair of candidates is at least
+    `agreement_threshold` similar, they say the same thing and the question is not even
+    embedded. Only when the two best scores are within `min_margin` and the two answers
+    differ is the choice escalated to `escalation` (the meta-LLM), if there is one.
+
+    Latency saved is estimated per ranking not escalated as one completion, the mean
+    latency of the candidates themselves.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        embedding_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        escalation: Optional[CandidateRanker] = None,
+        agreement_threshold: float = 0.92,
+        min_margin: float = 0.02,
+        query_weight: float = 0.5
+    ):
+        self._embedding_fn = embedding_fn
+        self.escalation = escalation
+        self.agreement_threshold = agreement_threshold
+        self.min_margin = min_margin
+        self.query_weight = query_weight
+
+        self._lock = threading.Lock()
+        self.decisions = {"agreement": 0, "local": 0, "meta_llm": 0}
+        self.local_seconds = 0.0
+        self.latency_saved = 0.0
+
+    @property
+    def embedding_fn(self):
+        if self._embedding_fn is None:
+            # Lazy: the shared (cached, batched) embedding function is built on first use
+            from app.llm_clients.llm_router import get_embedding_function
+            self._embedding_fn = get_embedding_function()
+        return self._embedding_fn
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(self.embedding_fn(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def score(self, query: str, candidates: List[Dict[str, Any]]) -> Tuple[Optional[RankResult], List[float]]:
+        """
+        Local decision, or (None, scores) when the best candidates are too close to call.
+        """
+        vectors = self._embed([candidate["response"] for candidate in candidates])
+        similarity = vectors @ vectors.T
+        n = len(candidates)
+        pairs = similarity[~np.eye(n, dtype=bool)]
+        agreement = pairs.reshape(n, n - 1).mean(axis=1)
+
+        if pairs.min() >= self.agreement_threshold:
+            scores = agreement.tolist()
+            return _pick(candidates, int(np.argmax(agreement)), "agreement", scores), scores
+
+        relevance = vectors @ self._embed([query])[0]
+        scores = self.query_weight * relevance + (1 - self.query_weight) * agreement
+        order = np.argsort(-scores)
+        best, runner_up = order[0], order[1]
+        too_close = scores[best] - scores[runner_up] < self.min_margin
+        # Only a real tie escalates: near-identical answers at the top are equally good
+        if too_close and similarity[best, runner_up] < self.agreement_threshold and self.escalation is not None:
+            return None, scores.tolist()
+        return _pick(candidates, int(best), "local", scores.tolist()), scores.tolist()
+
+    def _record(self, decision: str, candidates: List[Dict[str, Any]], local_seconds: float) -> None:
+        latencies = [candidate["latency"] for candidate in candidates if candidate.get("latency") is not None]
+        with self._lock:
+            self.decisions[decision] += 1
+            self.local_seconds += local_seconds
+            if decision != "meta_llm" and latencies:
+                self.latency_saved += sum(latencies) / len(latencies)
+
+    def rank(self, query: str, candidates: List[Dict[str, Any]]) -> RankResult:
+        start = time.perf_counter()
+        result, scores = self.score(query, candidates)
+        local_seconds = time.perf_counter() - start
+        if result is None:
+            result = self.escalation.rank(query, candidates)
+            result["scores"] = scores
+        self._record(result["decision"], candidates, local_seconds)
+        return result
+
+    async def rank_async(self, query: str, candidates: List[Dict[str, Any]]) -> RankResult:
+        start = time.perf_counter()
+        result, scores = await run_blocking(self.score, query, candidates)
+        local_seconds = time.perf_counter() - start
+        if result is None:
+            result = await self.escalation.rank_async(query, candidates)
+            result["scores"] = scores
+        self._record(result["decision"], candidates, local_seconds)
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rankings = sum(self.decisions.values())
+            stats = {
+                "ranker": self.name,
+                "rankings": rankings,
+                "decisions": dict(self.decisions),
+                "escalation_rate": self.decisions["meta_llm"] / rankings if rankings else 0.0,
+                "avg_local_ms": self.local_seconds / rankings * 1000 if rankings else 0.0,
+                "latency_saved_seconds": self.latency_saved,
+            }
+        if self.escalation is not None:
+            stats["escalation"] = self.escalation.stats()
+        return stats
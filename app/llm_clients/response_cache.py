@@ -0,0 +1,219 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class SemanticResponseCache:
+    """
+    Answers near-identical questions from earlier responses instead of a new completion.
+
+    Entries are (question embedding, response) pairs kept in one FAISS inner-product index
+    per namespace (the set of models that produced the answer), with vectors normalized so
+    the inner product is the cosine similarity. A lookup hits when the best match reaches
+    `threshold` and has not outlived `ttl_seconds`.
+
+    Eviction is least-recently-used once there are more than `max_entries` entries or
+    their responses exceed `max_bytes`. Every namespace is dropped when the contents of
+    `config_path` change, checked at most once per `config_check_seconds`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries: int = 1000,
+        max_bytes: int = 16 * 1024 * 1024,
+        config_path: Optional[str] = "app/llm_clients/llm_config.json",
+        config_check_seconds: float = 5.0
+    ):
+        self.threshold = threshold
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.config_path = config_path
+        self.config_check_interval = config_check_seconds
+
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, "faiss.Index"] = {}
+        # id -> {"namespace", "response", "created", "latency", "bytes"}, least recent first
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._next_id = 0
+        self.total_bytes = 0
+
+        self._config_digest = self._read_config_digest()
+        self._config_mtime = self._config_mtime_ns()
+        self._config_checked = time.monotonic()
+
+        self.lookups = 0
+        self.hits = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bypassed = 0
+        self.latency_saved = 0.0
+        self.lookup_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "SemanticResponseCache":
+        """
+        RESPONSE_CACHE_THRESHOLD, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES
+        and RESPONSE_CACHE_MAX_MB.
+        """
+        return cls(
+            threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95")),
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+            max_bytes=int(float(os.getenv("RESPONSE_CACHE_MAX_MB", "16")) * 1024 * 1024),
+        )
+
+    # --- Invalidación por configuración ---
+
+    def _config_mtime_ns(self) -> Optional[int]:
+        try:
+            return os.stat(self.config_path).st_mtime_ns if self.config_path else None
+        except OSError:
+            return None
+
+    def _read_config_digest(self) -> Optional[str]:
+        try:
+            with open(self.config_path, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except (OSError, TypeError):
+            return None
+
+    def _check_config(self) -> None:
+        now = time.monotonic()
+        if self.config_path is None or now - self._config_checked < self.config_check_interval:
+            return
+        self._config_checked = now
+        mtime = self._config_mtime_ns()
+        if mtime == self._config_mtime:
+            return
+        self._config_mtime = mtime
+        digest = self._read_config_digest()
+        if digest != self._config_digest:
+            self._config_digest = digest
+            self.invalidations += 1
+            self._clear()
+            print("[INFO] llm_config.json cambió: caché de respuestas vaciada.")
+
+    # --- Índice ---
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _index(self, namespace: str, dim: int):
+        index = self._indexes.get(namespace)
+        if index is None:
+            import faiss  # lento de importar; solo si la caché se usa
+            index = self._indexes[namespace] = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        return index
+
+    def _best(self, namespace: str, vector: np.ndarray):
+        index = self._indexes.get(namespace)
+        if index is None or index.ntotal == 0 or index.d != vector.shape[1]:
+            return -1, -1.0
+        scores, ids = index.search(vector, 1)
+        return int(ids[0][0]), float(scores[0][0])
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._indexes[entry["namespace"]].remove_ids(np.asarray([entry_id], dtype=np.int64))
+        self.total_bytes -= entry["bytes"]
+
+    def _clear(self) -> None:
+        self._indexes.clear()
+        self._entries.clear()
+        self.total_bytes = 0
+
+    # --- API ---
+
+    def get(self, namespace: str, embedding: List[float]) -> Optional[str]:
+        """
+        Cached response for a question whose embedding is close enough to `embedding`,
+        or None.
+        """
+        start = time.perf_counter()
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._check_config()
+            self.lookups += 1
+            entry_id, score = self._best(namespace, vector)
+            response = None
+            if entry_id >= 0 and score >= self.threshold:
+                entry = self._entries[entry_id]
+                if time.time() - entry["created"] > self.ttl:
+                    self._remove(entry_id)
+                    self.expired += 1
+                else:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    self.latency_saved += entry["latency"]
+                    response = entry["response"]
+            self.lookup_seconds += time.perf_counter() - start
+        return response
+
+    def put(self, namespace: str, embedding: List[float], response: str, latency: float = 0.0) -> None:
+        """
+        Stores `response` for `embedding`; `latency` is what producing it took (reported
+        as saved time on every hit). A near-duplicate entry is replaced.
+        """
+        vector = self._normalize(embedding)
+        size = len(response.encode("utf-8")) + vector.nbytes
+        with self._lock:
+            self._check_config()
+            entry_id, score = self._best(namespace, vector)
+            if entry_id >= 0 and score >= self.threshold:
+                self._remove(entry_id)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index(namespace, vector.shape[1]).add_with_ids(vector, np.asarray([entry_id], dtype=np.int64))
+            self._entries[entry_id] = {
+                "namespace": namespace,
+                "response": response,
+                "created": time.time(),
+                "latency": latency,
+                "bytes": size,
+            }
+            self.total_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": True,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "namespaces": {name: index.ntotal for name, index in self._indexes.items()},
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "bypassed": self.bypassed,
+                "latency_saved_seconds": self.latency_saved,
+                "avg_lookup_ms": self.lookup_seconds / self.lookups * 1000 if self.lookups else 0.0,
+            }
@@ -0,0 +1,89 @@
+import asyncio
+
+from app.llm_clients.cascade import CascadeStrategy, HeuristicScorer, SelfConsistencyScorer, build_scorer
+
+MODELS = {"ollama": {"model_name": "mistral"}, "deepseek": {"model_name": "deepseek-chat"}}
+TIERS = [{"model": "ollama", "threshold": 0.7}, {"model": "deepseek"}]
+GOOD = "París es la capital de Francia desde hace siglos."
+
+
+def asker(answers, calls):
+    def ask_one(model_key, model_conf, prompt):
+        calls.append(model_key)
+        answer = answers[model_key]
+        if isinstance(answer, Exception):
+            raise answer
+        return {"model": model_key, "response": answer, "latency": 0.1}
+    return ask_one
+
+
+def test_heuristic_scorer_penalizes_refusals_short_and_repetitive_answers():
+    scorer = HeuristicScorer()
+    assert scorer("q", [GOOD]) == 1.0
+    assert scorer("q", [""]) == 0.0
+    assert scorer("q", ["Lo siento, no tengo información sobre eso."]) < 0.7
+    assert scorer("q", ["París."]) < 0.7
+    assert scorer("q", ["bla " * 40]) < 0.7
+
+
+def test_confident_cheap_answer_skips_the_remote_tier():
+    cascade, calls = CascadeStrategy(TIERS, HeuristicScorer()), []
+    assert cascade.respond("p", "q", MODELS, lambda key: True, asker({"ollama": GOOD, "deepseek": "x"}, calls)) == GOOD
+    assert calls == ["ollama"]
+    tiers = cascade.stats()["tiers"]
+    assert (tiers["ollama"]["accepted"], tiers["ollama"]["hit_rate"], tiers["deepseek"]["attempts"]) == (1, 1.0, 0)
+
+
+def test_low_confidence_escalates_and_failures_fall_back_to_the_best_answer():
+    cascade, calls = CascadeStrategy(TIERS, HeuristicScorer()), []
+    ask = asker({"ollama": "No lo sé.", "deepseek": GOOD}, calls)
+    assert cascade.respond("p", "q", MODELS, lambda key: True, ask) == GOOD
+    assert cascade.stats()["tiers"]["ollama"]["escalated"] == 1
+
+    ask = asker({"ollama": "No lo sé.", "deepseek": TimeoutError()}, calls)
+    assert cascade.respond("p", "q", MODELS, lambda key: True, ask) == "No lo sé."
+    assert cascade.stats()["tiers"]["deepseek"]["failed"] == 1
+
+    # Breaker open on the cheap tier: straight to the remote one
+    assert cascade.respond("p", "q", MODELS, lambda key: key != "ollama", asker({"deepseek": GOOD}, calls)) == GOOD
+    assert cascade.stats()["tiers"]["ollama"]["skipped"] == 1
+
+
+def test_self_consistency_samples_the_same_tier_concurrently():
+    vectors = {"a": [1.0, 0.0], "b": [0.0, 1.0]}
+    scorer = SelfConsistencyScorer(samples=2, embedding_fn=lambda texts: [vectors[t[0]] for t in texts])
+    answers = iter(["a" + GOOD, "b" + GOOD, "b" + GOOD, GOOD])
+    calls = []
+
+    async def ask_one_async(model_key, model_conf, prompt):
+        calls.append(model_key)
+        return {"model": model_key, "response": next(answers), "latency": 0.1}
+
+    cascade = CascadeStrategy(TIERS, scorer)
+    result = asyncio.run(cascade.respond_async("p", "q", MODELS, lambda key: True, ask_one_async))
+    assert calls == ["ollama", "ollama", "ollama", "deepseek"]
+    assert result == GOOD
+
+
+def test_failed_first_sample_is_replaced_by_a_successful_one():
+    vectors = {"a": [1.0, 0.0]}
+    scorer = SelfConsistencyScorer(samples=2, embedding_fn=lambda texts: [vectors[t[0]] for t in texts])
+    results = iter([TimeoutError(), "a" + GOOD, "a" + GOOD])
+    calls = []
+
+    async def ask_one_async(model_key, model_conf, prompt):
+        calls.append(model_key)
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return {"model": model_key, "response": result, "latency": 0.1}
+
+    cascade = CascadeStrategy(TIERS, scorer)
+    result = asyncio.run(cascade.respond_async("p", "q", MODELS, lambda key: True, ask_one_async))
+    assert (result, calls) == ("a" + GOOD, ["ollama", "ollama", "ollama"])
+    assert cascade.stats()["tiers"]["ollama"]["failed"] == 0
+
+
+def test_build_scorer_by_name_or_import_path():
+    assert isinstance(build_scorer({"name": "heuristic", "min_chars": 5}), HeuristicScorer)
+    assert build_scorer({"name": "app.llm_clients.cascade:HeuristicScorer"}).min_chars == 20
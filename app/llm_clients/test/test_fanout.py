@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+
+from app.llm_clients.llm_orchestrator import LLMOrchestrator
+from app.llm_clients.model_router import ModelRouter
+
+
+def make_orchestrator(tmp_path, delays, quorum=None, timeout=5.0, hedge_delay=0.1):
+    """
+    Orchestrator over fake adapters: `delays[model]` is how long the model takes to
+    answer, or an exception it raises at once. `started` records when each call began.
+    """
+    config = {
+        "priority": list(delays),
+        "fanout": {"timeout_seconds": timeout, "quorum": quorum,
+                   "hedging": {"min_samples": 100, "default_delay_seconds": hedge_delay}},
+        "models": {key: {"enabled": True, "model_name": key, "timeout_seconds": timeout} for key in delays},
+    }
+    path = tmp_path / "llm_config.json"
+    path.write_text(json.dumps(config))
+    orchestrator = LLMOrchestrator(config_path=str(path))
+    # Manual clock: breakers only move when a test says so
+    orchestrator.clock = [0.0]
+    orchestrator.router = ModelRouter(failure_threshold=1, recovery_seconds=10.0, clock=lambda: orchestrator.clock[0])
+    orchestrator.latency = orchestrator.router.latency
+    started = {}
+
+    def adapter(key):
+        def ask(prompt, model_name):
+            started[key] = time.perf_counter()
+            if isinstance(delays[key], Exception):
+                raise delays[key]
+            time.sleep(delays[key])
+            return f"{key} answer"
+
+        async def ask_async(prompt, model_name):
+            started[key] = time.perf_counter()
+            if isinstance(delays[key], Exception):
+                raise delays[key]
+            await asyncio.sleep(delays[key])
+            return f"{key} answer"
+        return {"ask": ask, "ask_async": ask_async}
+
+    orchestrator.adapters = {key: adapter(key) for key in delays}
+    return orchestrator, started
+
+
+def test_sync_quorum_returns_before_the_slow_model(tmp_path):
+    orchestrator, _ = make_orchestrator(tmp_path, {"fast": 0.01, "slow": 0.5}, quorum=1)
+    start = time.perf_counter()
+    candidates = orchestrator.ask_all("p")
+    assert [c["model"] for c in candidates] == ["fast"]
+    assert time.perf_counter() - start < 0.3
+
+
+def test_sync_deadline_abandons_models_that_never_answer(tmp_path):
+    orchestrator, _ = make_orchestrator(tmp_path, {"slow": 0.5}, timeout=0.05)
+    start = time.perf_counter()
+    assert orchestrator.ask_all("p") == []
+    assert time.perf_counter() - start < 0.3
+
+
+def test_async_quorum_cancels_stragglers_and_releases_their_probe(tmp_path):
+    orchestrator, _ = make_orchestrator(tmp_path, {"fast": 0.01, "slow": 5.0}, quorum=1)
+    # Half-open after one failure: the slow model's call is its single probe
+    orchestrator.router.record_failure("slow")
+    orchestrator.clock[0] = 10.0
+
+    async def run():
+        start = time.perf_counter()
+        candidates = await orchestrator.ask_all_async("p", hedge=False)
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0)  # let the cancellation land
+        return candidates, elapsed
+
+    candidates, elapsed = asyncio.run(run())
+    assert [c["model"] for c in candidates] == ["fast"] and elapsed < 1.0
+    # Cancelled, not failed: the probe slot is free again and the breaker did not re-open
+    assert orchestrator.router.acquire("slow")
+    assert orchestrator.router.state()["models"]["slow"]["state"] == "half_open"
+
+
+def test_hedged_backup_fires_only_after_the_delay(tmp_path):
+    orchestrator, started = make_orchestrator(tmp_path, {"primary": 0.05, "backup": 0.01}, hedge_delay=0.2)
+    candidates = asyncio.run(orchestrator.ask_all_async("p", hedge=True))
+    assert [c["model"] for c in candidates] == ["primary"] and "backup" not in started
+
+    orchestrator, started = make_orchestrator(tmp_path, {"primary": 1.0, "backup": 0.01}, hedge_delay=0.1)
+    candidates = asyncio.run(orchestrator.ask_all_async("p", hedge=True))
+    assert [c["model"] for c in candidates] == ["backup"]
+    assert started["backup"] - started["primary"] >= 0.09
+
+
+def test_hedged_backup_fires_at_once_when_the_primary_fails(tmp_path):
+    orchestrator, started = make_orchestrator(
+        tmp_path, {"primary": ConnectionError("down"), "backup": 0.01}, hedge_delay=5.0)
+    start = time.perf_counter()
+    candidates = asyncio.run(orchestrator.ask_all_async("p", hedge=True))
+    assert [c["model"] for c in candidates] == ["backup"]
+    assert time.perf_counter() - start < 1.0
@@ -0,0 +1,79 @@
+import time
+
+from app.llm_clients.model_router import CLOSED, HALF_OPEN, OPEN, ModelRouter
+
+MODELS = [("deepseek", {"timeout_seconds": 15}), ("ollama", {"timeout_seconds": 10})]
+
+
+def keys(models):
+    return [model_key for model_key, _ in models]
+
+
+def test_breaker_opens_after_repeated_failures_and_skips_the_model():
+    router = ModelRouter(failure_threshold=2, recovery_seconds=60)
+    router.record_failure("deepseek", TimeoutError())
+    assert keys(router.route(MODELS)) == ["deepseek", "ollama"]
+    router.record_failure("deepseek", TimeoutError())
+    assert keys(router.route(MODELS)) == ["ollama"]
+    assert not router.acquire("deepseek")
+    state = router.state()
+    assert state["models"]["deepseek"]["state"] == OPEN
+    assert state["decisions"][-1]["skipped"] == ["deepseek"]
+
+
+def test_half_open_probe_closes_or_reopens():
+    router = ModelRouter(failure_threshold=1, recovery_seconds=0.02, half_open_probes=1)
+    router.record_failure("deepseek")
+    time.sleep(0.03)
+    assert router.acquire("deepseek")
+    assert not router.acquire("deepseek")  # only one probe in flight
+    router.record_failure("deepseek")
+    assert router.state()["models"]["deepseek"]["state"] == OPEN
+
+    time.sleep(0.03)
+    assert router.state()["models"]["deepseek"]["state"] == HALF_OPEN
+    assert router.acquire("deepseek")
+    router.record_success("deepseek", 0.1)
+    assert router.state()["models"]["deepseek"]["state"] == CLOSED
+    assert [event["event"] for event in router.state()["events"]] == ["opened", "opened", "closed"]
+
+
+def test_late_success_does_not_close_an_open_breaker():
+    router = ModelRouter(failure_threshold=1, recovery_seconds=60)
+    router.record_failure("deepseek")
+    # A slow call that started before the breaker tripped finally answers
+    router.record_success("deepseek", 20.0)
+    assert router.state()["models"]["deepseek"]["state"] == OPEN
+    assert not router.acquire("deepseek")
+
+
+def test_released_probe_frees_the_slot():
+    router = ModelRouter(failure_threshold=1, recovery_seconds=0.0)
+    router.record_failure("deepseek")
+    assert router.acquire("deepseek")
+    router.release("deepseek")
+    assert router.acquire("deepseek")
+
+
+def test_adaptive_order_needs_samples_and_margin():
+    router = ModelRouter(adaptive=True, latency_margin=1.25, min_samples=3)
+    for _ in range(3):
+        router.record_success("deepseek", 1.0)
+    assert keys(router.route(MODELS)) == ["deepseek", "ollama"]  # ollama has no samples yet
+
+    for _ in range(3):
+        router.record_success("ollama", 0.9)
+    assert keys(router.route(MODELS)) == ["deepseek", "ollama"]  # faster, but within the margin
+    for _ in range(6):
+        router.record_success("ollama", 0.5)
+    assert keys(router.route(MODELS)) == ["ollama", "deepseek"]
+    assert router.state()["reordered"] == 1
+
+
+def test_error_rate_counts_against_expected_latency():
+    router = ModelRouter(adaptive=True, min_samples=1, failure_threshold=100)
+    router.record_success("deepseek", 0.2)
+    router.record_success("ollama", 1.0)
+    router.route(MODELS)
+    router.record_failure("deepseek")  # 50% errors x 15s timeout
+    assert keys(router.route(MODELS)) == ["ollama", "deepseek"]
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.llm_clients.ranking import LocalRanker, MetaLLMRanker, parse_choice
+
+VECTORS = {
+    "pregunta": [1.0, 0.0, 0.0],
+    "París": [0.9, 0.1, 0.0],
+    "París, Francia": [0.88, 0.12, 0.0],
+    "Lyon": [0.2, 0.9, 0.1],
+    "Madrid": [0.7, 0.0, 0.7],
+    "Roma": [0.7, 0.7, 0.0],
+}
+
+
+def embed(texts):
+    return [VECTORS[text] for text in texts]
+
+
+def candidates(*responses):
+    return [{"model": f"m{i}", "response": response, "latency": 2.0} for i, response in enumerate(responses)]
+
+
+class FakeMeta(MetaLLMRanker):
+    def __init__(self, answer):
+        super().__init__(lambda query, cands: (answer, ""), None)
+
+        async def rank_fn_async(query, cands):
+            return answer, ""
+        self.rank_fn_async = rank_fn_async
+
+
+def test_agreeing_candidates_exit_early_without_embedding_the_query():
+    embedded = []
+
+    def recording_embed(texts):
+        embedded.extend(texts)
+        return embed(texts)
+
+    ranker = LocalRanker(embedding_fn=recording_embed, escalation=FakeMeta("1"), agreement_threshold=0.99)
+    result = ranker.rank("pregunta", candidates("París", "París, Francia"))
+    assert result["decision"] == "agreement"
+    assert "pregunta" not in embedded
+    assert ranker.stats()["latency_saved_seconds"] == 2.0
+
+
+def test_query_relevance_and_agreement_pick_the_majority_answer():
+    ranker = LocalRanker(embedding_fn=embed, escalation=FakeMeta("1"))
+    result = ranker.rank("pregunta", candidates("Lyon", "París", "París, Francia"))
+    assert result["decision"] == "local"
+    assert result["response"].startswith("París")
+
+
+def test_too_close_to_call_escalates_to_the_meta_llm():
+    ranker = LocalRanker(embedding_fn=embed, escalation=FakeMeta("La mejor es la [2]"), min_margin=0.05)
+    result = asyncio.run(ranker.rank_async("pregunta", candidates("Madrid", "Roma")))
+    assert (result["decision"], result["response"]) == ("meta_llm", "Roma")
+    stats = ranker.stats()
+    assert (stats["escalation_rate"], stats["latency_saved_seconds"]) == (1.0, 0.0)
+    assert stats["escalation"]["rankings"] == 1
+
+
+def test_parse_choice():
+    assert parse_choice("2", 3) == 1
+    assert parse_choice("Respuesta 7, no: 3", 3) == 2
+    assert parse_choice("ninguna", 3) is None
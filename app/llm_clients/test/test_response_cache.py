@@ -0,0 +1,40 @@
+import time
+
+from app.llm_clients.response_cache import SemanticResponseCache
+
+
+def make_cache(tmp_path, **kwargs):
+    config = tmp_path / "llm_config.json"
+    config.write_text('{"priority": ["ollama"]}')
+    kwargs.setdefault("threshold", 0.9)
+    return SemanticResponseCache(config_path=str(config), config_check_seconds=0, **kwargs), config
+
+
+def test_hit_above_threshold_per_namespace(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    cache.put("ollama:mistral", [1.0, 0.0], "respuesta", latency=2.0)
+    assert cache.get("ollama:mistral", [0.99, 0.05]) == "respuesta"
+    assert cache.get("ollama:mistral", [0.0, 1.0]) is None
+    assert cache.get("deepseek:deepseek-chat", [1.0, 0.0]) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["lookups"], stats["latency_saved_seconds"]) == (1, 3, 2.0)
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache, _ = make_cache(tmp_path, ttl_seconds=0.05, max_entries=2)
+    cache.put("m", [1.0, 0.0, 0.0], "a")
+    cache.put("m", [0.0, 1.0, 0.0], "b")
+    assert cache.get("m", [1.0, 0.0, 0.0]) == "a"  # "b" is now the least recent
+    cache.put("m", [0.0, 0.0, 1.0], "c")
+    assert cache.get("m", [0.0, 1.0, 0.0]) is None
+    time.sleep(0.06)
+    assert cache.get("m", [1.0, 0.0, 0.0]) is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_config_change_invalidates_everything(tmp_path):
+    cache, config = make_cache(tmp_path)
+    cache.put("m", [1.0, 0.0], "a")
+    config.write_text('{"priority": ["deepseek"]}')
+    assert cache.get("m", [1.0, 0.0]) is None
+    assert cache.stats()["invalidations"] == 1
@@ -1,24 +1,53 @@
-from fastapi import FastAPI, Request
-from fastapi.templating import Jinja2Templates
-from app.chat import router as chat_router
-from app.routes.chat_htmx import router as htmx_router
-from app.routes.api.chat_api import router as chat_api_router
-from fastapi.staticfiles import StaticFiles
-from .security.resource_manager import resource_auth_middleware
-
-app = FastAPI()
-app.middleware("http")(resource_auth_middleware)
-
-app.mount("/static", StaticFiles(directory="app/web/static"), name="static")
-templates = Jinja2Templates(directory="app/templates")
-
-
-@app.get("/")
-def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
-
-
-# Incluir routers
-app.include_router(chat_router)
-app.include_router(htmx_router)
-app.include_router(chat_api_router, prefix="/api")
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.templating import Jinja2Templates
+from app.chat import router as chat_router
+from app.routes.chat_htmx import router as htmx_router
+from app.routes.api.chat_api import router as chat_api_router
+from app.routes.api.metrics_api import router as metrics_api_router
+from app.routes.api.router_api import router as router_api_router
+from app.routes.health import router as health_router
+from app.core.container import AppContainer
+from fastapi.staticfiles import StaticFiles
+from .security.resource_manager import resource_auth_middleware
+from app.utils.tracing import tracing_middleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One ChatCore / memory stack per process, shared by every router. It is built in the
+    # background: the server accepts connections at once and /ready reports progress.
+    container = AppContainer()
+    app.state.container = container
+    startup = asyncio.create_task(container.start())
+    try:
+        yield
+    finally:
+        await startup
+        await container.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.middleware("http")(resource_auth_middleware)
+# Registered last so it wraps everything: Server-Timing also covers the auth check
+app.middleware("http")(tracing_middleware)
+
+app.mount("/static", StaticFiles(directory="app/web/static"), name="static")
+templates = Jinja2Templates(directory="app/templates")
+
+
+@app.get("/")
+def read_root(request: Request):
+    return templates.TemplateResponse("index.html", {"request": request})
+
+
+# Incluir routers
+app.include_router(health_router)
+app.include_router(chat_router)
+app.include_router(htmx_router)
+app.include_router(chat_api_router, prefix="/api")
+app.include_router(metrics_api_router, prefix="/api")
+app.include_router(router_api_router, prefix="/api")
+
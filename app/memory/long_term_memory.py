@@ -1,43 +1,125 @@
-from typing import List, Dict
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Callable, List, Dict, Optional, Tuple
 
 from app.memory.store.weaviate_memory_store import WeaviateMemoryStore
 from .store.chroma_memory_store import ChromaMemoryStore
-from .store.memory_store_interface import MemoryStore
+from .store.memory_store_interface import MemoryStore, MemoryItem, ScoredHit
 from .store.postgres_memory_store import PostgresMemoryStore
 from .store.mongo_memory_store import MongoMemoryStore
+from .store.SQLite_memory_store import SQLiteMemoryStore
 from app.embeddings.embeddings import EmbeddingFunction
 from app.llm_clients.llm_router import get_embedding_function
-from scipy.spatial.distance import cosine
+from app.core.request_context import RequestContext
+from app.memory.session_index import SessionIndex
+from app.memory.retrieval import reciprocal_rank_fusion, search_concurrently
+from app.utils.tracing import span
+from app.utils.utils import run_blocking
+
+
+# How each store is built; add more memory sources as needed
+SOURCE_FACTORIES = {
+    "chroma": lambda: ChromaMemoryStore(collection_name="long_term"),
+    "postgres": PostgresMemoryStore,
+    "mongo": MongoMemoryStore,
+    "weaviate": lambda: WeaviateMemoryStore(context_name="long_term"),
+}
+# Zero-service store, only when a file is configured
+if os.getenv("SQLITE_MEMORY_PATH"):
+    SOURCE_FACTORIES["sqlite"] = SQLiteMemoryStore
 
 
 class LongTermMemory:
-    def __init__(self):
+    def __init__(self, session_index: Optional[SessionIndex] = None, factories: Optional[Dict] = None):
         """
         Initialize different memory stores for long-term and short-term memory.
+        `session_index` is shared with the MemoryOrchestrator that owns it.
+
+        Stores connect concurrently, each bounded by its own timeout
+        (MEMORY_BACKEND_TIMEOUT, overridden per store by MEMORY_BACKEND_TIMEOUTS, JSON:
+        {"weaviate": 10}). A store that fails or times out is left out and listed in
+        `unavailable` (degraded mode); one that connects after its timeout joins later.
         """
-        self.sources = {
-            "chroma": ChromaMemoryStore(collection_name="long_term"),
-            "postgres": PostgresMemoryStore(),
-            "mongo": MongoMemoryStore(),
-            "weaviate": WeaviateMemoryStore(context_name="long_term"),
-            # Add more memory sources as needed
-        }
+        self.sources: Dict[str, MemoryStore] = {}
+        self.unavailable: Dict[str, str] = {}
+        self._sources_lock = threading.Lock()
+        self._connect_sources(factories or SOURCE_FACTORIES)
         # Function to embed text queries
         self.embedding_function = get_embedding_function()
+        self.session_index = session_index if session_index is not None else SessionIndex()
+        # Fused retrieval: shared deadline for all stores and the RRF constant
+        self.retrieval_deadline = float(os.getenv("MEMORY_RETRIEVAL_DEADLINE_MS", "300")) / 1000
+        self.rrf_k = int(os.getenv("MEMORY_RRF_K", "60"))
+        self.skipped_searches: Dict[str, int] = {}
+
+    def _connect_sources(self, factories: Dict) -> None:
+        default_timeout = float(os.getenv("MEMORY_BACKEND_TIMEOUT", "5"))
+        timeouts = json.loads(os.getenv("MEMORY_BACKEND_TIMEOUTS", "{}"))
+
+        executor = ThreadPoolExecutor(max_workers=len(factories), thread_name_prefix="ltm-connect")
+        start = time.monotonic()
+        futures = {name: executor.submit(factory) for name, factory in factories.items()}
+        for name, future in futures.items():
+            deadline = start + timeouts.get(name, default_timeout)
+            try:
+                self._mark_available(name, future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FuturesTimeoutError:
+                self._mark_unavailable(name, f"timeout tras {timeouts.get(name, default_timeout)}s")
+                future.add_done_callback(lambda f, name=name: self._late_connect(name, f))
+            except Exception as e:
+                self._mark_unavailable(name, str(e))
+        # Timed-out connections keep their thread until the driver gives up
+        executor.shutdown(wait=False)
+
+    def _mark_available(self, name: str, store: MemoryStore) -> None:
+        with self._sources_lock:
+            self.sources[name] = store
+            self.unavailable.pop(name, None)
 
-    def decide_memory_source(self, query_text: str) -> MemoryStore:
+    def _mark_unavailable(self, name: str, reason: str) -> None:
+        with self._sources_lock:
+            self.unavailable[name] = reason
+        print(f"[WARN] Memoria '{name}' no disponible: {reason}")
+
+    def _late_connect(self, name: str, future) -> None:
+        if future.exception() is None:
+            self._mark_available(name, future.result())
+            print(f"[INFO] Memoria '{name}' conectada tras el timeout.")
+
+    def status(self) -> Dict:
+        with self._sources_lock:
+            return {
+                "available": sorted(self.sources),
+                "unavailable": dict(self.unavailable),
+                "skipped_searches": dict(self.skipped_searches),
+            }
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedding_function([text])[0]
+
+    def decide_memory_source(self, query_text: str, context: Optional[RequestContext] = None) -> Optional[MemoryStore]:
         """
         Decide which memory source to use based on the type of query.
         We can enhance this by using an embedding model to determine the query type.
+        Returns None when no store is available.
         """
-        query_embedding = self.embedding_function(query_text)
+        context = context or RequestContext(query_text)
+        query_embedding = context.embedding("llm", self.embed_query)
 
         # If the query has semantic intent, prefer using Chroma (vector-based store)
-        if self.is_semantic(query_text, query_embedding):
+        if self.is_semantic(query_text, query_embedding) and "chroma" in self.sources:
             return self.sources["chroma"]
 
         # Otherwise, default to a structured memory store like PostgreSQL or MongoDB
-        return self.sources["postgres"]
+        if "postgres" in self.sources:
+            return self.sources["postgres"]
+        # Degraded mode: any store that did connect
+        return next(iter(self.sources.values()), None)
 
     def is_semantic(self, query_text: str, query_embedding: List[float]) -> bool:
         """
@@ -46,57 +128,163 @@ class LongTermMemory:
         """
         semantic_threshold = 0.8  # A threshold for cosine similarity to determine semantic queries
 
-        # 1. Compare to recent session history embeddings (Faiss/Redis) for semantic relevance
-        for recent_interaction in self.session_history:
-            stored_embedding = recent_interaction['embedding']
-            # Cosine similarity calculation
-            similarity = 1 - cosine(query_embedding, stored_embedding)
-
-            # 2. If the similarity is above the threshold, this is a semantic query related to session context
-            if similarity > semantic_threshold:
-                return True  # If the query is semantically similar to a recent interaction, it's a semantic query
+        # Best cosine similarity against the whole session history in one vectorized op.
+        # Above the threshold the query relates to the session context, so it is semantic;
+        # otherwise classify it as non-semantic (structured query).
+        return self.session_index.is_similar(query_embedding, semantic_threshold)
 
-        # 3. If the query is not similar to any recent history, classify as non-semantic (structured query)
-        return False
-
-    def add_interaction(self, user_message: str, assistant_response: str):
+    def add_interaction(self, user_message: str, assistant_response: str, context: Optional[RequestContext] = None):
         """
         Store an interaction in the appropriate memory source (session or global).
         """
-        memory_source = self.decide_memory_source(user_message)
-        combined = f"User: {user_message}\nAssistant: {assistant_response}"
-        doc_id = f"msg-{memory_source.get_stats().get('total_documents') + 1}"
-        memory_source.add(doc_id, combined)
+        self.add_interactions([(user_message, assistant_response, context)])
 
-    def query(self, query_text: str, n_results: int = 5) -> List[str]:
+    def add_interactions(self, interactions: List[Tuple[str, str, Optional[RequestContext]]]):
+        """
+        Store several interactions, routing each one as `add_interaction` does and writing
+        each store's share with a single `add_many` (one embedding call, one bulk insert).
+        Ids are random UUIDs, so concurrent writers never collide.
+        """
+        by_source: Dict[int, Tuple[MemoryStore, List[MemoryItem]]] = {}
+        for user_message, assistant_response, context in interactions:
+            memory_source = self.decide_memory_source(user_message, context)
+            if memory_source is None:
+                print("[WARN] Ninguna memoria de largo plazo disponible; interacción no guardada.")
+                continue
+            item: MemoryItem = {
+                "id": str(uuid.uuid4()),
+                "content": f"User: {user_message}\nAssistant: {assistant_response}",
+                "metadata": {"source": "chat", "created_at": int(time.time())},
+            }
+            by_source.setdefault(id(memory_source), (memory_source, []))[1].append(item)
+        for memory_source, items in by_source.values():
+            with span(f"store.{memory_source.name}.add_many"):
+                memory_source.add_many(items)
+
+    def query(self, query_text: str, n_results: int = 5, context: Optional[RequestContext] = None) -> List[str]:
         """
         Query memory based on the type of query (semantic or structured).
         First try semantic search, then fallback to structured memory.
+        The query embedding comes from `context`, so it is computed at most once per message.
         """
-        memory_source = self.decide_memory_source(query_text)
-
-        # Perform semantic query using vector-based store if determined
-        results = memory_source.query(query_text, n_results)
+        context = context or RequestContext(query_text)
+        memory_source = self.decide_memory_source(query_text, context)
+        results = self._query_store(memory_source, query_text, n_results, context)
 
         # If no results are found, query in structured memory (PostgreSQL or MongoDB)
-        if not results:
-            if memory_source != self.sources["postgres"]:
-                results = self.sources["postgres"].query(query_text, n_results)
+        postgres = self._fallback_store(memory_source, results)
+        if postgres is not None:
+            with span("store.postgres.query"):
+                results = postgres.query(query_text, n_results)
 
         return results
 
+    async def query_async(self, query_text: str, n_results: int = 5, context: Optional[RequestContext] = None) -> List[str]:
+        """
+        Async variant of `query`. PostgreSQL, whether routed to or as the fallback, is
+        queried through asyncpg (`PostgresMemoryStore.query_async`); the other stores
+        run in the blocking executor.
+        """
+        context = context or RequestContext(query_text)
+        memory_source = await run_blocking(self.decide_memory_source, query_text, context)
+        if isinstance(memory_source, PostgresMemoryStore):
+            with span("store.postgres.query"):
+                results = await memory_source.query_async(query_text, n_results)
+        else:
+            results = await run_blocking(self._query_store, memory_source, query_text, n_results, context)
+
+        postgres = self._fallback_store(memory_source, results)
+        if postgres is not None:
+            with span("store.postgres.query"):
+                results = await postgres.query_async(query_text, n_results)
+
+        return results
+
+    def _query_store(self, memory_source: Optional[MemoryStore], query_text: str, n_results: int,
+                     context: RequestContext) -> List[str]:
+        if memory_source is None:
+            return []
+
+        # Perform semantic query using vector-based store if determined
+        query_embedding = context.embedding("llm", self.embed_query)
+        with span(f"store.{memory_source.name}.query"):
+            return memory_source.query_by_vector(query_embedding, n_results, query_text=query_text)
+
+    def _fallback_store(self, memory_source: Optional[MemoryStore], results: List[str]) -> Optional[MemoryStore]:
+        if results or memory_source is None:
+            return None
+        postgres = self.sources.get("postgres")
+        return postgres if postgres is not None and memory_source != postgres else None
+
+    def searches(self, query_text: str, n_results: int = 5,
+                 context: Optional[RequestContext] = None) -> Dict[str, Callable[[], List[ScoredHit]]]:
+        """
+        One scored search per available store, ready to run. Only vector stores wait for
+        the query embedding, which `context` computes once for all of them.
+        """
+        context = context or RequestContext(query_text)
+
+        def search(store: MemoryStore) -> List[ScoredHit]:
+            vector = context.embedding("llm", self.embed_query) if store.vector_search else None
+            with span(f"store.{store.name}.search"):
+                return store.search(query_text, n_results, vector=vector)
+
+        return {name: functools.partial(search, store) for name, store in list(self.sources.items())}
+
+    def search(self, query_text: str, n_results: int = 5, context: Optional[RequestContext] = None,
+               extra_searches: Optional[Dict[str, Callable[[], List[ScoredHit]]]] = None) -> List[ScoredHit]:
+        """
+        Queries every available store (plus `extra_searches`, e.g. short-term memory)
+        concurrently under `retrieval_deadline` and merges the hits with reciprocal-rank
+        fusion. Stores that fail or miss the deadline are skipped and counted.
+        """
+        searches = self.searches(query_text, n_results, context)
+        searches.update(extra_searches or {})
+        results, skipped = search_concurrently(searches, self.retrieval_deadline)
+        for name, reason in skipped.items():
+            with self._sources_lock:
+                self.skipped_searches[name] = self.skipped_searches.get(name, 0) + 1
+            if reason != "timeout":
+                print(f"[WARN] Búsqueda en '{name}' fallida, se omite: {reason}")
+        return reciprocal_rank_fusion(list(results.values()), n_results, self.rrf_k)
+
     def get_stats(self) -> Dict:
         """
         Retrieve statistics for all memory stores (Chroma, PostgreSQL, MongoDB, etc.).
         """
         stats = {}
-        for source_name, source in self.sources.items():
+        for source_name, source in list(self.sources.items()):
             stats[source_name] = source.get_stats()
         return stats
 
+    def close(self):
+        """
+        Release store connections (pools, clients) that support it.
+        """
+        for source_name, source in list(self.sources.items()):
+            close = getattr(source, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    print(f"[WARN] Error al cerrar la memoria '{source_name}': {e}")
+
+    async def aclose(self):
+        """
+        Release the async pools (asyncpg) of the stores that have one. Must run on the
+        event loop that created them.
+        """
+        for source_name, source in list(self.sources.items()):
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                try:
+                    await aclose()
+                except Exception as e:
+                    print(f"[WARN] Error al cerrar la memoria '{source_name}': {e}")
+
     def clear_all(self):
         """
         Clear all memory stores (for global and session memory).
         """
-        for source_name, source in self.sources.items():
+        for source_name, source in list(self.sources.items()):
             source.clear()
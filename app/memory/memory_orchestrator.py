@@ -1,58 +1,143 @@
-from typing import List, Dict
-from app.embeddings.embeddings import EmbeddingFunction
-from app.llm_clients.llm_router import get_embedding_function
-from app.memory.short_term_memory import ShortTermMemory
-from app.memory.long_term_memory import LongTermMemory
-from scipy.spatial.distance import cosine
-
-class MemoryOrchestrator:
-    def __init__(self):
-        self.short_term_memory = ShortTermMemory()
-        self.long_term_memory = LongTermMemory()
-        self.embedding_function = get_embedding_function()
-        self.session_history = []
-
-    def is_semantic(self, query_text: str) -> bool:
-        embedding = self.embedding_function(query_text)
-        for interaction in self.session_history:
-            sim = 1 - cosine(embedding, interaction['embedding'])
-            if sim > 0.8:
-                return True
-        return False
-
-    def query(self, query_text: str, top_k: int = 5) -> List[str]:
-        embedding = self.embedding_function(query_text)
-        is_sem = self.is_semantic(query_text)
-
-        if is_sem:
-            return self.short_term_memory.query(query_text, top_k)
-        else:
-            return self.long_term_memory.query(query_text, top_k)
-
-    def add_interaction(self, user_message: str, assistant_response: str):
-        embedding = self.embedding_function(user_message)
-        is_sem = self.is_semantic(user_message)
-
-        if is_sem:
-            self.short_term_memory.add_interaction(user_message, assistant_response)
-        else:
-            self.long_term_memory.add_interaction(user_message, assistant_response)
-
-        self.session_history.append({
-            "message": user_message,
-            "embedding": embedding,
-            "assistant_response": assistant_response
-        })
-
-    def clear_short_term(self):
-        self.short_term_memory.clear_all()
-
-    def clear_all(self):
-        self.short_term_memory.clear_all()
-        self.long_term_memory.clear_all()
-
-    def get_stats(self) -> Dict[str, Dict]:
-        return {
-            "short_term": self.short_term_memory.get_stats(),
-            "long_term": self.long_term_memory.get_stats()
-        }
+import functools
+import os
+from typing import List, Dict, Optional, Tuple
+from app.embeddings.embeddings import EmbeddingFunction
+from app.core.request_context import RequestContext
+from app.llm_clients.llm_router import get_embedding_function
+from app.memory.short_term_memory import ShortTermMemory
+from app.memory.long_term_memory import LongTermMemory
+from app.memory.session_index import SessionIndex
+from app.memory.write_behind import WriteBehindQueue
+from app.memory.store.memory_store_interface import ScoredHit, hits_from_texts
+from app.utils.tracing import span
+from app.utils.utils import run_blocking
+
+class MemoryOrchestrator:
+    def __init__(self):
+        self.short_term_memory = ShortTermMemory()
+        self.session_index = SessionIndex()
+        self.long_term_memory = LongTermMemory(session_index=self.session_index)
+        self.embedding_function = get_embedding_function()
+        # "routed" (one memory chosen per query) or "fused" (all of them, merged by rank)
+        self.retrieval_mode = os.getenv("MEMORY_RETRIEVAL_MODE", "routed").lower()
+        # Interactions are persisted off the response path unless MEMORY_WRITE_BEHIND=false
+        self.write_queue: Optional[WriteBehindQueue] = None
+        if os.getenv("MEMORY_WRITE_BEHIND", "true").lower() != "false":
+            self.write_queue = WriteBehindQueue.from_env(self._persist, name="memory")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedding_function([text])[0]
+
+    def is_semantic(self, query_text: str, context: Optional[RequestContext] = None) -> bool:
+        context = context or RequestContext(query_text)
+        embedding = context.embedding("llm", self.embed_query)
+        return self.session_index.is_similar(embedding, 0.8)
+
+    def query(self, query_text: str, top_k: int = 5, context: Optional[RequestContext] = None) -> List[str]:
+        return [hit["text"] for hit in self.search(query_text, top_k, context)]
+
+    def search(self, query_text: str, top_k: int = 5, context: Optional[RequestContext] = None) -> List[ScoredHit]:
+        with span("memory.search"):
+            return self._search(query_text, top_k, context or RequestContext(query_text))
+
+    def _search(self, query_text: str, top_k: int, context: RequestContext) -> List[ScoredHit]:
+        if self.retrieval_mode == "fused":
+            # Short-term memory and every long-term store at once, merged by rank
+            short_term = functools.partial(self._short_term_search, query_text, top_k, context)
+            return self.long_term_memory.search(
+                query_text, top_k, context=context, extra_searches={"short_term": short_term})
+
+        is_sem = self.is_semantic(query_text, context)
+
+        if is_sem:
+            return self._short_term_search(query_text, top_k, context)
+        else:
+            return hits_from_texts(self.long_term_memory.query(query_text, top_k, context=context), "long_term")
+
+    def _short_term_search(self, query_text: str, top_k: int, context: RequestContext) -> List[ScoredHit]:
+        with span("short_term.search"):
+            return self.short_term_memory.search(query_text, top_k, context=context)
+
+    async def query_async(self, query_text: str, top_k: int = 5, context: Optional[RequestContext] = None) -> List[str]:
+        # Embedding, FAISS search and the store drivers are blocking: kept off the event loop.
+        return [hit["text"] for hit in await self.search_async(query_text, top_k, context)]
+
+    async def search_async(self, query_text: str, top_k: int = 5, context: Optional[RequestContext] = None) -> List[ScoredHit]:
+        if self.retrieval_mode == "fused":
+            return await run_blocking(self.search, query_text, top_k, context)
+        context = context or RequestContext(query_text)
+        with span("memory.search"):
+            if await run_blocking(self.is_semantic, query_text, context):
+                return await run_blocking(self._short_term_search, query_text, top_k, context)
+            # Long-term stores with an async driver are queried without holding a thread
+            texts = await self.long_term_memory.query_async(query_text, top_k, context=context)
+            return hits_from_texts(texts, "long_term")
+
+    def add_interaction(self, user_message: str, assistant_response: str, context: Optional[RequestContext] = None):
+        self._persist([(user_message, assistant_response, context)])
+
+    def _persist(self, interactions: List[Tuple[str, str, Optional[RequestContext]]]):
+        with span("memory.persist"):
+            self._persist_batch(interactions)
+
+    def _persist_batch(self, interactions: List[Tuple[str, str, Optional[RequestContext]]]):
+        long_term = []
+        for user_message, assistant_response, context in interactions:
+            context = context or RequestContext(user_message)
+            embedding = context.embedding("llm", self.embed_query)
+            is_sem = self.is_semantic(user_message, context)
+
+            if is_sem:
+                self.short_term_memory.add_interaction(user_message, assistant_response)
+            else:
+                long_term.append((user_message, assistant_response, context))
+
+            self.session_index.add(embedding)
+
+        # One add_many per long-term store for the whole batch
+        if long_term:
+            self.long_term_memory.add_interactions(long_term)
+
+    async def add_interaction_async(self, user_message: str, assistant_response: str, context: Optional[RequestContext] = None):
+        # Queued: the caller returns right away. Full queue (or disabled): written inline.
+        if self.write_queue is not None and self.write_queue.submit((user_message, assistant_response, context)):
+            return
+        await run_blocking(self.add_interaction, user_message, assistant_response, context)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for queued interactions to be written. Returns False on timeout.
+        """
+        return self.write_queue.flush(timeout) if self.write_queue is not None else True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Drains the write queue, then snapshots short-term memory and closes the stores.
+        """
+        drained = self.write_queue.close(timeout) if self.write_queue is not None else True
+        if not drained:
+            print(f"[WARN] Cierre con {self.write_queue.stats()['pending']} interacciones sin guardar.")
+        self.short_term_memory.close()
+        self.long_term_memory.close()
+        return drained
+
+    async def aclose(self):
+        """
+        Closes what `close` cannot from a thread: the stores' async pools.
+        """
+        await self.long_term_memory.aclose()
+
+    def clear_short_term(self):
+        self.short_term_memory.clear_all()
+        self.session_index.clear()
+
+    def clear_all(self):
+        self.short_term_memory.clear_all()
+        self.session_index.clear()
+        self.long_term_memory.clear_all()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {
+            "short_term": self.short_term_memory.get_stats(),
+            "long_term": self.long_term_memory.get_stats()
+        }
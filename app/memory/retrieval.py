@@ -0,0 +1,65 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Tuple
+
+from app.memory.store.memory_store_interface import ScoredHit
+
+# Own pool: the searches are started from code that already runs in the blocking
+# executor, and a store that hangs past the deadline keeps its worker busy until it returns.
+RETRIEVAL_POOL_SIZE = int(os.getenv("MEMORY_RETRIEVAL_WORKERS", "16"))
+_retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_POOL_SIZE, thread_name_prefix="retrieval")
+
+
+def search_concurrently(
+    searches: Dict[str, Callable[[], List[ScoredHit]]],
+    timeout: float
+) -> Tuple[Dict[str, List[ScoredHit]], Dict[str, str]]:
+    """
+    Runs every search at once and waits at most `timeout` seconds for all of them.
+
+    Returns (hits per source that answered in time, reason per source that was skipped).
+    Late searches are not awaited: they finish in the background and their result is dropped.
+    """
+    # Each search runs in a copy of the caller's context, so its spans count for the request
+    futures = {name: _retrieval_executor.submit(contextvars.copy_context().run, search)
+               for name, search in searches.items()}
+    wait(futures.values(), timeout=timeout)
+
+    results: Dict[str, List[ScoredHit]] = {}
+    skipped: Dict[str, str] = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            skipped[name] = "timeout"
+        elif future.exception() is not None:
+            skipped[name] = str(future.exception())
+        else:
+            results[name] = future.result()
+    return results, skipped
+
+
+def dedup_key(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def reciprocal_rank_fusion(result_lists: List[List[ScoredHit]], n_results: int = 5, k: int = 60) -> List[ScoredHit]:
+    """
+    Merges ranked lists whose scores are not comparable (bm25, ts_rank, distances...)
+    with reciprocal-rank fusion: a hit scores sum(1 / (k + rank)) over the lists it
+    appears in. Hits with the same text (ignoring case and whitespace) are merged and
+    keep the id and source of their best-ranked occurrence.
+    """
+    fused: Dict[str, ScoredHit] = {}
+    best_rank: Dict[str, int] = {}
+    for hits in result_lists:
+        for rank, hit in enumerate(hits, start=1):
+            key = dedup_key(hit["text"])
+            if key not in fused:
+                fused[key] = {"id": hit["id"], "text": hit["text"], "score": 0.0, "source": hit["source"]}
+                best_rank[key] = rank
+            elif rank < best_rank[key]:
+                fused[key].update(id=hit["id"], source=hit["source"])
+                best_rank[key] = rank
+            fused[key]["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda hit: hit["score"], reverse=True)[:n_results]
@@ -0,0 +1,60 @@
+import os
+import threading
+from typing import List
+
+import numpy as np
+
+
+class SessionIndex:
+    """
+    Session embeddings kept as one contiguous, pre-normalized float32 matrix.
+
+    The best cosine similarity against the whole history is a single matrix-vector
+    product, so routing cost stays flat as the session grows. Capacity is bounded:
+    once full, the oldest rows are overwritten (ring buffer).
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or int(os.getenv("SESSION_HISTORY_CAPACITY", "10000"))
+        self.dim = None
+        self._matrix = None
+        self._count = 0
+        self._head = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def add(self, embedding: List[float]) -> None:
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None:
+                self.dim = vector.shape[0]
+                self._matrix = np.zeros((self.capacity, self.dim), dtype=np.float32)
+            self._matrix[self._head] = vector
+            self._head = (self._head + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def max_similarity(self, embedding: List[float]) -> float:
+        """
+        Highest cosine similarity between `embedding` and any stored one (-1.0 when empty).
+        """
+        with self._lock:
+            if self._count == 0:
+                return -1.0
+            scores = self._matrix[:self._count] @ self._normalize(embedding)
+        return float(scores.max())
+
+    def is_similar(self, embedding: List[float], threshold: float) -> bool:
+        return self.max_similarity(embedding) > threshold
+
+    def clear(self) -> None:
+        with self._lock:
+            self._count = 0
+            self._head = 0
@@ -1,57 +1,256 @@
-import faiss
 import numpy as np
 import os
-from sentence_transformers import SentenceTransformer
+import threading
+
+from app.embeddings.embedding_batcher import BatchingEmbeddingFunction
+from app.memory import snapshot
 
 class ShortTermMemory:
-    def __init__(self, dim=384, max_items=100, snapshot_path="./memory_snapshot"):
+    """
+    Recent interactions kept in a fixed-size ring buffer.
+
+    Vectors live in a preallocated float32 array with a moving head: once the buffer is
+    full, a new interaction overwrites the oldest slot. An insert costs one encode plus
+    O(1) array work; nothing is ever re-embedded.
+
+    Persistence: every insert is appended to a write-ahead log, and periodic snapshots
+    (UTF-8 text arena + offsets + raw vectors) are written atomically and memory-mapped
+    on startup. See `app.memory.snapshot`.
+    """
+    def __init__(self, dim=384, max_items=100, snapshot_path="./memory_snapshot", model=None,
+                 snapshot_interval=None, wal_fsync=None):
         self.dim = dim
         self.max_items = max_items
         self.snapshot_path = snapshot_path
+        # Pre-arena snapshot format, still read once for migration
         self.index_file = os.path.join(snapshot_path, "index.faiss")
         self.texts_file = os.path.join(snapshot_path, "texts.npy")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.snapshot_interval = snapshot_interval or float(os.getenv("STM_SNAPSHOT_INTERVAL", "300"))
+        self.wal_fsync = wal_fsync if wal_fsync is not None else os.getenv("STM_WAL_FSYNC", "false").lower() == "true"
+        if model is None:
+            # Imported here: sentence_transformers pulls in torch, seconds of import time
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.model = model
+        # encode() is much cheaper per text in batches; concurrent inserts/queries share one call.
+        # A single in-flight batch: the model is CPU-bound, parallel batches only contend.
+        self.batcher = BatchingEmbeddingFunction.from_env(self.model.encode, name="short_term", max_inflight=1)
 
         os.makedirs(snapshot_path, exist_ok=True)
-        self.texts = []
-        self.index = faiss.IndexFlatL2(dim)
+        self.vectors = np.zeros((max_items, dim), dtype=np.float32)
+        self.sq_norms = np.zeros(max_items, dtype=np.float32)
+        self.slots = [None] * max_items
+        self.head = 0
+        self.count = 0
+        self.generation = 0
+        # Texts of a memory-mapped snapshot, decoded on demand
+        self._offsets = None
+        self._arena = None
+        self._wal = None
+        self._snapshot_thread = None
+        self._stop = threading.Event()
+        # Async requests reach this object from several executor threads at once
+        self._lock = threading.Lock()
 
         self.load()
 
+    @property
+    def texts(self):
+        """Stored interactions, oldest first."""
+        with self._lock:
+            return self._ordered_texts()
+
+    def _text(self, slot):
+        text = self.slots[slot]
+        if text is None and self._arena is not None:
+            start, end = self._offsets[slot], self._offsets[slot + 1]
+            text = self.slots[slot] = bytes(self._arena[start:end]).decode("utf-8")
+        return text
+
+    def _logical_order(self):
+        start = (self.head - self.count) % self.max_items
+        return [(start + i) % self.max_items for i in range(self.count)]
+
+    def _ordered_texts(self):
+        return [self._text(slot) for slot in self._logical_order()]
+
+    def _put(self, text, embedding):
+        # Caller holds self._lock
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        self.vectors[self.head] = vector
+        self.sq_norms[self.head] = vector @ vector
+        self.slots[self.head] = text
+        self.head = (self.head + 1) % self.max_items
+        self.count = min(self.count + 1, self.max_items)
+        return vector
+
     def add_interaction(self, user_message, assistant_response):
         combined = f"Usuario: {user_message}\nAsistente: {assistant_response}"
         embedding = self._embed(combined)
 
-        if len(self.texts) >= self.max_items:
-            self.texts.pop(0)
-            embeddings = np.array([self._embed(t) for t in self.texts])
-            self.index = faiss.IndexFlatL2(self.dim)
-            self.index.add(embeddings)
+        with self._lock:
+            vector = self._put(combined, embedding)
+            self._wal.append(combined, vector)
 
-        self.index.add(np.array([embedding]))
-        self.texts.append(combined)
+    def query(self, text, top_k=3, context=None):
+        return [hit["text"] for hit in self.search(text, top_k, context)]
 
-    def query(self, text, top_k=3):
-        if len(self.texts) == 0:
+    def search(self, text, top_k=3, context=None):
+        """
+        Like `query`, as scored hits: the slot as id and the negated squared L2 distance
+        (without the constant query norm) as score.
+        """
+        if self.count == 0:
             return []
 
-        embedding = self._embed(text)
-        D, I = self.index.search(np.array([embedding]), top_k)
-        results = [self.texts[i] for i in I[0] if i < len(self.texts)]
+        embedding = context.embedding("short_term", self._embed) if context else self._embed(text)
+        query_vec = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            # Squared L2 distance, same ranking the FAISS IndexFlatL2 gave
+            distances = self.sq_norms[:self.count] - 2 * (self.vectors[:self.count] @ query_vec)
+            k = min(top_k, self.count)
+            nearest = np.argpartition(distances, k - 1)[:k]
+            nearest = nearest[np.argsort(distances[nearest])]
+            results = [
+                {"id": str(i), "text": self._text(i), "score": -float(distances[i]), "source": "short_term"}
+                for i in nearest
+            ]
         return results
 
+    def get_stats(self):
+        return {
+            "total_items": self.count,
+            "max_items": self.max_items,
+            "snapshot_generation": self.generation,
+            "wal_entries": self._wal.entries if self._wal else 0,
+            "embedding_batcher": self.batcher.stats(),
+        }
+
+    def clear_all(self):
+        with self._lock:
+            self.slots = [None] * self.max_items
+            self._arena = self._offsets = None
+            self.head = 0
+            self.count = 0
+        # Persist the empty state, otherwise the WAL would bring the cleared items back
+        self.save()
+
     def save(self):
-        faiss.write_index(self.index, self.index_file)
-        np.save(self.texts_file, np.array(self.texts))
+        """
+        Writes a new snapshot generation and starts a fresh WAL. Inserts are only blocked
+        while the state is copied; the files are written outside the lock.
+        """
+        with self._lock:
+            vectors = np.array(self.vectors)
+            sq_norms = np.array(self.sq_norms)
+            texts = [self._text(slot) for slot in range(self.max_items)]
+            meta = {"dim": self.dim, "rows": self.max_items, "head": self.head, "count": self.count}
+            # Past any WAL a crashed save left behind, so replay order stays insertion order
+            generation = max(self.generation, snapshot.latest_wal_generation(self.snapshot_path)) + 1
+            # Inserts from here on belong to the new generation; if the snapshot below never
+            # lands, load() replays every WAL on top of the previous generation.
+            pending = self._wal.entries
+            self._wal.close()
+            self._wal = snapshot.WriteAheadLog(self.snapshot_path, generation, self.wal_fsync, truncate=True)
+            self.generation = generation
+
+        try:
+            snapshot.write_snapshot(self.snapshot_path, generation, vectors, texts, meta, sq_norms)
+        except Exception:
+            # Still unconsolidated: the next save (background or close) retries
+            with self._lock:
+                self._wal.entries += pending
+            raise
+        snapshot.remove_older_generations(self.snapshot_path, generation)
         print("[INFO] Memoria guardada a snapshot.")
 
     def load(self):
-        if os.path.exists(self.index_file) and os.path.exists(self.texts_file):
-            self.index = faiss.read_index(self.index_file)
-            self.texts = np.load(self.texts_file).tolist()
-            print("[INFO] Memoria cargada desde snapshot.")
-        else:
-            print("[INFO] No se encontró snapshot previo, iniciando vacío.")
+        meta = snapshot.read_meta(self.snapshot_path)
+        with self._lock:
+            if meta is not None:
+                self._load_snapshot(meta)
+                print("[INFO] Memoria cargada desde snapshot.")
+            elif os.path.exists(self.index_file) and os.path.exists(self.texts_file):
+                self._load_legacy()
+                print("[INFO] Memoria cargada desde snapshot.")
+            else:
+                print("[INFO] No se encontró snapshot previo, iniciando vacío.")
+
+            replayed = 0
+            for text, vector in snapshot.replay_wal(self.snapshot_path, self.generation):
+                self._put(text, vector)
+                replayed += 1
+            if replayed:
+                print(f"[INFO] {replayed} interacciones recuperadas del WAL.")
+            self._wal = snapshot.WriteAheadLog(self.snapshot_path, self.generation, self.wal_fsync)
+            self._wal.entries = replayed
+
+        if replayed:
+            # Consolidate right away: new inserts then go to a fresh WAL after the replayed ones
+            try:
+                self.save()
+            except Exception as e:
+                print(f"[WARN] No se pudo consolidar el WAL recuperado: {e}")
+
+    def _load_snapshot(self, meta):
+        # Caller holds self._lock
+        self.generation = meta["generation"]
+        vectors, offsets, arena, sq_norms = snapshot.open_snapshot(self.snapshot_path, meta)
+        if meta["dim"] == self.dim and meta["rows"] == self.max_items:
+            # Same layout: map the files instead of copying them into RAM
+            if vectors is not None:
+                self.vectors = vectors
+                self.sq_norms = sq_norms
+            self._offsets, self._arena = offsets, arena
+            self.head, self.count = meta["head"], meta["count"]
+            return
+
+        # Different buffer size: replay the snapshot oldest-first into the new ring
+        start = (meta["head"] - meta["count"]) % meta["rows"]
+        for i in range(meta["count"]):
+            slot = (start + i) % meta["rows"]
+            text = bytes(arena[offsets[slot]:offsets[slot + 1]]).decode("utf-8") if arena is not None else ""
+            self._put(text, vectors[slot])
+
+    def _load_legacy(self):
+        # Caller holds self._lock
+        import faiss
+        index = faiss.read_index(self.index_file)
+        texts = np.load(self.texts_file).tolist()
+        vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else []
+        for text, vector in list(zip(texts, vectors))[-self.max_items:]:
+            self._put(text, vector)
+
+    def start_background_snapshots(self):
+        """
+        Snapshots every `snapshot_interval` seconds when the WAL has new entries.
+        """
+        if self._snapshot_thread is not None:
+            return
+        self._stop.clear()
+        self._snapshot_thread = threading.Thread(
+            target=self._snapshot_loop, name="stm-snapshot", daemon=True)
+        self._snapshot_thread.start()
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            if self._wal.entries:
+                try:
+                    self.save()
+                except Exception as e:
+                    print(f"[WARN] Falló el snapshot de memoria: {e}")
+
+    def close(self):
+        """
+        Stops background snapshots and writes a final snapshot if anything changed.
+        """
+        self._stop.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+        if self._wal.entries:
+            self.save()
+        self._wal.close()
 
     def _embed(self, text):
-        return self.model.encode(text)
+        return self.batcher([text])[0]
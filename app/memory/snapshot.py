@@ -0,0 +1,164 @@
+import os
+import glob
+import json
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+META_FILE = "stm.meta.json"
+# WAL record header: text length in bytes, vector dimension
+_RECORD_HEADER = struct.Struct("<II")
+
+
+def _files(path: str, generation: int) -> Dict[str, str]:
+    return {
+        "vectors": os.path.join(path, f"stm.{generation}.vectors.f32"),
+        "norms": os.path.join(path, f"stm.{generation}.norms.f32"),
+        "offsets": os.path.join(path, f"stm.{generation}.offsets.i64"),
+        "texts": os.path.join(path, f"stm.{generation}.texts.bin"),
+    }
+
+
+def wal_file(path: str, generation: int) -> str:
+    return os.path.join(path, f"stm.{generation}.wal")
+
+
+def _write_atomic(target: str, write) -> None:
+    tmp = target + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, target)
+
+
+def encode_texts(texts: List[Optional[str]]) -> Tuple[np.ndarray, bytes]:
+    """
+    Packs texts into a UTF-8 arena plus an offsets array (len(texts) + 1 entries);
+    text i is arena[offsets[i]:offsets[i + 1]]. Empty slots are zero-length.
+    """
+    encoded = [(text or "").encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def write_snapshot(path: str, generation: int, vectors: np.ndarray, texts: List[Optional[str]], meta: Dict,
+                   sq_norms: np.ndarray) -> None:
+    """
+    Writes generation `generation` next to the previous one, then atomically swaps the
+    meta file to point at it. A crash at any point leaves the previous generation intact.
+    """
+    files = _files(path, generation)
+    offsets, arena = encode_texts(texts)
+    _write_atomic(files["vectors"], lambda f: f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes()))
+    _write_atomic(files["norms"], lambda f: f.write(np.ascontiguousarray(sq_norms, dtype=np.float32).tobytes()))
+    _write_atomic(files["offsets"], lambda f: f.write(offsets.tobytes()))
+    _write_atomic(files["texts"], lambda f: f.write(arena))
+
+    meta = dict(meta, version=SNAPSHOT_VERSION, generation=generation)
+    _write_atomic(os.path.join(path, META_FILE), lambda f: f.write(json.dumps(meta).encode("utf-8")))
+
+
+def read_meta(path: str) -> Optional[Dict]:
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta if meta.get("version") == SNAPSHOT_VERSION else None
+
+
+def open_snapshot(path: str, meta: Dict):
+    """
+    Maps a snapshot without reading it into RAM. Vectors and norms are copy-on-write, so
+    the ring buffer can overwrite slots without touching the file; texts stay in the mapped
+    arena until they are asked for.
+    Returns (vectors, offsets, arena, sq_norms).
+    """
+    files = _files(path, meta["generation"])
+    rows, dim = meta["rows"], meta["dim"]
+    vectors = np.memmap(files["vectors"], dtype=np.float32, mode="c", shape=(rows, dim)) if rows else None
+    sq_norms = np.memmap(files["norms"], dtype=np.float32, mode="c", shape=(rows,)) if rows else None
+    offsets = np.memmap(files["offsets"], dtype=np.int64, mode="r")
+    arena = np.memmap(files["texts"], dtype=np.uint8, mode="r") if os.path.getsize(files["texts"]) else None
+    return vectors, offsets, arena, sq_norms
+
+
+def remove_older_generations(path: str, generation: int) -> None:
+    for file in glob.glob(os.path.join(path, "stm.*.*")):
+        parts = os.path.basename(file).split(".")
+        if len(parts) >= 3 and parts[1].isdigit() and int(parts[1]) < generation:
+            try:
+                os.remove(file)
+            except OSError:
+                pass
+
+
+def _wal_generations(path: str) -> List[Tuple[int, str]]:
+    wals = []
+    for file in glob.glob(os.path.join(path, "stm.*.wal")):
+        generation = os.path.basename(file).split(".")[1]
+        if generation.isdigit():
+            wals.append((int(generation), file))
+    return sorted(wals)
+
+
+def latest_wal_generation(path: str) -> int:
+    """
+    Highest generation with a WAL on disk (0 if none). A save that crashed before its
+    snapshot landed leaves a WAL newer than the meta file.
+    """
+    wals = _wal_generations(path)
+    return wals[-1][0] if wals else 0
+
+
+class WriteAheadLog:
+    """
+    Append-only log of interactions added since the last snapshot, one record per
+    add: header, UTF-8 text, float32 vector. Each record is a single write() call.
+    `truncate` starts the file empty instead of appending to whatever is there.
+    """
+
+    def __init__(self, path: str, generation: int, fsync: bool = False, truncate: bool = False):
+        self.file_path = wal_file(path, generation)
+        self.fsync = fsync
+        self.entries = 0
+        self._file = open(self.file_path, "wb" if truncate else "ab")
+
+    def append(self, text: str, vector: np.ndarray) -> None:
+        data = text.encode("utf-8")
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        self._file.write(_RECORD_HEADER.pack(len(data), vector.shape[0]) + data + vector.tobytes())
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.entries += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def replay_wal(path: str, from_generation: int) -> Iterator[Tuple[str, np.ndarray]]:
+    """
+    Yields (text, vector) from every WAL at or after `from_generation`, oldest first.
+    A record cut short by a crash ends the replay of that file.
+    """
+    for generation, file in _wal_generations(path):
+        if generation < from_generation:
+            continue
+        with open(file, "rb") as f:
+            data = f.read()
+        pos = 0
+        while pos + _RECORD_HEADER.size <= len(data):
+            text_len, dim = _RECORD_HEADER.unpack_from(data, pos)
+            end = pos + _RECORD_HEADER.size + text_len + dim * 4
+            if end > len(data):
+                break
+            text_start = pos + _RECORD_HEADER.size
+            text = data[text_start:text_start + text_len].decode("utf-8")
+            vector = np.frombuffer(data, dtype=np.float32, count=dim, offset=text_start + text_len)
+            yield text, vector
+            pos = end
@@ -1,87 +1,327 @@
-import sqlite3
+import os
+import re
 import json
+import sqlite3
+import threading
 from typing import Optional, Dict, List
-from memory_store_interface import MemoryStore  # Asegúrate de que MemoryStore esté importado desde el lugar adecuado
+
+import numpy as np
+
+from .memory_store_interface import MemoryStore, MemoryItem, ScoredHit, vectors_for
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    content TEXT NOT NULL,
+    metadata TEXT,
+    vector BLOB
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    content, content='documents', content_rowid='seq', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, content) VALUES (new.seq, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, content) VALUES ('delete', old.seq, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE OF content ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, content) VALUES ('delete', old.seq, old.content);
+    INSERT INTO documents_fts (rowid, content) VALUES (new.seq, new.content);
+END;
+CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('vectors_version', 0);
+"""
+
+UPSERT = """
+INSERT INTO documents (id, content, metadata, vector) VALUES (?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET content = excluded.content, metadata = excluded.metadata, vector = excluded.vector
+RETURNING seq
+"""
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Convierte texto libre en una consulta FTS5: cada token entre comillas (sin operadores
+    ni sintaxis que pueda romper la consulta) y unidos con OR, ordenados luego por bm25.
+    """
+    tokens = list(dict.fromkeys(token for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1))
+    return " OR ".join(f'"{token}"' for token in tokens) or None
+
 
 class SQLiteMemoryStore(MemoryStore):
-    def __init__(self):
+    name = "sqlite"
+    vector_search = True
+
+    def __init__(self, path: str = None, embedding_fn=None, vector_path: str = None):
         """
-        Inicializa la base de datos SQLite en memoria.
+        Store de largo plazo sin servicios externos: un archivo SQLite en modo WAL.
+
+        Parámetros:
+        - path: Archivo de la base (SQLITE_MEMORY_PATH, por defecto
+          './memory_snapshot/long_term.sqlite3'); ':memory:' para una base efímera.
+        - embedding_fn: Función de embeddings (por defecto la del router, cargada al usarla).
+        - vector_path: Prefijo de un sidecar con la matriz de vectores (SQLITE_VECTOR_PATH,
+          vacío lo desactiva). Se escribe en `save_vectors()`/`close()` y se abre con mmap
+          al arrancar, sin deserializar los BLOBs.
+
+        `query` es léxica (FTS5 ordenado por bm25); `query_by_vector` compara por coseno
+        contra una matriz NumPy en memoria, cargada la primera vez que se usa y mantenida
+        al escribir. Pensado para un solo proceso escritor.
         """
-        self.connection = sqlite3.connect(':memory:')  # Crea una base de datos SQLite en memoria
-        self.cursor = self.connection.cursor()
-        self.cursor.execute('''CREATE TABLE IF NOT EXISTS metadata (id TEXT PRIMARY KEY, metadata TEXT)''')
+        self.path = path or os.getenv("SQLITE_MEMORY_PATH", "./memory_snapshot/long_term.sqlite3")
+        self.vector_path = vector_path if vector_path is not None else os.getenv("SQLITE_VECTOR_PATH") or None
+        self._embedding_fn = embedding_fn
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA temp_store=MEMORY")
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+        # Matriz de vectores normalizados (filas [0, _count)) y el seq de cada fila
+        self._matrix: Optional[np.ndarray] = None
+        self._seqs: Optional[np.ndarray] = None
+        self._positions: Dict[int, int] = {}
+        self._count = 0
+
+    @property
+    def embedding_fn(self):
+        if self._embedding_fn is None:
+            from app.llm_clients.llm_router import get_embedding_function
+            self._embedding_fn = get_embedding_function()
+        return self._embedding_fn
+
+    # --- Escritura ---
 
-    def add(self, db_name: str, id: str, content: str, metadata: Optional[Dict] = None) -> None:
+    def add(self, id: str, content: str, metadata: Optional[Dict] = None) -> None:
         """
-        Agrega un documento y metadatos a la base de datos SQLite.
-        Si no existe la base de datos, la crea automáticamente.
+        Agrega (o reemplaza) un documento; el embedding se calcula aquí.
 
         Parámetros:
-        - db_name: Nombre de la base de datos que contiene el documento.
         - id: Identificador único del documento.
         - content: El contenido del documento.
         - metadata: Metadatos adicionales opcionales, que se almacenan como JSON.
         """
-        self.create_db(db_name)
-        metadata_json = json.dumps(metadata) if metadata else None
-        table_name = f"documents_{db_name}"
-        self.cursor.execute(f"INSERT OR REPLACE INTO {table_name} (id, content, metadata) VALUES (?, ?, ?)", (id, content, metadata_json))
-        self.connection.commit()
+        self.add_many([{"id": id, "content": content, "metadata": metadata}])
 
-    def query(self, db_name: str, query_text: str, n_results: int = 5) -> List[str]:
+    def add_with_vector(self, id: str, content: str, vector: List[float], metadata: Optional[Dict] = None) -> None:
+        self.add_many([{"id": id, "content": content, "metadata": metadata, "vector": vector}])
+
+    def add_many(self, items: List[MemoryItem]) -> None:
+        """
+        Agrega varios documentos en una sola transacción; los embeddings que faltan se
+        calculan en una sola llamada. Un id existente se sobrescribe.
         """
-        Realiza una búsqueda en los documentos de SQLite en memoria dentro de la base de datos especificada.
+        if not items:
+            return
+        vectors = np.asarray(vectors_for(items, lambda texts: self.embedding_fn(texts)), dtype=np.float32)
+        with self._lock:
+            seqs = []
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                for item, vector in zip(items, vectors):
+                    metadata = item.get("metadata")
+                    seqs.append(self.connection.execute(UPSERT, (
+                        item["id"], item["content"], json.dumps(metadata) if metadata else None,
+                        vector.tobytes())).fetchone()[0])
+                self.connection.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'vectors_version'")
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            if self._matrix is not None:
+                self._put_vectors(seqs, vectors)
+
+    # --- Matriz de vectores ---
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _put_vectors(self, seqs: List[int], vectors: np.ndarray) -> None:
+        vectors = self._normalize(vectors)
+        needed = self._count + sum(1 for seq in seqs if seq not in self._positions)
+        if self._matrix.shape[1] != vectors.shape[1] and self._count == 0:
+            self._matrix = np.empty((0, vectors.shape[1]), dtype=np.float32)
+        if needed > len(self._matrix) or not self._matrix.flags.writeable:
+            capacity = max(needed, 2 * len(self._matrix), 1024)
+            matrix = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            matrix[:self._count] = self._matrix[:self._count]
+            seq_array = np.empty(capacity, dtype=np.int64)
+            seq_array[:self._count] = self._seqs[:self._count]
+            self._matrix, self._seqs = matrix, seq_array
+        for seq, vector in zip(seqs, vectors):
+            position = self._positions.get(seq)
+            if position is None:
+                position = self._positions[seq] = self._count
+                self._seqs[position] = seq
+                self._count += 1
+            self._matrix[position] = vector
+
+    def _vectors_version(self) -> int:
+        return self.connection.execute("SELECT value FROM store_meta WHERE key = 'vectors_version'").fetchone()[0]
+
+    def _ensure_vectors(self) -> None:
+        if self._matrix is not None:
+            return
+        if self.vector_path and self._open_sidecar():
+            return
+        rows = self.connection.execute("SELECT seq, vector FROM documents WHERE vector IS NOT NULL").fetchall()
+        if rows:
+            matrix = self._normalize(np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows]))
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        self._matrix = matrix
+        self._seqs = np.fromiter((seq for seq, _ in rows), dtype=np.int64, count=len(rows))
+        self._positions = {int(seq): position for position, seq in enumerate(self._seqs)}
+        self._count = len(rows)
+
+    def _open_sidecar(self) -> bool:
+        try:
+            with open(self.vector_path + ".meta.json") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if meta.get("version") != self._vectors_version():
+            print("[INFO] Sidecar de vectores SQLite desactualizado; se reconstruye desde la base.")
+            return False
+        # Solo lectura: la primera escritura copia la matriz a memoria
+        self._matrix = np.load(self.vector_path + ".vectors.npy", mmap_mode="r")
+        self._seqs = np.load(self.vector_path + ".seqs.npy", mmap_mode="r")
+        self._positions = {int(seq): position for position, seq in enumerate(self._seqs)}
+        self._count = len(self._seqs)
+        return True
+
+    def save_vectors(self) -> None:
+        """
+        Escribe el sidecar de vectores de forma atómica (meta al final, con la versión de
+        la base a la que corresponde).
+        """
+        if not self.vector_path:
+            return
+        with self._lock:
+            self._ensure_vectors()
+            version = self._vectors_version()
+            os.makedirs(os.path.dirname(self.vector_path) or ".", exist_ok=True)
+            for suffix, array in ((".vectors.npy", self._matrix[:self._count]), (".seqs.npy", self._seqs[:self._count])):
+                with open(self.vector_path + suffix + ".tmp", "wb") as f:
+                    np.save(f, np.ascontiguousarray(array))
+                os.replace(self.vector_path + suffix + ".tmp", self.vector_path + suffix)
+            with open(self.vector_path + ".meta.json.tmp", "w") as f:
+                json.dump({"version": version, "count": self._count}, f)
+            os.replace(self.vector_path + ".meta.json.tmp", self.vector_path + ".meta.json")
+
+    # --- Lectura ---
+
+    def _rows(self, seqs: List[int]) -> Dict[int, tuple]:
+        placeholders = ",".join("?" * len(seqs))
+        rows = self.connection.execute(
+            f"SELECT seq, id, content FROM documents WHERE seq IN ({placeholders})", seqs).fetchall()
+        return {seq: (id, content) for seq, id, content in rows}
+
+    def query(self, query_text: str, n_results: int = 5) -> List[str]:
+        """
+        Búsqueda léxica sobre el índice FTS5, ordenada por bm25.
 
         Parámetros:
-        - db_name: El nombre de la base de datos que se va a consultar.
-        - query_text: Término de búsqueda dentro del contenido de los documentos.
+        - query_text: Texto de la consulta; basta con que coincida alguno de sus términos.
         - n_results: Número de resultados a devolver (por defecto 5).
 
         Retorna:
-        - Lista de contenidos que coinciden con la búsqueda.
+        - Lista de contenidos, del más al menos relevante.
         """
-        table_name = f"documents_{db_name}"
-        self.cursor.execute(f"SELECT content FROM {table_name} WHERE content LIKE ? LIMIT ?", ('%' + query_text + '%', n_results))
-        return [row[0] for row in self.cursor.fetchall()]
+        return [hit["text"] for hit in self.search(query_text, n_results)]
 
-    def get_stats(self) -> Dict:
+    def query_by_vector(self, vector: List[float], n_results: int = 5, query_text: Optional[str] = None) -> List[str]:
+        """
+        Los `n_results` documentos más similares por coseno: un producto matriz-vector y un
+        `argpartition` sobre todos los vectores, sin índice aproximado.
         """
-        Obtiene estadísticas sobre las bases de datos y documentos creados.
+        return [hit["text"] for hit in self.search(query_text, n_results, vector=vector)]
 
-        Retorna:
-        - Diccionario con el número total de bases de datos y documentos.
+    def search(self, query_text: str, n_results: int = 5, vector: Optional[List[float]] = None) -> List[ScoredHit]:
         """
-        self.cursor.execute("SELECT count(*) FROM metadata")
-        return {"total_databases": self.cursor.fetchone()[0]}
+        Con `vector`, búsqueda por coseno (score = similitud); sin él, léxica con FTS5
+        (score = -bm25).
+        """
+        if vector is not None:
+            return self._search_vector(vector, n_results)
+        match = fts_query(query_text or "")
+        if match is None:
+            return []
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT d.id, d.content, documents_fts.rank FROM documents_fts "
+                "JOIN documents d ON d.seq = documents_fts.rowid "
+                "WHERE documents_fts MATCH ? ORDER BY documents_fts.rank LIMIT ?", (match, n_results)).fetchall()
+        return [{"id": id, "text": content, "score": -rank, "source": self.name} for id, content, rank in rows]
 
-    def clear(self) -> None:
+    def _search_vector(self, vector: List[float], n_results: int) -> List[ScoredHit]:
+        with self._lock:
+            self._ensure_vectors()
+            if self._count == 0:
+                return []
+            query = np.asarray(vector, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1)
+            scores = self._matrix[:self._count] @ query
+            k = min(n_results, self._count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            seqs = [int(seq) for seq in self._seqs[top]]
+            rows = self._rows(seqs)
+        return [
+            {"id": rows[seq][0], "text": rows[seq][1], "score": float(score), "source": self.name}
+            for seq, score in zip(seqs, scores[top]) if seq in rows
+        ]
+
+    def search_by_metadata(self, key: str, value: str, n_results: Optional[int] = None) -> List[str]:
         """
-        Borra todos los documentos de todas las bases de datos.
+        Documentos cuyo campo de metadata `key` vale `value` (como mucho `n_results`).
         """
-        self.cursor.execute("DELETE FROM metadata")
-        self.connection.commit()
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT content FROM documents WHERE json_extract(metadata, '$.' || ?) = ? LIMIT ?",
+                (key, value, n_results if n_results else -1)).fetchall()
+        return [row[0] for row in rows]
 
-    def create_db(self, db_name: str) -> None:
+    def get_stats(self) -> Dict:
         """
-        Crea una nueva base de datos y tabla de documentos si no existe.
-        Además, crea una tabla de metadatos asociada a la base de datos.
+        Obtiene estadísticas de la base.
 
-        Parámetros:
-        - db_name: El nombre de la base de datos que se va a crear.
+        Retorna:
+        - Documentos, documentos con vector y archivo de la base.
         """
-        table_name = f"documents_{db_name}"
-        self.cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} (id TEXT PRIMARY KEY, content TEXT, metadata TEXT)")
-        self.cursor.execute("INSERT OR REPLACE INTO metadata (id, metadata) VALUES (?, ?)", (db_name, f"Metadata for {db_name}"))
-        self.connection.commit()
+        with self._lock:
+            total, with_vector = self.connection.execute(
+                "SELECT count(*), count(vector) FROM documents").fetchone()
+        return {"total_entries": total, "vectors": with_vector, "path": self.path}
 
-    def create_metadata_table(self, db_name: str) -> None:
+    # --- Mantenimiento ---
+
+    def clear(self) -> None:
+        """
+        Borra todos los documentos (y su índice FTS5).
         """
-        Crea una tabla de metadatos para el seguimiento de las bases de datos creadas.
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("DELETE FROM documents")
+            self.connection.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'vectors_version'")
+            self.connection.execute("COMMIT")
+            self._matrix, self._seqs, self._positions, self._count = None, None, {}, 0
 
-        Parámetros:
-        - db_name: El nombre de la base de datos que se está creando.
+    def close(self) -> None:
+        """
+        Guarda el sidecar de vectores (si está configurado) y cierra la conexión.
         """
-        self.cursor.execute("CREATE TABLE IF NOT EXISTS metadata (db_name TEXT PRIMARY KEY, creation_info TEXT)")
-        self.cursor.execute("INSERT OR REPLACE INTO metadata (db_name, creation_info) VALUES (?, ?)", (db_name, f"Created on {db_name}"))
-        self.connection.commit()
+        with self._lock:
+            if self._matrix is not None:
+                self.save_vectors()
+            self.connection.close()
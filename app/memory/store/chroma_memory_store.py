@@ -1,11 +1,13 @@
-from chromadb import HttpClient
 from app.llm_clients.llm_router import get_embedding_function
-from .memory_store_interface import MemoryStore
+from .memory_store_interface import MemoryStore, MemoryItem, ScoredHit, vectors_for
 from typing import List, Dict, Optional
 import os
 
 
 class ChromaMemoryStore(MemoryStore):
+    name = "chroma"
+    vector_search = True
+
     def __init__(
         self,
         host: str = None,
@@ -20,11 +22,14 @@ class ChromaMemoryStore(MemoryStore):
         port = port or int(os.getenv("CHROMA_PORT", "8000"))
         self.collection_name = collection_name
 
-        # Conexión al nuevo cliente REST v1
+        # Conexión al nuevo cliente REST v1 (chromadb se importa aquí: es lento de cargar)
+        from chromadb import HttpClient
         self.client = HttpClient(host=host, port=port)
 
         # Embedding externo
         self.embedding_fn = get_embedding_function()
+        # Documentos por llamada en add_many (el servidor rechaza lotes demasiado grandes)
+        self.batch_size = int(os.getenv("CHROMA_BATCH_SIZE", "1000"))
 
         # Crea o recupera la colección
         self.collection = self.client.get_or_create_collection(
@@ -35,22 +40,64 @@ class ChromaMemoryStore(MemoryStore):
         Adds a new document to the collection using external embeddings.
         """
         embedding = self.embedding_fn([content])[0]  # embed como lista
+        self.add_with_vector(id, content, embedding, metadata)
+
+    def add_with_vector(self, id: str, content: str, vector: List[float], metadata: Optional[Dict] = None) -> None:
+        """
+        Adds a document whose embedding was already computed by the caller.
+        """
         self.collection.add(
             documents=[content],
             ids=[id],
             metadatas=[metadata or {}],
-            embeddings=[embedding]
+            embeddings=[vector]
         )
 
+    def add_many(self, items: List[MemoryItem]) -> None:
+        """
+        Adds many documents: missing embeddings are computed in one call and the
+        documents go to Chroma in chunks of `batch_size`.
+        """
+        if not items:
+            return
+        vectors = vectors_for(items, self.embedding_fn)
+        for start in range(0, len(items), self.batch_size):
+            chunk = items[start:start + self.batch_size]
+            self.collection.add(
+                documents=[item["content"] for item in chunk],
+                ids=[item["id"] for item in chunk],
+                metadatas=[item.get("metadata") or {} for item in chunk],
+                embeddings=vectors[start:start + self.batch_size]
+            )
+
     def query(self, query_text: str, n_results: int = 5) -> List[str]:
         """
         Performs a similarity search using external embedding function.
         """
         embedding = self.embedding_fn([query_text])[0]
+        return self.query_by_vector(embedding, n_results)
+
+    def query_by_vector(self, vector: List[float], n_results: int = 5, query_text: Optional[str] = None) -> List[str]:
+        """
+        Performs a similarity search with a precomputed query embedding.
+        """
+        return [hit["text"] for hit in self.search(query_text, n_results, vector=vector)]
+
+    def search(self, query_text: str, n_results: int = 5, vector: Optional[List[float]] = None) -> List[ScoredHit]:
+        """
+        Similarity search returning ids and scores (negated distance: higher is closer).
+        The query is embedded only when no `vector` is given.
+        """
+        if vector is None:
+            vector = self.embedding_fn([query_text])[0]
         results = self.collection.query(
-            query_embeddings=[embedding], n_results=n_results
+            query_embeddings=[vector], n_results=n_results, include=["documents", "distances"]
         )
-        return results.get("documents", [[]])[0]
+        return [
+            {"id": id, "text": text, "score": -distance, "source": self.name}
+            for id, text, distance in zip(
+                results["ids"][0], results["documents"][0], results["distances"][0])
+        ]
 
     def get_stats(self) -> Dict:
         """
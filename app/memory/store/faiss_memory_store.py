@@ -2,9 +2,12 @@ import faiss
 from typing import List, Dict, Optional
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from memory_store_interface import MemoryStore
+from .memory_store_interface import MemoryStore, MemoryItem, vectors_for
 
 class FaissMemoryStore(MemoryStore):
+    name = "faiss"
+    vector_search = True
+
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
         self.model = SentenceTransformer(model_name)
         self.index = faiss.IndexFlatL2(self.model.get_sentence_embedding_dimension())
@@ -12,16 +15,34 @@ class FaissMemoryStore(MemoryStore):
         self.metadata_list = []
 
     def add(self, id: str, content: str, metadata: Optional[Dict] = None) -> None:
-        embedding = self.model.encode([content])[0].astype("float32")
-        self.index.add(np.array([embedding]))
+        embedding = self.model.encode([content])[0]
+        self.add_with_vector(id, content, embedding, metadata)
+
+    def add_with_vector(self, id: str, content: str, vector: List[float], metadata: Optional[Dict] = None) -> None:
+        self.index.add(np.asarray([vector], dtype="float32"))
         self.texts.append(content)
         self.metadata_list.append(metadata or {})
 
+    def add_many(self, items: List[MemoryItem]) -> None:
+        if not items:
+            return
+        vectors = vectors_for(items, lambda texts: self.model.encode(texts))
+        self.index.add(np.asarray(vectors, dtype="float32"))
+        self.texts.extend(item["content"] for item in items)
+        self.metadata_list.extend(item.get("metadata") or {} for item in items)
+
     def query(self, query_text: str, n_results: int = 5) -> List[str]:
         if len(self.texts) == 0:
             return []
 
-        query_vec = self.model.encode([query_text])[0].astype("float32").reshape(1, -1)
+        query_vec = self.model.encode([query_text])[0]
+        return self.query_by_vector(query_vec, n_results)
+
+    def query_by_vector(self, vector: List[float], n_results: int = 5, query_text: Optional[str] = None) -> List[str]:
+        if len(self.texts) == 0:
+            return []
+
+        query_vec = np.asarray(vector, dtype="float32").reshape(1, -1)
         D, I = self.index.search(query_vec, min(n_results, len(self.texts)))
         return [self.texts[i] for i in I[0]]
 
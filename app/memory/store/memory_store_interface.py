@@ -1,8 +1,48 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TypedDict
+
+
+class MemoryItem(TypedDict, total=False):
+    """Documento para `add_many`: `id` y `content` obligatorios; `vector` si ya se calculó."""
+    id: str
+    content: str
+    metadata: Optional[Dict]
+    vector: Optional[List[float]]
+
+
+class ScoredHit(TypedDict):
+    """
+    Resultado de `search`. `score`: mayor es mejor, comparable solo dentro de un mismo
+    store; `source`: nombre del store que lo devolvió.
+    """
+    id: Optional[str]
+    text: str
+    score: float
+    source: str
+
+
+def hits_from_texts(texts: List[str], source: str) -> List[ScoredHit]:
+    """
+    Hits para un backend que solo devuelve textos ordenados: puntúa por posición (1, 1/2, 1/3...).
+    """
+    return [{"id": None, "text": text, "score": 1.0 / (rank + 1), "source": source} for rank, text in enumerate(texts)]
+
+
+def vectors_for(items: List[MemoryItem], embed) -> List[List[float]]:
+    """
+    Vectores de `items` en orden; los que faltan se calculan con `embed` en una sola llamada.
+    """
+    missing = [item["content"] for item in items if item.get("vector") is None]
+    computed = iter(embed(missing) if missing else [])
+    return [item["vector"] if item.get("vector") is not None else next(computed) for item in items]
 
 
 class MemoryStore(ABC):
+    # Nombre en los hits de `search` (la clave del store en LongTermMemory)
+    name = "memory"
+    # True si `search` usa el vector de la consulta (si no, no hace falta calcularlo)
+    vector_search = False
+
     @abstractmethod
     def add(self, id: str, content: str, metadata: Optional[Dict] = None) -> None:
         """Agrega un documento a la memoria"""
@@ -13,6 +53,47 @@ class MemoryStore(ABC):
         """Consulta documentos relevantes dados un texto"""
         pass
 
+    def add_with_vector(self, id: str, content: str, vector: List[float], metadata: Optional[Dict] = None) -> None:
+        """Agrega un documento con su embedding ya calculado; por defecto ignora el vector"""
+        self.add(id, content, metadata)
+
+    def add_many(self, items: List[MemoryItem]) -> None:
+        """
+        Agrega varios documentos. Por defecto uno a uno; cada backend lo sobreescribe con
+        su camino masivo (una sola ida y vuelta o pocas, embeddings en una sola llamada).
+        """
+        for item in items:
+            if item.get("vector") is not None:
+                self.add_with_vector(item["id"], item["content"], item["vector"], item.get("metadata"))
+            else:
+                self.add(item["id"], item["content"], item.get("metadata"))
+
+    def query_by_vector(self, vector: List[float], n_results: int = 5, query_text: Optional[str] = None) -> List[str]:
+        """Consulta por un embedding ya calculado; por defecto cae a la búsqueda por texto"""
+        if query_text is None:
+            raise NotImplementedError(
+                f"{type(self).__name__} no soporta búsqueda por vector sin texto.")
+        return self.query(query_text, n_results)
+
+    def search(self, query_text: str, n_results: int = 5, vector: Optional[List[float]] = None) -> List[ScoredHit]:
+        """
+        Consulta con puntuación: cada hit lleva id, texto, score y store. Con `vector` los
+        stores vectoriales no recalculan el embedding; los léxicos lo ignoran. Por defecto
+        envuelve `query`/`query_by_vector` y puntúa por posición.
+        """
+        if vector is not None:
+            texts = self.query_by_vector(vector, n_results, query_text=query_text)
+        else:
+            texts = self.query(query_text, n_results)
+        return hits_from_texts(texts, self.name)
+
+    def search_by_metadata(self, key: str, value: str, n_results: Optional[int] = None) -> List[str]:
+        """
+        Documentos cuyo campo de metadata `key` vale `value`; todos, o como mucho
+        `n_results`. Lo implementan los backends que indexan la metadata.
+        """
+        raise NotImplementedError(f"{type(self).__name__} no soporta búsqueda por metadata.")
+
     @abstractmethod
     def get_stats(self) -> Dict:
         """Retorna estadísticas de la memoria"""
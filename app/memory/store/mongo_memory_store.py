@@ -1,11 +1,15 @@
-from pymongo import MongoClient
 from typing import Optional, Dict, List
 import os
+import logging
 from dotenv import load_dotenv
-from .memory_store_interface import MemoryStore
+from .memory_store_interface import MemoryStore, MemoryItem, ScoredHit
+
+logger = logging.getLogger(__name__)
 
 
 class MongoMemoryStore(MemoryStore):
+    name = "mongo"
+
     def __init__(
         self,
         db_name: Optional[str] = None,
@@ -13,10 +17,14 @@ class MongoMemoryStore(MemoryStore):
         host: Optional[str] = None,
         port: Optional[int] = None,
         username: Optional[str] = None,
-        password: Optional[str] = None
+        password: Optional[str] = None,
+        metadata_index_fields: Optional[List[str]] = None
     ):
         """
-        Inicializa la conexión a MongoDB.
+        Inicializa la conexión a MongoDB y crea los índices que falten.
+
+        `metadata_index_fields` (o MONGO_METADATA_INDEX, separados por comas) son los
+        campos de metadata del índice compuesto que usa `search_by_metadata`.
         """
         load_dotenv()
 
@@ -27,15 +35,44 @@ class MongoMemoryStore(MemoryStore):
         port = port or int(os.getenv("MONGO_PORT", 27017))
         username = username or os.getenv("MONGO_USERNAME")
         password = password or os.getenv("MONGO_PASSWORD")
+        timeout_ms = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
 
+        from pymongo import MongoClient
         if username and password:
             uri = f"mongodb://{username}:{password}@{host}:{port}/"
-            self.client = MongoClient(uri)
+            self.client = MongoClient(uri, serverSelectionTimeoutMS=timeout_ms)
         else:
-            self.client = MongoClient(f"mongodb://{host}:{port}/")
+            self.client = MongoClient(f"mongodb://{host}:{port}/", serverSelectionTimeoutMS=timeout_ms)
+        # MongoClient connects lazily; ping so an unreachable server fails here, not on first query
+        self.client.admin.command("ping")
 
         self.db = self.client[db_name]
         self.collection = self.db[collection_name]
+        fields = metadata_index_fields or os.getenv("MONGO_METADATA_INDEX", "source,created_at").split(",")
+        self.metadata_index_fields = [field.strip() for field in fields if field.strip()]
+        self.ensure_indexes()
+
+    def ensure_indexes(self) -> None:
+        """
+        Crea (si no existen) el índice de texto sobre `content`, el único sobre `id` y el
+        compuesto de metadata. create_index no hace nada si el índice ya existe.
+        """
+        from pymongo import ASCENDING, TEXT
+        from pymongo.errors import OperationFailure
+
+        # language "none": sin stemming ni stop words, los mensajes mezclan español e inglés
+        self.collection.create_index(
+            [("content", TEXT)], name="content_text", default_language="none")
+        try:
+            self.collection.create_index([("id", ASCENDING)], name="id_unique", unique=True)
+        except OperationFailure as e:
+            # Colecciones antiguas pueden tener ids repetidos: se sigue sin la restricción
+            logger.warning(f"No se pudo crear el índice único sobre 'id' en MongoDB: {e}")
+            self.collection.create_index([("id", ASCENDING)], name="id")
+        if self.metadata_index_fields:
+            self.collection.create_index(
+                [(f"metadata.{field}", ASCENDING) for field in self.metadata_index_fields],
+                name="metadata_" + "_".join(self.metadata_index_fields))
 
     def add(self, id: str, content: str, metadata: Optional[Dict] = None) -> None:
         self.collection.insert_one({
@@ -44,17 +81,69 @@ class MongoMemoryStore(MemoryStore):
             "metadata": metadata or {}
         })
 
+    def add_many(self, items: List[MemoryItem]) -> None:
+        """
+        Inserta todos los documentos con un solo insert_many no ordenado: un duplicado no
+        detiene al resto.
+        """
+        if not items:
+            return
+        from pymongo.errors import BulkWriteError
+        try:
+            self.collection.insert_many([
+                {"id": item["id"], "content": item["content"], "metadata": item.get("metadata") or {}}
+                for item in items
+            ], ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+            logger.warning(f"{len(errors)} documentos duplicados ignorados en MongoDB.")
+
+    @staticmethod
+    def _search_terms(query_text: str) -> str:
+        # En $search las comillas abren frases y un "-" inicial niega el término; el texto
+        # del usuario se busca tal cual, como OR de sus palabras.
+        return " ".join(word.lstrip("-") for word in query_text.replace('"', " ").split())
+
     def query(self, query_text: str, n_results: int = 5) -> List[str]:
+        """
+        Búsqueda con el índice de texto, ordenada por textScore.
+        """
+        return [hit["text"] for hit in self.search(query_text, n_results)]
+
+    def search(self, query_text: str, n_results: int = 5, vector: Optional[List[float]] = None) -> List[ScoredHit]:
+        """
+        Como `query`, con el id y el textScore de cada documento. Solo se traen `id`,
+        `content` y el score; `vector` se ignora.
+        """
+        terms = self._search_terms(query_text)
+        if not terms:
+            return []
         cursor = self.collection.find(
-            {"content": {"$regex": query_text, "$options": "i"}},
-            {"_id": 0, "content": 1}
-        ).limit(n_results)
+            {"$text": {"$search": terms}},
+            {"_id": 0, "id": 1, "content": 1, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(n_results)
+        return [
+            {"id": doc.get("id"), "text": doc["content"], "score": doc["score"], "source": self.name}
+            for doc in cursor
+        ]
+
+    def search_by_metadata(self, key: str, value: str, n_results: Optional[int] = None) -> List[str]:
+        """
+        Documentos cuyo campo de metadata `key` vale `value`; con el primer campo del
+        índice compuesto la consulta no recorre la colección.
+        """
+        cursor = self.collection.find({f"metadata.{key}": value}, {"_id": 0, "content": 1})
+        if n_results:
+            cursor = cursor.limit(n_results)
         return [doc["content"] for doc in cursor]
 
     def get_stats(self) -> Dict:
+        # Lee los metadatos de la colección en vez de contar documento a documento
         return {
             "collection": self.collection.name,
-            "document_count": self.collection.count_documents({})
+            "document_count": self.collection.estimated_document_count()
         }
 
     def clear(self) -> None:
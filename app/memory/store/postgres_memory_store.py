@@ -1,14 +1,88 @@
-import psycopg2
+from contextlib import contextmanager
 from typing import Optional, Dict, List
+import asyncio
+import csv
+import io
 import json
 import os
+import threading
 from dotenv import load_dotenv
-from .memory_store_interface import MemoryStore  # Suponiendo que MemoryStore está definido en memory/core.py
+from .memory_store_interface import MemoryStore, MemoryItem, ScoredHit  # Suponiendo que MemoryStore está definido en memory/core.py
+
+# Configuración de texto de `content_tsv`: 'simple' no aplica stemming, sirve igual para
+# los mensajes en español y en inglés.
+TS_CONFIG = "simple"
+
+# Migraciones en orden; `schema_version` guarda la última aplicada. Nunca editar una ya
+# publicada: añadir una nueva al final.
+MIGRATIONS = [
+    (1, """
+        CREATE TABLE IF NOT EXISTS documents (
+            id SERIAL PRIMARY KEY,
+            content TEXT,
+            metadata JSONB
+        );
+    """),
+    # Los ids de la app son texto ("msg-N"), no enteros
+    (2, """
+        ALTER TABLE documents ALTER COLUMN id DROP DEFAULT;
+        ALTER TABLE documents ALTER COLUMN id TYPE TEXT USING id::text;
+    """),
+    (3, f"""
+        ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', coalesce(content, ''))) STORED;
+        CREATE INDEX IF NOT EXISTS documents_content_tsv_idx ON documents USING GIN (content_tsv);
+    """),
+]
+
+# Cualquier palabra de la consulta cuenta (OR); ts_rank ordena por relevancia.
+_TSQUERY = f"to_tsquery('{TS_CONFIG}', replace(plainto_tsquery('{TS_CONFIG}', $1)::text, '&', '|'))"
+
+PREPARED_STATEMENTS = {
+    "documents_search": (
+        "(text, int)",
+        f"SELECT id, content, ts_rank(content_tsv, q) AS rank FROM documents, {_TSQUERY} AS q "
+        f"WHERE content_tsv @@ q ORDER BY rank DESC LIMIT $2"
+    ),
+    "documents_search_all": (
+        "(text)",
+        f"SELECT content FROM documents, {_TSQUERY} AS q "
+        f"WHERE content_tsv @@ q ORDER BY ts_rank(content_tsv, q) DESC"
+    ),
+    "documents_insert": (
+        "(text, text, jsonb)",
+        "INSERT INTO documents (id, content, metadata) VALUES ($1, $2, $3)"
+    ),
+}
+
+
+_prepared_connection_class = None
+
+
+def _prepared_connection_factory():
+    """
+    Conexión de psycopg2 con un flag `prepared`: los PREPARE viven en la sesión del
+    servidor, así que el estado va con el objeto conexión (una sesión física) y
+    desaparece con ella.
+    """
+    global _prepared_connection_class
+    if _prepared_connection_class is None:
+        from psycopg2.extensions import connection
+
+        class PreparedConnection(connection):
+            prepared = False
+
+        _prepared_connection_class = PreparedConnection
+    return _prepared_connection_class
+
 
 class PostgresMemoryStore(MemoryStore):
-    def __init__(self, db_name: str = None, user: str = None, password: str = None, host: str = None, port: str = None):
+    name = "postgres"
+
+    def __init__(self, db_name: str = None, user: str = None, password: str = None, host: str = None, port: str = None,
+                 options: str = None):
         """
-        Inicializa la conexión a la base de datos PostgreSQL.
+        Inicializa el pool de conexiones a PostgreSQL y aplica las migraciones pendientes.
 
         Parámetros:
         - db_name: Nombre de la base de datos.
@@ -16,17 +90,111 @@ class PostgresMemoryStore(MemoryStore):
         - password: Contraseña del usuario.
         - host: Dirección del host donde está la base de datos (por defecto 'localhost').
         - port: Puerto de conexión (por defecto '5432').
+        - options: Opciones de libpq (p. ej. "-c search_path=otro_esquema").
+
+        Cada operación toma una conexión del pool (POSTGRES_POOL_MIN / POSTGRES_POOL_MAX),
+        así las peticiones concurrentes no comparten cursor. psycopg2 cierra al devolverla
+        cualquier conexión por encima de `minconn`, perdiendo sesión y PREPARE: por eso
+        POSTGRES_POOL_MIN vale por defecto lo mismo que POSTGRES_POOL_MAX.
         """
         load_dotenv()
-        db_name = db_name or os.getenv("POSTGRES_DB_NAME")
-        user = user or os.getenv("POSTGRES_USER")
-        password = password or os.getenv("POSTGRES_PASSWORD")
-        host = host or os.getenv("POSTGRES_HOST", "localhost")
-        port = port or os.getenv("POSTGRES_PORT", "5432")
-        self.connection = psycopg2.connect(
-            dbname=db_name, user=user, password=password, host=host, port=port
-        )
-        self.cursor = self.connection.cursor()
+        self.connect_kwargs = {
+            "dbname": db_name or os.getenv("POSTGRES_DB_NAME"),
+            "user": user or os.getenv("POSTGRES_USER"),
+            "password": password or os.getenv("POSTGRES_PASSWORD"),
+            "host": host or os.getenv("POSTGRES_HOST", "localhost"),
+            "port": port or os.getenv("POSTGRES_PORT", "5432"),
+            "connect_timeout": int(os.getenv("POSTGRES_CONNECT_TIMEOUT", "5")),
+        }
+        if options:
+            self.connect_kwargs["options"] = options
+        self.pool_max = int(os.getenv("POSTGRES_POOL_MAX", "10"))
+        self.pool_min = min(int(os.getenv("POSTGRES_POOL_MIN", str(self.pool_max))), self.pool_max)
+        # A partir de cuántos documentos add_many usa COPY en vez de INSERT ... VALUES
+        self.copy_threshold = int(os.getenv("POSTGRES_COPY_THRESHOLD", "5000"))
+
+        from psycopg2.pool import ThreadedConnectionPool
+        self.pool = ThreadedConnectionPool(
+            self.pool_min, self.pool_max, connection_factory=_prepared_connection_factory(), **self.connect_kwargs)
+        # getconn() falla en vez de esperar cuando el pool está agotado: el semáforo hace esperar
+        self._slots = threading.BoundedSemaphore(self.pool_max)
+        # Pool asyncpg, creado en el primer uso dentro del event loop
+        self._async_pool = None
+        self._async_pool_lock = None
+
+        self.migrate()
+
+    # --- Conexiones ---
+
+    @contextmanager
+    def _connection(self):
+        """
+        Presta una conexión del pool: commit al salir, rollback si hubo error.
+        """
+        with self._slots:
+            connection = self.pool.getconn()
+            try:
+                yield connection
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                self.pool.putconn(connection)
+
+    def _ensure_prepared(self, connection, cursor) -> None:
+        # Los PREPARE viven en la sesión del servidor: una vez por conexión física.
+        # Solo el hilo que tiene prestada la conexión la toca, no hace falta lock.
+        if connection.prepared:
+            return
+        for name, (types, statement) in PREPARED_STATEMENTS.items():
+            cursor.execute(f"PREPARE {name} {types} AS {statement}")
+        connection.prepared = True
+
+    def _execute_prepared(self, name: str, params: tuple, fetch: bool = True) -> List[tuple]:
+        from psycopg2 import errors
+        placeholders = ", ".join(["%s"] * len(params))
+        for attempt in range(2):
+            try:
+                with self._connection() as connection:
+                    with connection.cursor() as cursor:
+                        self._ensure_prepared(connection, cursor)
+                        try:
+                            cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+                        except errors.InvalidSqlStatementName:
+                            # La sesión perdió los PREPARE (DISCARD ALL, pgbouncer...): se
+                            # marca antes de devolver la conexión al pool
+                            connection.prepared = False
+                            raise
+                        return cursor.fetchall() if fetch else []
+            except errors.InvalidSqlStatementName:
+                if attempt:
+                    raise
+
+    def migrate(self) -> None:
+        """
+        Aplica en orden las migraciones que falten. Un advisory lock evita que dos
+        procesos que arrancan a la vez las apliquen dos veces.
+        """
+        with self._connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('documents_schema'))")
+                cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+                cursor.execute("SELECT max(version) FROM schema_version")
+                current = cursor.fetchone()[0] or 0
+                for version, statement in MIGRATIONS:
+                    if version > current:
+                        cursor.execute(statement)
+                        cursor.execute("INSERT INTO schema_version (version) VALUES (%s)", (version,))
+                        print(f"[INFO] Migración de PostgreSQL aplicada: v{version}")
+
+    def create_table(self):
+        """
+        Crea o actualiza la tabla 'documents'. Se mantiene por compatibilidad: equivale a `migrate()`.
+        """
+        self.migrate()
+
+    # --- Operaciones ---
 
     def add(self, id: str, content: str, metadata: Optional[Dict] = None) -> None:
         """
@@ -38,24 +206,53 @@ class PostgresMemoryStore(MemoryStore):
         - metadata: Diccionario con información adicional del documento (opcional).
         """
         metadata_json = json.dumps(metadata) if metadata else None
-        query = "INSERT INTO documents (id, content, metadata) VALUES (%s, %s, %s)"
-        self.cursor.execute(query, (id, content, metadata_json))
-        self.connection.commit()
+        self._execute_prepared("documents_insert", (id, content, metadata_json), fetch=False)
+
+    def add_many(self, items: List[MemoryItem]) -> None:
+        """
+        Agrega varios documentos en una sola transacción: INSERT con muchas filas por
+        sentencia (execute_values) o, desde `copy_threshold` documentos, COPY.
+        """
+        if not items:
+            return
+        rows = [
+            (item["id"], item["content"], json.dumps(item["metadata"]) if item.get("metadata") else None)
+            for item in items
+        ]
+        with self._connection() as connection:
+            with connection.cursor() as cursor:
+                if len(rows) >= self.copy_threshold:
+                    buffer = io.StringIO()
+                    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+                    buffer.seek(0)
+                    # Todo va entre comillas ("" = texto vacío); FORCE_NULL convierte la metadata vacía en NULL
+                    cursor.copy_expert(
+                        "COPY documents (id, content, metadata) FROM STDIN WITH (FORMAT csv, FORCE_NULL (metadata))",
+                        buffer)
+                else:
+                    from psycopg2.extras import execute_values
+                    execute_values(
+                        cursor, "INSERT INTO documents (id, content, metadata) VALUES %s", rows, page_size=1000)
 
     def query(self, query_text: str, n_results: int = 5) -> List[str]:
         """
-        Realiza una búsqueda en los documentos de la base de datos.
+        Búsqueda de texto completo sobre `content_tsv` (índice GIN), ordenada por ts_rank.
 
         Parámetros:
-        - query_text: Texto de búsqueda dentro del contenido de los documentos.
+        - query_text: Texto de búsqueda; basta con que coincida alguna de sus palabras.
         - n_results: Número de resultados a devolver (por defecto 5).
 
         Retorna:
-        - Una lista con los contenidos de los documentos que coinciden con la búsqueda.
+        - Una lista con los contenidos de los documentos más relevantes.
         """
-        query = "SELECT content FROM documents WHERE content LIKE %s LIMIT %s"
-        self.cursor.execute(query, (f"%{query_text}%", n_results))
-        return [row[0] for row in self.cursor.fetchall()]
+        return [hit["text"] for hit in self.search(query_text, n_results)]
+
+    def search(self, query_text: str, n_results: int = 5, vector: Optional[List[float]] = None) -> List[ScoredHit]:
+        """
+        Como `query`, con el id y el ts_rank de cada documento. `vector` se ignora.
+        """
+        rows = self._execute_prepared("documents_search", (query_text, n_results))
+        return [{"id": id, "text": content, "score": float(rank), "source": self.name} for id, content, rank in rows]
 
     def get_stats(self) -> Dict:
         """
@@ -64,32 +261,19 @@ class PostgresMemoryStore(MemoryStore):
         Retorna:
         - Un diccionario con estadísticas sobre la base de datos.
         """
-        query = "SELECT count(*) FROM documents"
-        self.cursor.execute(query)
-        count = self.cursor.fetchone()[0]
+        with self._connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT count(*) FROM documents")
+                count = cursor.fetchone()[0]
         return {"total_documents": count}
 
     def clear(self) -> None:
         """
         Borra todos los documentos de la base de datos.
         """
-        self.cursor.execute("DELETE FROM documents")
-        self.connection.commit()
-
-    def create_table(self):
-        """
-        Crea la tabla 'documents' si no existe.
-
-        Esto incluye las columnas 'id', 'content' y 'metadata'.
-        """
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS documents (
-                id SERIAL PRIMARY KEY,
-                content TEXT,
-                metadata JSONB
-            );
-        """)
-        self.connection.commit()
+        with self._connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("DELETE FROM documents")
 
     def update_metadata(self, id: str, new_metadata: Dict) -> None:
         """
@@ -100,12 +284,13 @@ class PostgresMemoryStore(MemoryStore):
         - new_metadata: Nuevos metadatos para el documento.
         """
         metadata_json = json.dumps(new_metadata)
-        self.cursor.execute("UPDATE documents SET metadata = %s WHERE id = %s", (metadata_json, id))
-        self.connection.commit()
+        with self._connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("UPDATE documents SET metadata = %s WHERE id = %s", (metadata_json, id))
 
     def search_in_all_tables(self, search_term: str) -> List[str]:
         """
-        Realiza una búsqueda en toda la base de datos (no solo en una tabla).
+        Búsqueda de texto completo sin límite de resultados, ordenada por relevancia.
 
         Parámetros:
         - search_term: Texto para buscar en todos los documentos.
@@ -113,6 +298,60 @@ class PostgresMemoryStore(MemoryStore):
         Retorna:
         - Una lista con los contenidos de los documentos que coinciden con la búsqueda.
         """
-        query = f"SELECT content FROM documents WHERE content LIKE %s"
-        self.cursor.execute(query, (f"%{search_term}%",))
-        return [row[0] for row in self.cursor.fetchall()]
+        rows = self._execute_prepared("documents_search_all", (search_term,))
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        """
+        Cierra todas las conexiones del pool.
+        """
+        self.pool.closeall()
+
+    # --- Camino async (asyncpg) ---
+
+    async def _get_async_pool(self):
+        """
+        Pool asyncpg del event loop actual, o None si asyncpg no está instalado.
+        asyncpg prepara y cachea cada sentencia por conexión.
+        """
+        if self._async_pool is None:
+            try:
+                import asyncpg
+            except ImportError:
+                return None
+            if self._async_pool_lock is None:
+                self._async_pool_lock = asyncio.Lock()
+            async with self._async_pool_lock:
+                if self._async_pool is None:
+                    kwargs = self.connect_kwargs
+                    self._async_pool = await asyncpg.create_pool(
+                        database=kwargs["dbname"], user=kwargs["user"], password=kwargs["password"],
+                        host=kwargs["host"], port=int(kwargs["port"]), timeout=kwargs["connect_timeout"],
+                        min_size=self.pool_min, max_size=self.pool_max,
+                    )
+        return self._async_pool
+
+    async def query_async(self, query_text: str, n_results: int = 5) -> List[str]:
+        """
+        Igual que `query`, sin bloquear el event loop. Sin asyncpg usa el pool síncrono en un hilo.
+        """
+        pool = await self._get_async_pool()
+        if pool is None:
+            from app.utils.utils import run_blocking
+            return await run_blocking(self.query, query_text, n_results)
+        _, statement = PREPARED_STATEMENTS["documents_search"]
+        rows = await pool.fetch(statement, query_text, n_results)
+        return [row["content"] for row in rows]
+
+    async def add_async(self, id: str, content: str, metadata: Optional[Dict] = None) -> None:
+        pool = await self._get_async_pool()
+        if pool is None:
+            from app.utils.utils import run_blocking
+            return await run_blocking(self.add, id, content, metadata)
+        _, statement = PREPARED_STATEMENTS["documents_insert"]
+        await pool.execute(statement, id, content, json.dumps(metadata) if metadata else None)
+
+    async def aclose(self) -> None:
+        if self._async_pool is not None:
+            await self._async_pool.close()
+            self._async_pool = None
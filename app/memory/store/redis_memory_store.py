@@ -1,59 +1,178 @@
-import redis
-import pickle
-from typing import Optional, Dict, List
-from memory_store_interface import MemoryStore  # Asegúrate de que MemoryStore esté importado desde el lugar adecuado
+import json
+import math
+import os
+import re
+import uuid
+from typing import Optional, Dict, List, Iterable
+from .memory_store_interface import MemoryStore, MemoryItem, ScoredHit
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokens únicos en minúsculas de `text`; se ignoran los de un solo carácter.
+    """
+    return list(dict.fromkeys(token for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1))
+
 
 class RedisMemoryStore(MemoryStore):
-    def __init__(self, host='localhost', port=6379):
+    name = "redis"
+
+    def __init__(self, host: str = None, port: int = None, db: int = None, namespace: str = None, client=None):
         """
         Inicializa la conexión a Redis.
 
         Parámetros:
-        - host: Dirección del servidor Redis (por defecto 'localhost').
-        - port: Puerto del servidor Redis (por defecto 6379).
+        - host: Dirección del servidor Redis (REDIS_HOST, por defecto 'localhost').
+        - port: Puerto del servidor Redis (REDIS_PORT, por defecto 6379).
+        - db: Base de datos de Redis (REDIS_DB, por defecto 0).
+        - namespace: Prefijo de todas las claves (REDIS_NAMESPACE, por defecto 'memory').
+        - client: Cliente ya creado (tests, benchmarks).
+
+        Claves bajo `<namespace>:`:
+        - doc:<id>: documento en JSON compacto {"c": contenido, "m": metadata}.
+        - ids: set con todos los ids.
+        - tok:<token>: set de ids cuyo contenido tiene el token (índice invertido).
+        - meta:<campo>:<valor>: set de ids con ese valor de metadata.
         """
-        self.client = redis.StrictRedis(host=host, port=port, db=0)
+        if client is None:
+            import redis
+            client = redis.Redis(
+                host=host or os.getenv("REDIS_HOST", "localhost"),
+                port=port or int(os.getenv("REDIS_PORT", "6379")),
+                db=db if db is not None else int(os.getenv("REDIS_DB", "0")),
+            )
+        self.client = client
+        self.namespace = namespace or os.getenv("REDIS_NAMESPACE", "memory")
+
+    # --- Claves y serialización ---
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.namespace,) + parts)
+
+    @staticmethod
+    def _dumps(content: str, metadata: Optional[Dict]) -> str:
+        return json.dumps({"c": content, "m": metadata or {}}, ensure_ascii=False, separators=(",", ":"))
+
+    @staticmethod
+    def _loads(raw) -> Dict:
+        return json.loads(raw)
+
+    def _index_commands(self, pipeline, method: str, id: str, content: str, metadata: Optional[Dict]) -> None:
+        # method: "sadd" para indexar, "srem" para desindexar
+        for token in tokenize(content):
+            getattr(pipeline, method)(self._key("tok", token), id)
+        for field, value in (metadata or {}).items():
+            getattr(pipeline, method)(self._key("meta", str(field), str(value)), id)
+
+    # --- Escritura ---
 
     def add(self, id: str, content: str, metadata: Optional[Dict] = None) -> None:
         """
-        Almacena el contenido y los metadatos en Redis usando pickle.
+        Almacena el documento e indexa sus tokens y su metadata.
 
         Parámetros:
         - id: Identificador único del documento.
         - content: El contenido del documento.
         - metadata: Metadatos adicionales opcionales.
         """
-        data = {"content": content, "metadata": metadata}
-        self.client.set(id, pickle.dumps(data))  # Serializa el diccionario con pickle
+        self.add_many([{"id": id, "content": content, "metadata": metadata}])
 
-        # Agregar un índice en el campo "metadata" para búsquedas complejas por metadatos
-        if metadata:
-            for key, value in metadata.items():
-                self.client.sadd(f"metadata:{key}:{value}", id)
+    def add_many(self, items: List[MemoryItem]) -> None:
+        """
+        Agrega varios documentos en dos idas y vueltas: un MGET de las versiones previas
+        (para desindexar lo que se sobrescribe) y un pipeline con todas las escrituras.
+        Un id repetido en el lote se queda con su última versión.
+        """
+        if not items:
+            return
+        # Las versiones previas se leen antes del pipeline: con ids repetidos, las
+        # intermedias nunca se desindexarían
+        items = list({item["id"]: item for item in items}.values())
+        previous = self.client.mget([self._key("doc", item["id"]) for item in items])
+        pipeline = self.client.pipeline(transaction=False)
+        for item, old in zip(items, previous):
+            if old is not None:
+                old = self._loads(old)
+                self._index_commands(pipeline, "srem", item["id"], old["c"], old["m"])
+            pipeline.set(self._key("doc", item["id"]), self._dumps(item["content"], item.get("metadata")))
+            pipeline.sadd(self._key("ids"), item["id"])
+            self._index_commands(pipeline, "sadd", item["id"], item["content"], item.get("metadata"))
+        pipeline.execute()
+
+    def delete(self, id: str) -> None:
+        raw = self.client.get(self._key("doc", id))
+        if raw is None:
+            return
+        old = self._loads(raw)
+        pipeline = self.client.pipeline(transaction=False)
+        self._index_commands(pipeline, "srem", id, old["c"], old["m"])
+        pipeline.delete(self._key("doc", id))
+        pipeline.srem(self._key("ids"), id)
+        pipeline.execute()
+
+    # --- Lectura ---
+
+    def _fetch(self, ids: Iterable) -> List[str]:
+        ids = [id.decode() if isinstance(id, bytes) else id for id in ids]
+        if not ids:
+            return []
+        raws = self.client.mget([self._key("doc", id) for id in ids])
+        return [self._loads(raw)["c"] for raw in raws if raw is not None]
 
     def query(self, query_text: str, n_results: int = 5) -> List[str]:
         """
-        Busca en los documentos almacenados en Redis usando el texto de consulta.
-        También puede buscar en metadatos si es necesario.
+        Busca en el índice invertido los documentos que comparten tokens con la consulta,
+        ordenados por la suma de IDF de los tokens que coinciden. El coste depende de
+        cuántos documentos coinciden, no del tamaño de la base.
 
         Parámetros:
-        - query_text: Término de búsqueda dentro del contenido del documento.
+        - query_text: Texto de la consulta.
         - n_results: Número de resultados a devolver (por defecto 5).
 
         Retorna:
-        - Lista de resultados de contenido que coinciden con la búsqueda.
+        - Lista de contenidos, del más al menos relevante.
         """
-        keys = self.client.keys(f"*{query_text}*")  # Buscar todas las claves que contengan el texto de la consulta
-        results = []
-        for key in keys:
-            data = pickle.loads(self.client.get(key))
-            if query_text in data['content']:
-                results.append(data['content'])
-                if len(results) >= n_results:
-                    break
-        return results
+        return [hit["text"] for hit in self.search(query_text, n_results)]
 
-    def search_by_metadata(self, key: str, value: str) -> List[str]:
+    def search(self, query_text: str, n_results: int = 5, vector: Optional[List[float]] = None) -> List[ScoredHit]:
+        """
+        Como `query`, con el id y la suma de IDF de cada documento. `vector` se ignora.
+        """
+        tokens = tokenize(query_text)
+        if not tokens:
+            return []
+        token_keys = [self._key("tok", token) for token in tokens]
+
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.scard(self._key("ids"))
+        for key in token_keys:
+            pipeline.scard(key)
+        total, *frequencies = pipeline.execute()
+
+        weights = {
+            key: math.log(1 + total / frequency)
+            for key, frequency in zip(token_keys, frequencies) if frequency
+        }
+        if not weights:
+            return []
+
+        # Unión ponderada en el servidor: solo viajan los n mejores ids
+        scratch = self._key("tmp", uuid.uuid4().hex)
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.zunionstore(scratch, weights)
+        pipeline.zrevrange(scratch, 0, n_results - 1, withscores=True)
+        pipeline.delete(scratch)
+        _, scored, _ = pipeline.execute()
+        ids = [id.decode() if isinstance(id, bytes) else id for id, _ in scored]
+        raws = self.client.mget([self._key("doc", id) for id in ids]) if ids else []
+        return [
+            {"id": id, "text": self._loads(raw)["c"], "score": score, "source": self.name}
+            for (id, raw), (_, score) in zip(zip(ids, raws), scored) if raw is not None
+        ]
+
+    def search_by_metadata(self, key: str, value: str, n_results: Optional[int] = None) -> List[str]:
         """
         Realiza una búsqueda en los documentos basada en metadatos (por ejemplo, buscando todos los
         documentos que tengan un valor específico en un campo 'metadata').
@@ -61,25 +180,46 @@ class RedisMemoryStore(MemoryStore):
         Parámetros:
         - key: El campo del metadato que estamos buscando (ej: "author").
         - value: El valor que debe tener ese campo de metadatos (ej: "Sebas").
+        - n_results: Máximo de documentos (todos si es None); con límite solo se leen esos ids del set.
 
         Retorna:
         - Lista de contenidos que coinciden con la búsqueda.
         """
-        ids = self.client.smembers(f"metadata:{key}:{value}")
-        return [pickle.loads(self.client.get(id))['content'] for id in ids]
+        key = self._key("meta", str(key), str(value))
+        ids = self.client.srandmember(key, n_results) if n_results else self.client.smembers(key)
+        return self._fetch(ids)
 
     def get_stats(self) -> Dict:
         """
         Obtiene estadísticas sobre la memoria de Redis.
 
         Retorna:
-        - Diccionario con el número total de entradas en Redis.
+        - Documentos de este namespace (SCARD) y claves de toda la base (DBSIZE).
+        """
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.scard(self._key("ids"))
+        pipeline.dbsize()
+        documents, db_size = pipeline.execute()
+        return {"total_entries": documents, "namespace": self.namespace, "db_size": db_size}
+
+    # --- Mantenimiento ---
+
+    def scan_keys(self, pattern: str = "*", count: int = 1000):
+        """
+        Claves del namespace que coinciden con `pattern`, con SCAN (no bloquea el servidor como KEYS).
         """
-        keys = self.client.keys('*')  # Obtiene todas las claves
-        return {"total_entries": len(keys)}
+        return self.client.scan_iter(match=self._key(pattern), count=count)
 
     def clear(self) -> None:
         """
-        Borra todos los documentos de Redis.
+        Borra todas las claves de este namespace, por lotes con SCAN + UNLINK; el resto
+        de la base no se toca.
         """
-        self.client.flushdb()  # Elimina todas las claves de la base de datos actual
+        batch = []
+        for key in self.scan_keys():
+            batch.append(key)
+            if len(batch) >= 1000:
+                self.client.unlink(*batch)
+                batch = []
+        if batch:
+            self.client.unlink(*batch)
@@ -3,10 +3,9 @@ import logging
 import atexit
 from typing import List, Dict, Optional
 
-import weaviate
 from dotenv import load_dotenv
 from app.llm_clients.llm_router import get_embedding_function
-from .memory_store_interface import MemoryStore
+from .memory_store_interface import MemoryStore, MemoryItem, ScoredHit, vectors_for
 
 # Cargar variables de entorno
 load_dotenv()
@@ -15,6 +14,9 @@ logger = logging.getLogger(__name__)
 
 
 class WeaviateMemoryStore(MemoryStore):
+    name = "weaviate"
+    vector_search = True
+
     def __init__(
         self,
         context_name: str = "default_context",
@@ -28,6 +30,7 @@ class WeaviateMemoryStore(MemoryStore):
         port = port or os.getenv("WEAVIATE_PORT", "8080")
         self.class_name = self._format_class_name(context_name)
         self.embedding_fn = get_embedding_function()
+        import weaviate
         self.client = weaviate.Client(url=f"http://{host}:{port}")
 
         self._ensure_class_exists()
@@ -64,6 +67,7 @@ class WeaviateMemoryStore(MemoryStore):
                 {"name": "metadata", "dataType": ["text"]}
             ]
         }
+        import weaviate
         try:
             self.client.schema.create_class(schema)
             logger.info(
@@ -80,7 +84,17 @@ class WeaviateMemoryStore(MemoryStore):
         Agrega un objeto con embedding a Weaviate.
         """
         try:
-            vector = self.embedding_fn(content)
+            vector = self.embedding_fn([content])[0]
+        except Exception as e:
+            logger.error(f"No se pudo calcular el embedding para Weaviate: {e}")
+            return
+        self.add_with_vector(id, content, vector, metadata)
+
+    def add_with_vector(self, id: str, content: str, vector: List[float], metadata: Optional[Dict] = None) -> None:
+        """
+        Agrega un objeto cuyo embedding ya fue calculado.
+        """
+        try:
             obj = {
                 "content": content,
                 "metadata": str(metadata or {})
@@ -94,19 +108,71 @@ class WeaviateMemoryStore(MemoryStore):
         except Exception as e:
             logger.error(f"No se pudo agregar el objeto a Weaviate: {e}")
 
+    def add_many(self, items: List[MemoryItem]) -> None:
+        """
+        Agrega muchos objetos con el batch de Weaviate; los embeddings que faltan se
+        calculan en una sola llamada.
+        """
+        if not items:
+            return
+        try:
+            vectors = vectors_for(items, self.embedding_fn)
+        except Exception as e:
+            logger.error(f"No se pudo calcular el embedding para Weaviate: {e}")
+            return
+        try:
+            self.client.batch.configure(batch_size=int(os.getenv("WEAVIATE_BATCH_SIZE", "100")))
+            with self.client.batch as batch:
+                for item, vector in zip(items, vectors):
+                    batch.add_data_object(
+                        data_object={
+                            "content": item["content"],
+                            "metadata": str(item.get("metadata") or {})
+                        },
+                        class_name=self.class_name,
+                        uuid=item["id"],
+                        vector=vector
+                    )
+        except Exception as e:
+            logger.error(f"No se pudieron agregar los objetos a Weaviate: {e}")
+
     def query(self, query_text: str, n_results: int = 5) -> List[str]:
         """
         Realiza una búsqueda por similitud vectorial.
         """
         try:
-            vector = self.embedding_fn(query_text)
+            vector = self.embedding_fn([query_text])[0]
+        except Exception as e:
+            logger.error(f"Error al consultar Weaviate: {e}")
+            return []
+        return self.query_by_vector(vector, n_results)
+
+    def query_by_vector(self, vector: List[float], n_results: int = 5, query_text: Optional[str] = None) -> List[str]:
+        """
+        Búsqueda por similitud con un embedding ya calculado.
+        """
+        return [hit["text"] for hit in self.search(query_text, n_results, vector=vector)]
+
+    def search(self, query_text: str, n_results: int = 5, vector: Optional[List[float]] = None) -> List[ScoredHit]:
+        """
+        Búsqueda por similitud con el id y la distancia de cada objeto (score = -distancia).
+        Solo calcula el embedding si no se pasa `vector`.
+        """
+        try:
+            if vector is None:
+                vector = self.embedding_fn([query_text])[0]
             result = self.client.query.get(
                 self.class_name,
                 ["content"]
-            ).with_vector(vector).with_limit(n_results).do()
+            ).with_near_vector({"vector": vector}).with_additional(["id", "distance"]).with_limit(n_results).do()
 
             return [
-                item["content"]
+                {
+                    "id": item["_additional"]["id"],
+                    "text": item["content"],
+                    "score": -item["_additional"]["distance"],
+                    "source": self.name,
+                }
                 for item in result.get("data", {}).get("Get", {}).get(self.class_name, [])
             ]
         except Exception as e:
@@ -0,0 +1,59 @@
+import fakeredis
+
+from app.memory.store.redis_memory_store import RedisMemoryStore, tokenize
+
+
+def make_store(client=None, namespace="memory"):
+    return RedisMemoryStore(client=client or fakeredis.FakeRedis(), namespace=namespace)
+
+
+def test_tokenize_dedupes_lowercases_and_drops_single_chars():
+    assert tokenize("Memoria, memoria y Redis") == ["memoria", "redis"]
+
+
+def test_query_ranks_rare_tokens_higher():
+    store = make_store()
+    store.add_many([
+        {"id": "a", "content": "memoria vector"},
+        {"id": "b", "content": "memoria redis"},
+        {"id": "c", "content": "memoria python"},
+    ])
+    assert store.query("memoria redis", 5)[0] == "memoria redis"
+    assert sorted(store.query("memoria", 5)) == ["memoria python", "memoria redis", "memoria vector"]
+    assert store.query("memoria", 1) and store.query("inexistente", 5) == []
+    hits = store.search("vector", 5)
+    assert [(h["id"], h["source"]) for h in hits] == [("a", "redis")] and hits[0]["score"] > 0
+
+
+def test_overwrite_and_delete_remove_old_tokens_and_metadata():
+    store = make_store()
+    store.add("a", "alpha", {"source": "chat"})
+    store.add("a", "beta", {"source": "web"})
+    assert store.query("alpha", 5) == [] and store.query("beta", 5) == ["beta"]
+    assert store.search_by_metadata("source", "chat") == []
+    assert store.search_by_metadata("source", "web") == ["beta"]
+
+    # Same id twice in one batch: the last version wins, the first is never indexed
+    store.add_many([{"id": "d", "content": "gamma"}, {"id": "d", "content": "delta"}])
+    assert store.query("gamma", 5) == [] and store.query("delta", 5) == ["delta"]
+
+    store.delete("a")
+    assert store.query("beta", 5) == [] and store.search_by_metadata("source", "web") == []
+    assert store.get_stats()["total_entries"] == 1
+
+
+def test_search_by_metadata_limits_results():
+    store = make_store()
+    store.add_many([{"id": str(i), "content": f"doc {i}", "metadata": {"source": "chat"}} for i in range(5)])
+    assert len(store.search_by_metadata("source", "chat")) == 5
+    assert len(store.search_by_metadata("source", "chat", n_results=2)) == 2
+
+
+def test_clear_only_touches_its_namespace():
+    client = fakeredis.FakeRedis()
+    store, other = make_store(client), make_store(client, namespace="otro")
+    store.add("a", "memoria compartida")
+    other.add("a", "memoria compartida")
+    store.clear()
+    assert store.query("memoria", 5) == [] and store.get_stats()["total_entries"] == 0
+    assert other.query("memoria", 5) == ["memoria compartida"]
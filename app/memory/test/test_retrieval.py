@@ -0,0 +1,33 @@
+import time
+
+from app.memory.retrieval import reciprocal_rank_fusion, search_concurrently
+
+
+def hit(text, source, score=1.0):
+    return {"id": text, "text": text, "score": score, "source": source}
+
+
+def test_rrf_rewards_agreement_and_dedups_by_text():
+    fused = reciprocal_rank_fusion([
+        [hit("a", "chroma"), hit("b", "chroma")],
+        [hit("B ", "postgres"), hit("c", "postgres")],
+    ], n_results=3, k=60)
+    assert [h["text"] for h in fused] == ["b", "a", "c"]
+    assert fused[0]["source"] == "postgres"  # rank 1 there, rank 2 in chroma
+    assert abs(fused[0]["score"] - (1 / 62 + 1 / 61)) < 1e-12
+
+
+def test_late_and_failing_searches_are_skipped_not_awaited():
+    def slow():
+        time.sleep(1)
+        return [hit("late", "slow")]
+
+    def broken():
+        raise RuntimeError("down")
+
+    start = time.perf_counter()
+    results, skipped = search_concurrently(
+        {"fast": lambda: [hit("x", "fast")], "slow": slow, "broken": broken}, timeout=0.1)
+    assert time.perf_counter() - start < 0.5
+    assert list(results) == ["fast"]
+    assert skipped == {"slow": "timeout", "broken": "down"}
@@ -0,0 +1,26 @@
+import numpy as np
+
+from app.memory.session_index import SessionIndex
+
+
+def test_empty_index_is_never_similar():
+    index = SessionIndex(capacity=4)
+    assert index.max_similarity([1.0, 0.0]) == -1.0
+    assert not index.is_similar([1.0, 0.0], 0.8)
+
+
+def test_max_similarity_is_cosine_of_best_match():
+    index = SessionIndex(capacity=4)
+    index.add([1.0, 0.0])
+    index.add([0.0, 3.0])
+    assert np.isclose(index.max_similarity([0.0, 1.0]), 1.0)
+    assert np.isclose(index.max_similarity([1.0, 1.0]), np.sqrt(0.5))
+
+
+def test_ring_buffer_drops_oldest_when_full():
+    index = SessionIndex(capacity=2)
+    index.add([1.0, 0.0])
+    index.add([0.0, 1.0])
+    index.add([0.0, -1.0])
+    assert len(index) == 2
+    assert not index.is_similar([1.0, 0.0], 0.5)
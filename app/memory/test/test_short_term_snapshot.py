@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from app.memory import snapshot
+from app.memory.short_term_memory import ShortTermMemory
+
+
+class FakeModel:
+    def encode(self, texts):
+        return np.array([[len(text), text.count("a"), text.count("e"), 1.0] for text in texts], dtype=np.float32)
+
+
+def open_memory(path):
+    return ShortTermMemory(dim=4, max_items=10, snapshot_path=str(path), model=FakeModel())
+
+
+def users(memory):
+    return [text.split("\n")[0].removeprefix("Usuario: ") for text in memory.texts]
+
+
+def crash(memory):
+    # The process dies: no final snapshot, the WAL file is just left behind
+    memory._wal.close()
+
+
+def test_crashed_save_is_recovered_once_and_in_order(tmp_path, monkeypatch):
+    memory = open_memory(tmp_path)
+    memory.add_interaction("a", "1")
+    memory.save()
+    memory.add_interaction("e", "2")
+
+    write_snapshot = snapshot.write_snapshot
+    monkeypatch.setattr(snapshot, "write_snapshot", lambda *args, **kwargs: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        memory.save()
+    memory.add_interaction("f", "3")
+    assert memory._wal.entries == 2
+    crash(memory)
+    monkeypatch.setattr(snapshot, "write_snapshot", write_snapshot)
+
+    memory = open_memory(tmp_path)
+    assert users(memory) == ["a", "e", "f"]
+    memory.add_interaction("g", "4")
+    crash(memory)
+
+    memory = open_memory(tmp_path)
+    assert users(memory) == ["a", "e", "f", "g"]
+    memory.add_interaction("h", "5")
+    memory.close()
+
+    memory = open_memory(tmp_path)
+    assert users(memory) == ["a", "e", "f", "g", "h"]
+    memory.close()
@@ -0,0 +1,55 @@
+import numpy as np
+
+from app.memory.store.SQLite_memory_store import SQLiteMemoryStore, fts_query
+
+VOCABULARY = ["memoria", "vector", "redis", "consulta", "python"]
+
+
+def embed(texts):
+    # One dimension per vocabulary word: similar texts share words
+    return [[float(word in text) for word in VOCABULARY] for text in texts]
+
+
+def make_store(tmp_path, **kwargs):
+    return SQLiteMemoryStore(path=str(tmp_path / "ltm.sqlite3"), embedding_fn=embed, **kwargs)
+
+
+def test_fts_query_quotes_tokens_and_drops_syntax():
+    assert fts_query('memoria AND "vector" NEAR(x)') == '"memoria" OR "and" OR "vector" OR "near"'
+    assert fts_query("?!") is None
+
+
+def test_query_ranks_by_bm25_and_upserts_by_id(tmp_path):
+    store = make_store(tmp_path)
+    store.add_many([
+        {"id": "a", "content": "memoria vector memoria", "metadata": {"source": "chat"}},
+        {"id": "b", "content": "redis consulta"},
+        {"id": "c", "content": "python memoria"},
+    ])
+    assert store.query("memoria", 5) == ["memoria vector memoria", "python memoria"]
+    store.add("c", "redis python")
+    assert store.query("memoria", 5) == ["memoria vector memoria"]
+    assert store.search_by_metadata("source", "chat") == ["memoria vector memoria"]
+    assert store.search_by_metadata("source", "chat", n_results=1) == ["memoria vector memoria"]
+    assert store.search_by_metadata("source", "web") == []
+    assert store.get_stats()["total_entries"] == 3
+    hits = store.search("vector", 5)
+    assert [(h["id"], h["source"]) for h in hits] == [("a", "sqlite")] and hits[0]["score"] > 0
+
+
+def test_vector_search_tracks_writes_and_survives_reopen(tmp_path):
+    sidecar = str(tmp_path / "vectors")
+    store = make_store(tmp_path, vector_path=sidecar)
+    store.add_many([{"id": "a", "content": "memoria vector"}, {"id": "b", "content": "redis consulta"}])
+    assert store.query_by_vector(embed(["redis"])[0], 1) == ["redis consulta"]
+    store.add("c", "redis consulta python")
+    assert store.query_by_vector(embed(["python"])[0], 1) == ["redis consulta python"]
+    store.close()
+
+    reopened = make_store(tmp_path, vector_path=sidecar)
+    assert reopened.query_by_vector(embed(["memoria vector"])[0], 3)[0] == "memoria vector"
+    assert isinstance(reopened._matrix, np.memmap)
+    reopened.add("d", "python")
+    assert reopened.query_by_vector(embed(["python"])[0], 1) == ["python"]
+    reopened.clear()
+    assert reopened.query_by_vector(embed(["python"])[0], 1) == []
@@ -0,0 +1,58 @@
+import threading
+
+from app.memory.write_behind import WriteBehindQueue
+
+
+def test_items_are_written_in_batches_and_flushed():
+    batches = []
+    write_queue = WriteBehindQueue(batches.append, max_size=100, batch_size=4, flush_ms=20)
+    for i in range(10):
+        assert write_queue.submit(i)
+    assert write_queue.flush(timeout=5)
+    assert sorted(item for batch in batches for item in batch) == list(range(10))
+    assert max(len(batch) for batch in batches) <= 4
+    assert write_queue.stats()["written"] == 10
+
+
+def test_full_queue_rejects_instead_of_blocking():
+    release = threading.Event()
+    write_queue = WriteBehindQueue(lambda batch: release.wait(5), max_size=2, batch_size=1, flush_ms=0)
+    accepted = [write_queue.submit(i) for i in range(5)]
+    assert not all(accepted)
+    assert write_queue.stats()["rejected"] == accepted.count(False)
+    release.set()
+    assert write_queue.close(timeout=5)
+    assert not write_queue.submit("after close")
+
+
+def test_failed_batch_is_counted_and_does_not_stop_the_worker():
+    def write_batch(batch):
+        if "bad" in batch:
+            raise RuntimeError("store down")
+
+    write_queue = WriteBehindQueue(write_batch, batch_size=1, flush_ms=0)
+    write_queue.submit("bad")
+    write_queue.submit("good")
+    assert write_queue.flush(timeout=5)
+    stats = write_queue.stats()
+    assert (stats["failures"], stats["written"]) == (1, 1)
+
+
+
+def test_submit_racing_close_is_written_or_rejected():
+    written = []
+    write_queue = WriteBehindQueue(written.extend, flush_ms=0)
+    assert write_queue.submit("first") and write_queue.flush(timeout=5)
+
+    # Pause a submit inside its call while close() runs to completion
+    entered, resume = threading.Event(), threading.Event()
+    write_queue._ensure_started = lambda: (entered.set(), resume.wait(5))
+    result = []
+    submitter = threading.Thread(target=lambda: result.append(write_queue.submit("late")))
+    submitter.start()
+    assert entered.wait(5)
+    assert write_queue.close(timeout=5)
+    resume.set()
+    submitter.join(5)
+    # Never accepted-then-lost: the worker has already stopped
+    assert result == [False] and written == ["first"]
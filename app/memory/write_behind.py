@@ -0,0 +1,171 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class WriteBehindQueue:
+    """
+    Bounded queue that persists items off the request path.
+
+    `submit` never blocks: it returns False when the queue is full (or closed) and the
+    caller writes inline instead, so a slow store slows down requests rather than losing
+    data or growing memory without limit. A worker thread drains the queue in batches of
+    up to `batch_size`, waiting at most `flush_ms` for a batch to fill, and hands each
+    batch to `write_batch`. A failed batch is logged and counted, not retried.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List], None],
+        max_size: int = 1000,
+        batch_size: int = 64,
+        flush_ms: float = 50.0,
+        name: str = "memory"
+    ):
+        self.write_batch = write_batch
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.name = name
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_size)
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._idle = threading.Condition(self._stats_lock)
+        # Serializes the closed check and the put with close(): nothing can be accepted
+        # once close() has decided to drain
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.pending = 0
+        self.last_batch_seconds = 0.0
+
+    @classmethod
+    def from_env(cls, write_batch: Callable[[List], None], name: str = "memory") -> "WriteBehindQueue":
+        """
+        MEMORY_WRITE_QUEUE_SIZE, MEMORY_WRITE_BATCH_SIZE and MEMORY_WRITE_FLUSH_MS.
+        """
+        return cls(
+            write_batch,
+            max_size=int(os.getenv("MEMORY_WRITE_QUEUE_SIZE", "1000")),
+            batch_size=int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "64")),
+            flush_ms=float(os.getenv("MEMORY_WRITE_FLUSH_MS", "50")),
+            name=name,
+        )
+
+    def submit(self, item) -> bool:
+        self._ensure_started()
+        with self._submit_lock:
+            if self._closed:
+                return False
+            with self._stats_lock:
+                # Counted before the put so flush() never sees an item in neither place
+                self.pending += 1
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                with self._stats_lock:
+                    self.pending -= 1
+                    self.rejected += 1
+                    self._idle.notify_all()
+                return False
+        with self._stats_lock:
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    def _ensure_started(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._drain_loop, name=f"{self.name}-write-behind", daemon=True)
+                self._worker.start()
+
+    def _drain_loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List) -> None:
+        start = time.perf_counter()
+        try:
+            self.write_batch(batch)
+            failed = False
+        except Exception as e:
+            failed = True
+            print(f"[ERROR] Escritura diferida '{self.name}': se pierden {len(batch)} elementos: {e}")
+        with self._stats_lock:
+            self.pending -= len(batch)
+            self.batches += 1
+            self.last_batch_seconds = time.perf_counter() - start
+            if failed:
+                self.failures += len(batch)
+            else:
+                self.written += len(batch)
+            self._idle.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until everything submitted so far has been written (or has failed).
+        Returns False if `timeout` expires first.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self.pending == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stops accepting items, drains what is queued and stops the worker.
+        Returns False if the queue could not be drained within `timeout`.
+        """
+        with self._submit_lock:
+            self._closed = True
+        drained = self.flush(timeout)
+        if drained and self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout)
+        return drained
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "name": self.name,
+                "depth": self._queue.qsize(),
+                "capacity": self.max_size,
+                "max_depth": self.max_depth,
+                "pending": self.pending,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "batches": self.batches,
+                "avg_batch_size": (self.written + self.failures) / self.batches if self.batches else 0.0,
+                "last_batch_ms": self.last_batch_seconds * 1000,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "closed": self._closed,
+            }
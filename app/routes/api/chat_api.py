@@ -1,18 +1,46 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Request, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.core.chat_core import ChatCore
+from app.core.container import get_chat_core
+from app.builders.sse_builder import build_sse_event
 from app.utils.error_handler import handle_error_response
+from app.utils.utils import use_response_cache
 
 router = APIRouter()
-core = ChatCore()
 
 @router.post("/chat")
-async def chat_api(request: Request):
+async def chat_api(request: Request, core: ChatCore = Depends(get_chat_core)):
     try:
         data = await request.json()
         message = data.get("message")
-        response = core.handle_message(message)
+        response = await core.handle_message_async(message, use_cache=use_response_cache(request, data.get("cache")))
         return JSONResponse({"response": response})
     except Exception as e:
         return handle_error_response(e)
+
+
+@router.post("/chat/stream")
+async def chat_api_stream(request: Request, core: ChatCore = Depends(get_chat_core)):
+    try:
+        data = await request.json()
+        message = data.get("message")
+        if not message:
+            raise ValueError("Mensaje vacío.")
+        use_cache = use_response_cache(request, data.get("cache"))
+    except Exception as e:
+        return handle_error_response(e)
+
+    async def events():
+        try:
+            async for chunk in core.handle_message_stream(message, use_cache=use_cache):
+                yield build_sse_event({"token": chunk})
+            yield build_sse_event({}, event="done")
+        except Exception as e:
+            yield build_sse_event({"error": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.utils.http_pool import http_pool
+from app.llm_clients.llm_router import get_embedding_function, get_embedding_batcher
+from app.core.container import AppContainer, get_container
+from app.utils.error_handler import handle_error_response
+
+router = APIRouter()
+
+
+@router.get("/metrics/http-pool")
+async def http_pool_metrics():
+    try:
+        return JSONResponse(http_pool.metrics())
+    except Exception as e:
+        return handle_error_response(e)
+
+
+@router.get("/metrics/embedding-cache")
+async def embedding_cache_metrics():
+    try:
+        embedding_fn = get_embedding_function()
+        stats = embedding_fn.stats() if hasattr(embedding_fn, "stats") else {"enabled": False}
+        return JSONResponse(stats)
+    except Exception as e:
+        return handle_error_response(e)
+
+
+@router.get("/metrics/embedding-batcher")
+async def embedding_batcher_metrics(container: AppContainer = Depends(get_container)):
+    try:
+        batcher = get_embedding_batcher()
+        stats = {"llm": batcher.stats() if batcher is not None else {"enabled": False}}
+        if container.ready:
+            stats["short_term"] = container.memory_orchestrator.short_term_memory.batcher.stats()
+        return JSONResponse(stats)
+    except Exception as e:
+        return handle_error_response(e)
+
+
+@router.get("/metrics/memory-writes")
+async def memory_write_metrics(container: AppContainer = Depends(get_container)):
+    try:
+        if not container.ready:
+            return JSONResponse({"status": "starting"})
+        write_queue = container.memory_orchestrator.write_queue
+        return JSONResponse(write_queue.stats() if write_queue is not None else {"enabled": False})
+    except Exception as e:
+        return handle_error_response(e)
+
+
+@router.get("/metrics/response-cache")
+async def response_cache_metrics(container: AppContainer = Depends(get_container)):
+    try:
+        if not container.ready:
+            return JSONResponse({"status": "starting"})
+        response_cache = container.chat_core.response_cache
+        return JSONResponse(response_cache.stats() if response_cache is not None else {"enabled": False})
+    except Exception as e:
+        return handle_error_response(e)
+
+
+@router.get("/metrics/prompt")
+async def prompt_metrics(container: AppContainer = Depends(get_container)):
+    try:
+        if not container.ready:
+            return JSONResponse({"status": "starting"})
+        return JSONResponse(container.chat_core.context_assembler.stats())
+    except Exception as e:
+        return handle_error_response(e)
+
+
+@router.get("/metrics/ranking")
+async def ranking_metrics(container: AppContainer = Depends(get_container)):
+    try:
+        if not container.ready:
+            return JSONResponse({"status": "starting"})
+        return JSONResponse(container.llm_orchestrator.ranker.stats())
+    except Exception as e:
+        return handle_error_response(e)
+
+
+@router.get("/metrics/cascade")
+async def cascade_metrics(container: AppContainer = Depends(get_container)):
+    try:
+        if not container.ready:
+            return JSONResponse({"status": "starting"})
+        cascade = container.llm_orchestrator.cascade
+        return JSONResponse(cascade.stats() if cascade is not None else {"enabled": False})
+    except Exception as e:
+        return handle_error_response(e)
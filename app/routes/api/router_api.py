@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.llm_clients.llm_router import model_router
+from app.utils.error_handler import handle_error_response
+
+router = APIRouter()
+
+
+@router.get("/router/state")
+async def router_state():
+    """
+    Circuit breaker state, latency percentiles and error rate per model, plus the latest
+    routing decisions (order tried, models skipped) and breaker transitions.
+    """
+    try:
+        return JSONResponse(model_router.state())
+    except Exception as e:
+        return handle_error_response(e)
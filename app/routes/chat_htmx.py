@@ -1,14 +1,15 @@
-from fastapi import APIRouter, Form
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Form, Depends, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
 from app.core.chat_core import ChatCore
+from app.core.container import get_chat_core
 from app.builders import htmx_builder
 from app.utils.error_handler import handle_error_response
+from app.utils.utils import use_response_cache
 from app.llm_clients.llm_router import get_embedding_model_and_config
 
 router = APIRouter()
 MASTER_TOKEN = "test"
 
-core = ChatCore()
 embedding_model, model_config = get_embedding_model_and_config()
 
 
@@ -22,17 +23,40 @@ async def auth(token: str = Form(...)):
 
 # === CHAT ===
 @router.post("/chat-ui")
-async def chat_htmx(message: str = Form(...)):
+async def chat_htmx(request: Request, message: str = Form(...), cache: str = Form(None),
+                    core: ChatCore = Depends(get_chat_core)):
     try:
-        response = core.handle_message(message)
+        response = await core.handle_message_async(message, use_cache=use_response_cache(request, cache))
         return HTMLResponse(htmx_builder.build_chat_response(message, response))
     except Exception as e:
         return handle_error_response(e, is_htmx=True)
 
 
+@router.post("/chat-ui/stream")
+async def chat_htmx_stream(request: Request, message: str = Form(...), cache: str = Form(None),
+                           core: ChatCore = Depends(get_chat_core)):
+    use_cache = use_response_cache(request, cache)
+
+    async def fragments():
+        yield htmx_builder.build_stream_open(message)
+        try:
+            async for chunk in core.handle_message_stream(message, use_cache=use_cache):
+                yield htmx_builder.build_stream_chunk(chunk)
+            yield htmx_builder.build_stream_close()
+        except Exception as e:
+            yield htmx_builder.build_stream_close()
+            yield htmx_builder.build_error_response(str(e))
+
+    return StreamingResponse(
+        fragments(),
+        media_type="text/html",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # === MEMORY FAISS ===
 @router.get("/memory/faiss")
-async def faiss_htmx():
+async def faiss_htmx(core: ChatCore = Depends(get_chat_core)):
     try:
         faiss_store = core.memory_orchestrator.get_store("faiss")
         html = "<pre>" + "\n".join(faiss_store.get_recent()) + "</pre>"
@@ -43,7 +67,7 @@ async def faiss_htmx():
 
 # === MEMORY CHROMA ===
 @router.get("/memory/chroma")
-async def chroma_htmx():
+async def chroma_htmx(core: ChatCore = Depends(get_chat_core)):
     try:
         chroma_store = core.memory_orchestrator.get_store("chroma")
         stats = chroma_store.get_stats()
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.core.container import AppContainer, get_container
+from app.utils.tracing import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/ready")
+async def ready(container: AppContainer = Depends(get_container)):
+    # Degraded still serves traffic (some long-term stores are down), so it is 200
+    status = container.status()
+    code = 200 if status["status"] in ("ready", "degraded") else 503
+    return JSONResponse(status, status_code=code)
+
+
+@router.get("/metrics")
+async def metrics():
+    # Prometheus scrape endpoint: per-stage and per-route latency histograms
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
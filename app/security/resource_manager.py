@@ -1,3 +1,4 @@
+import os
 import json
 from fastapi import Request, HTTPException
 
@@ -29,7 +30,14 @@ class ResourceManager:
 
 resource_manager = ResourceManager()
 
+# Sondas de orquestadores (Kubernetes, balanceadores) no envían API key.
+# /metrics expone latencias y errores por modelo: público solo con METRICS_PUBLIC=true
+PUBLIC_PATHS = ("/ready",) + (("/metrics",) if os.getenv("METRICS_PUBLIC", "false").lower() == "true" else ())
+
 async def resource_auth_middleware(request: Request, call_next):
+    if request.url.path in PUBLIC_PATHS:
+        return await call_next(request)
+
     # Permitir automáticamente si viene de localhost
     client_host = request.client.host    
     if client_host in ("127.0.0.1", "localhost", "::1"):
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import importlib.util
+from urllib.parse import urlsplit
+from typing import Dict, Optional
+
+import httpx
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to HTTP/1.1 keep-alive without it.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class PoolMetrics:
+    """
+    Per-host counters shared by the sync and async transports of that host.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+
+    def finished(self, seconds: float, failed: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.total_seconds += seconds
+            if failed:
+                self.errors += 1
+
+    def as_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "avg_seconds": self.total_seconds / self.requests if self.requests else 0.0,
+        }
+
+
+class MeteredTransport(httpx.HTTPTransport):
+    def __init__(self, metrics: PoolMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def handle_request(self, request):
+        self.metrics.started()
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = super().handle_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.metrics.finished(time.perf_counter() - start, failed)
+
+    def open_connections(self) -> int:
+        return len(self._pool.connections)
+
+
+class AsyncMeteredTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, metrics: PoolMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def handle_async_request(self, request):
+        self.metrics.started()
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.metrics.finished(time.perf_counter() - start, failed)
+
+    def open_connections(self) -> int:
+        return len(self._pool.connections)
+
+
+class HttpPool:
+    """
+    Process-wide keep-alive HTTP clients, one sync and one async client per host so every
+    host gets its own connection limits. Adapters and embedding functions share them instead
+    of paying a TCP+TLS handshake per `requests.post`.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        host_limits: Optional[Dict[str, Dict]] = None
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.host_limits = host_limits or {}
+
+        self._clients: Dict[str, httpx.Client] = {}
+        self._transports: Dict[str, MeteredTransport] = {}
+        # host -> (client, transport, loop)
+        self._async_clients: Dict[str, tuple] = {}
+        self._metrics: Dict[str, PoolMetrics] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "HttpPool":
+        """
+        HTTP_POOL_MAX_CONNECTIONS, HTTP_POOL_MAX_KEEPALIVE, HTTP_POOL_KEEPALIVE_EXPIRY,
+        HTTP_POOL_HTTP2 and HTTP_POOL_HOST_LIMITS (JSON: {"api.deepseek.com": {"max_connections": 50}}).
+        """
+        return cls(
+            max_connections=int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "30")),
+            http2=os.getenv("HTTP_POOL_HTTP2", "true").lower() == "true",
+            host_limits=json.loads(os.getenv("HTTP_POOL_HOST_LIMITS", "{}")),
+        )
+
+    def _limits(self, host: str) -> httpx.Limits:
+        limits = self.host_limits.get(host, {})
+        return httpx.Limits(
+            max_connections=limits.get("max_connections", self.max_connections),
+            max_keepalive_connections=limits.get(
+                "max_keepalive_connections", self.max_keepalive_connections),
+            keepalive_expiry=limits.get("keepalive_expiry", self.keepalive_expiry),
+        )
+
+    def _metrics_for(self, host: str) -> PoolMetrics:
+        if host not in self._metrics:
+            self._metrics[host] = PoolMetrics()
+        return self._metrics[host]
+
+    def client(self, url: str) -> httpx.Client:
+        host = urlsplit(url).netloc
+        with self._lock:
+            client = self._clients.get(host)
+            if client is None:
+                transport = self._transports[host] = MeteredTransport(
+                    self._metrics_for(host), http2=self.http2, limits=self._limits(host))
+                client = self._clients[host] = httpx.Client(transport=transport)
+            return client
+
+    def async_client(self, url: str) -> httpx.AsyncClient:
+        """
+        Async clients are bound to the event loop that created them; a new loop
+        (asyncio.run in scripts) gets a fresh client for the same host.
+        """
+        host = urlsplit(url).netloc
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_clients.get(host)
+            if entry is None or entry[2] is not loop:
+                transport = AsyncMeteredTransport(
+                    self._metrics_for(host), http2=self.http2, limits=self._limits(host))
+                entry = self._async_clients[host] = (
+                    httpx.AsyncClient(transport=transport), transport, loop)
+            return entry[0]
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            hosts = {}
+            for host, metrics in self._metrics.items():
+                stats = metrics.as_dict()
+                transport = self._transports.get(host)
+                async_entry = self._async_clients.get(host)
+                limits = self._limits(host)
+                stats["open_connections"] = transport.open_connections() if transport else 0
+                stats["open_async_connections"] = (
+                    async_entry[1].open_connections() if async_entry else 0)
+                stats["limits"] = {
+                    "max_connections": limits.max_connections,
+                    "max_keepalive_connections": limits.max_keepalive_connections,
+                }
+                hosts[host] = stats
+        return {"http2": self.http2, "hosts": hosts}
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+            self._transports.clear()
+
+    async def aclose(self) -> None:
+        with self._lock:
+            entries = list(self._async_clients.values())
+            self._async_clients.clear()
+        for client, _, loop in entries:
+            if loop is asyncio.get_running_loop():
+                await client.aclose()
+        self.close()
+
+
+http_pool = HttpPool.from_env()
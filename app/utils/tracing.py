@@ -0,0 +1,249 @@
+import os
+import time
+import asyncio
+import bisect
+import threading
+import contextvars
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Request stages (embedding, retrieval, store ops, LLM calls...) are timed with `span()`.
+# Every span lands in a Prometheus histogram (GET /metrics); spans that run inside an
+# HTTP request are also summed per stage into its Server-Timing header. With
+# TRACING=false `span()` returns a shared no-op object, and TRACING_OTEL=true also
+# opens an OpenTelemetry span per stage when the SDK is installed.
+
+TRACING_ENABLED = os.getenv("TRACING", "true").lower() != "false"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """
+    Prometheus histogram with labels. Buckets are kept non-cumulative and summed on export.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., +Inf count], sum, count
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.labelnames, labels)} {value}" for labels, value in values)
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "ai_assist_stage_duration_seconds", "Time spent per request stage.", ["stage"])
+STAGE_ERRORS = Counter(
+    "ai_assist_stage_errors_total", "Request stages that raised.", ["stage"])
+HTTP_SECONDS = Histogram(
+    "ai_assist_http_request_duration_seconds", "HTTP request latency.", ["method", "route", "status"])
+METRICS = [STAGE_SECONDS, STAGE_ERRORS, HTTP_SECONDS]
+
+# Stage timings of the current HTTP request, for its Server-Timing header
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None)
+
+_tracer = None
+if TRACING_ENABLED and os.getenv("TRACING_OTEL", "false").lower() == "true":
+    try:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("ai_assist")
+    except ImportError:
+        print("[WARN] TRACING_OTEL=true pero opentelemetry no está instalado; solo métricas locales.")
+
+
+class _Span:
+    __slots__ = ("stage", "start", "otel")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.otel = None
+
+    def __enter__(self):
+        if _tracer is not None:
+            self.otel = _tracer.start_as_current_span(self.stage)
+            self.otel.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe((self.stage,), elapsed)
+        # Stragglers cancelled after a quorum are not failures
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            STAGE_ERRORS.inc((self.stage,))
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((self.stage, elapsed))
+        if self.otel is not None:
+            self.otel.__exit__(exc_type, exc, tb)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str):
+    """
+    Times the enclosed block as `stage`: `with span("retrieval"): ...`.
+    """
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return _Span(stage)
+
+
+class TracedEmbeddingFunction:
+    """
+    Times every call of the wrapped embedding function as `stage`. Other attributes
+    (`stats()`, `embedding_fn`) are the wrapped function's, so wrappers stay inspectable.
+    """
+
+    def __init__(self, embedding_fn, stage: str = "embedding"):
+        self.embedding_fn = embedding_fn
+        self.stage = stage
+
+    def __call__(self, texts):
+        with span(self.stage):
+            return self.embedding_fn(texts)
+
+    def __getattr__(self, name):
+        return getattr(self.embedding_fn, name)
+
+
+def start_request() -> Optional[contextvars.Token]:
+    if not TRACING_ENABLED:
+        return None
+    return _request_timings.set([])
+
+
+def finish_request(token: Optional[contextvars.Token]) -> Optional[str]:
+    """
+    Server-Timing header value for the request started with `start_request`: one entry
+    per stage, repeated spans of a stage summed.
+    """
+    if token is None:
+        return None
+    timings = _request_timings.get()
+    _request_timings.reset(token)
+    totals: Dict[str, float] = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in totals.items())
+
+
+def _observe_http(request, status: str, start: float) -> None:
+    route = request.scope.get("route")
+    HTTP_SECONDS.observe((request.method, getattr(route, "path", "unmatched"), status), time.perf_counter() - start)
+
+
+async def tracing_middleware(request, call_next):
+    """
+    Server-Timing covers the stages run before the response headers are sent: for a
+    streamed response (chat streams) that is up to the first chunk. The HTTP histogram
+    is observed once the body has been fully sent, so it has the whole duration.
+    """
+    token = start_request()
+    if token is None:
+        return await call_next(request)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _observe_http(request, "500", start)
+        raise
+    finally:
+        server_timing = finish_request(token)
+
+    total = f"total;dur={(time.perf_counter() - start) * 1000:.2f}"
+    response.headers["Server-Timing"] = f"{server_timing}, {total}" if server_timing else total
+    body = getattr(response, "body_iterator", None)
+    if body is None:
+        _observe_http(request, str(response.status_code), start)
+        return response
+
+    async def timed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            _observe_http(request, str(response.status_code), start)
+
+    response.body_iterator = timed_body()
+    return response
+
+
+def render_metrics() -> str:
+    """
+    Every metric in the Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
@@ -1,11 +1,52 @@
-# utils.py
-import os
-from jinja2 import Template
-
-def load_template(path: str) -> str:
-    with open(path, 'r', encoding='utf-8') as file:
-        return file.read()
-
-def render_template(template_str: str, variables: dict) -> str:
-    template = Template(template_str)
-    return template.render(**variables)
+# utils.py
+import os
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from jinja2 import Template
+
+# Executor shared by every async path that has to call blocking code
+# (sync DB drivers, SentenceTransformer encoding, numpy/faiss work).
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "32"))
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+
+
+def load_template(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+@functools.lru_cache(maxsize=128)
+def _compile_template(template_str: str) -> Template:
+    return Template(template_str)
+
+def render_template(template_str: str, variables: dict) -> str:
+    """
+    Renders a template given as source; each distinct source is compiled once.
+    Templates in `app/llm_clients/prompts` go through `get_prompt_registry()` instead.
+    """
+    return _compile_template(template_str).render(**variables)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking callable in the shared executor so it does not stall the event loop.
+    The caller's context variables (the request's tracing timings) go with it.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _blocking_executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+def use_response_cache(request, flag=None) -> bool:
+    """
+    False when the client asked to bypass the response cache: a `Cache-Control: no-cache`
+    header or a false `cache` flag ("false"/"0" from a form, False from JSON).
+    """
+    if "no-cache" in request.headers.get("cache-control", "").lower():
+        return False
+    if isinstance(flag, str):
+        return flag.strip().lower() not in ("false", "0", "no", "off")
+    return flag is not False
@@ -0,0 +1,88 @@
+"""
+Concurrent-request throughput of ChatCore: blocking `handle_message` called from an
+async route (the old behaviour) vs `handle_message_async`.
+
+The LLM and memory layers are replaced by fakes with fixed latencies so the numbers
+only reflect how the pipeline uses the event loop.
+
+    python -m benchmarks.bench_async_chat [--llm-ms 200] [--store-ms 10]
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.chat_core import ChatCore
+from app.memory.store.memory_store_interface import hits_from_texts
+from app.utils.utils import run_blocking
+
+
+class FakeMemoryOrchestrator:
+    def __init__(self, store_latency):
+        self.store_latency = store_latency
+
+    def search(self, query_text, top_k=5, context=None):
+        time.sleep(self.store_latency)
+        return hits_from_texts(["contexto"], "long_term")
+
+    async def search_async(self, query_text, top_k=5, context=None):
+        return await run_blocking(self.search, query_text, top_k)
+
+    def add_interaction(self, user_message, assistant_response, context=None):
+        time.sleep(self.store_latency)
+
+    async def add_interaction_async(self, user_message, assistant_response, context=None):
+        await run_blocking(self.add_interaction, user_message, assistant_response)
+
+
+class FakeLLMOrchestrator:
+    def __init__(self, llm_latency):
+        self.llm_latency = llm_latency
+
+    def context_budget(self, default):
+        return default
+
+    def respond(self, prompt, query=None):
+        time.sleep(self.llm_latency)
+        return "respuesta"
+
+    async def respond_async(self, prompt, query=None):
+        await asyncio.sleep(self.llm_latency)
+        return "respuesta"
+
+
+async def run_batch(core, concurrency, use_async):
+    async def blocking_route():
+        return core.handle_message("hola")
+
+    async def async_route():
+        return await core.handle_message_async("hola")
+
+    route = async_route if use_async else blocking_route
+    start = time.perf_counter()
+    await asyncio.gather(*(route() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-ms", type=float, default=200)
+    parser.add_argument("--store-ms", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    args = parser.parse_args()
+
+    core = ChatCore(
+        memory_orchestrator=FakeMemoryOrchestrator(args.store_ms / 1000),
+        llm_orchestrator=FakeLLMOrchestrator(args.llm_ms / 1000),
+    )
+
+    print(f"{'concurrency':>11} | {'sync req/s':>10} | {'async req/s':>11} | speedup")
+    for concurrency in args.concurrency:
+        sync_elapsed = asyncio.run(run_batch(core, concurrency, use_async=False))
+        async_elapsed = asyncio.run(run_batch(core, concurrency, use_async=True))
+        sync_rps = concurrency / sync_elapsed
+        async_rps = concurrency / async_elapsed
+        print(f"{concurrency:>11} | {sync_rps:>10.1f} | {async_rps:>11.1f} | {async_rps / sync_rps:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Cost of choosing among fan-out candidates: a meta-LLM completion for every answer (the
+old behaviour) vs the local ranker, which escalates to the meta-LLM only when its scores
+are too close to call.
+
+Candidates are synthetic embeddings: per question, models agree (paraphrases of one
+answer), split between two answers, or all differ, in the proportions given. Embedding
+and meta-LLM latencies are simulated, not slept; the local scoring time is measured.
+
+    python -m benchmarks.bench_candidate_ranking [--questions 2000] [--models 3] [--meta-ms 1500] [--embed-ms 30]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.llm_clients.ranking import LocalRanker, MetaLLMRanker
+
+
+def make_question(rng, n_models, dim, mix):
+    query = rng.standard_normal(dim)
+    kind = rng.choice(["agree", "split", "differ"], p=mix)
+    answers = [query + rng.standard_normal(dim) * 0.8 for _ in range({"agree": 1, "split": 2, "differ": n_models}[kind])]
+    vectors = [answers[i % len(answers)] + rng.standard_normal(dim) * 0.15 for i in range(n_models)]
+    return query, vectors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--models", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--meta-ms", type=float, default=1500)
+    parser.add_argument("--embed-ms", type=float, default=30)
+    parser.add_argument("--mix", type=float, nargs=3, default=[0.6, 0.3, 0.1], help="agree split differ")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    vectors = {}
+    embed_calls = []
+
+    def embed(texts):
+        embed_calls.append(len(texts))
+        return [vectors[text] for text in texts]
+
+    meta = MetaLLMRanker(lambda query, candidates: ("1", ""), None)
+    ranker = LocalRanker(embedding_fn=embed, escalation=meta)
+    local_seconds = 0.0
+    for i in range(args.questions):
+        query, candidate_vectors = make_question(rng, args.models, args.dim, args.mix)
+        vectors[f"q{i}"] = query
+        candidates = []
+        for j, vector in enumerate(candidate_vectors):
+            vectors[f"a{i}.{j}"] = vector
+            candidates.append({"model": f"m{j}", "response": f"a{i}.{j}", "latency": args.meta_ms / 1000})
+        start = time.perf_counter()
+        ranker.rank(f"q{i}", candidates)
+        local_seconds += time.perf_counter() - start
+
+    stats = ranker.stats()
+    escalations = stats["decisions"]["meta_llm"]
+    simulated = len(embed_calls) * args.embed_ms + escalations * args.meta_ms
+    local_mean = (local_seconds * 1000 + simulated) / args.questions
+    print(f"decisions: {stats['decisions']}, escalation rate {stats['escalation_rate']:.1%}")
+    print(f"{'ranker':>16} | {'mean / answer':>13} | {'extra completions':>17}")
+    print(f"{'meta-LLM always':>16} | {args.meta_ms:>10.0f} ms | {args.questions:>17}")
+    print(f"{'local + escalate':>16} | {local_mean:>10.0f} ms | {escalations:>17}")
+    print(f"local scoring {stats['avg_local_ms']:.2f} ms per answer (excluding simulated embedding calls)")
+
+
+if __name__ == "__main__":
+    main()
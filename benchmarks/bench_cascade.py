@@ -0,0 +1,66 @@
+"""
+Latency and remote calls per answer: fan-out to every model (the default strategy),
+the remote model alone, and the cascade (local model first, remote only when the
+heuristic confidence is below the tier threshold).
+
+The local model answers well in `--local-good` of the questions, refuses or answers
+too briefly in `--local-weak`, and is confidently wrong in the rest (which no answer-only
+heuristic can catch; reported as accepted wrong answers). Latencies are simulated.
+
+    python -m benchmarks.bench_cascade [--questions 5000] [--local-ms 600] [--remote-ms 2000]
+"""
+import argparse
+import random
+
+from app.llm_clients.cascade import CascadeStrategy, HeuristicScorer
+
+GOOD = "La capital de Francia es París, sede del gobierno desde hace siglos."
+WEAK = ["Lo siento, no tengo información sobre eso.", "No lo sé.", "París."]
+WRONG = "La capital de Francia es Lyon, sede del gobierno desde hace siglos."
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=5000)
+    parser.add_argument("--local-ms", type=float, default=600)
+    parser.add_argument("--remote-ms", type=float, default=2000)
+    parser.add_argument("--local-good", type=float, default=0.7)
+    parser.add_argument("--local-weak", type=float, default=0.25)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    tiers = [{"model": "ollama", "threshold": args.threshold}, {"model": "deepseek"}]
+    cascade = CascadeStrategy(tiers, HeuristicScorer())
+    models = {"ollama": {}, "deepseek": {}}
+    latency = {"ollama": args.local_ms / 1000, "deepseek": args.remote_ms / 1000}
+    total_ms = remote_calls = wrong = 0
+
+    for _ in range(args.questions):
+        draw = rng.random()
+        local_answer = GOOD if draw < args.local_good else (
+            rng.choice(WEAK) if draw < args.local_good + args.local_weak else WRONG)
+        calls = []
+
+        def ask_one(model_key, model_conf, prompt):
+            calls.append(model_key)
+            response = local_answer if model_key == "ollama" else GOOD
+            return {"model": model_key, "response": response, "latency": latency[model_key]}
+
+        response = cascade.respond("prompt", "pregunta", models, lambda key: True, ask_one)
+        total_ms += sum(latency[model_key] for model_key in calls) * 1000
+        remote_calls += "deepseek" in calls
+        wrong += response != GOOD
+
+    n = args.questions
+    print(f"{'strategy':>14} | {'mean latency':>12} | {'remote calls':>12} | {'wrong accepted':>14}")
+    print(f"{'fan-out':>14} | {max(args.local_ms, args.remote_ms):>9.0f} ms | {1:>12.0%} | {'ranked':>14}")
+    print(f"{'remote only':>14} | {args.remote_ms:>9.0f} ms | {1:>12.0%} | {0:>14.1%}")
+    print(f"{'cascade':>14} | {total_ms / n:>9.0f} ms | {remote_calls / n:>12.0%} | {wrong / n:>14.1%}")
+    for model_key, stats in cascade.stats()["tiers"].items():
+        print(f"  tier {model_key}: hit rate {stats['hit_rate']:.1%}, escalated {stats['escalated']}, "
+              f"mean confidence {stats['confidence']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Throughput of concurrent single-text embed calls against a provider with a fixed
+per-call cost: direct calls vs BatchingEmbeddingFunction.
+
+The provider is a fake (`--call-ms` per request plus `--item-ms` per text), which is
+the shape of both HTTP embedding APIs and SentenceTransformer.encode.
+
+    python -m benchmarks.bench_embedding_batcher [--threads 32] [--calls 20] [--window-ms 5]
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.embeddings.embedding_batcher import BatchingEmbeddingFunction
+
+
+class FakeProvider:
+    def __init__(self, call_ms, item_ms, max_concurrency=4):
+        self.call_s = call_ms / 1000
+        self.item_s = item_ms / 1000
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max_concurrency)
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls += 1
+        with self._slots:
+            time.sleep(self.call_s + self.item_s * len(texts))
+        return [[float(len(text))] * 8 for text in texts]
+
+
+def run(embed, threads, calls):
+    def worker(i):
+        for j in range(calls):
+            embed([f"texto {i}-{j}"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return threads * calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--call-ms", type=float, default=20.0)
+    parser.add_argument("--item-ms", type=float, default=0.5)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    args = parser.parse_args()
+
+    provider = FakeProvider(args.call_ms, args.item_ms)
+    direct = run(provider, args.threads, args.calls)
+    print(f"{'direct':>8} | {direct:>8.0f} texts/s | {provider.calls:>5} provider calls")
+
+    provider = FakeProvider(args.call_ms, args.item_ms)
+    batcher = BatchingEmbeddingFunction(provider, window_ms=args.window_ms, max_batch_size=args.max_batch)
+    batched = run(batcher, args.threads, args.calls)
+    print(f"{'batched':>8} | {batched:>8.0f} texts/s | {provider.calls:>5} provider calls")
+
+    stats = batcher.stats()
+    print(f"\navg batch size {stats['avg_batch_size']:.1f}; histogram {stats['batch_size_histogram']}")
+
+
+if __name__ == "__main__":
+    main()
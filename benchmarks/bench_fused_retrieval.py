@@ -0,0 +1,86 @@
+"""
+Retrieval latency of the routed path (one store chosen per query; a miss falls back to
+Postgres in a second, serial round trip) vs fused retrieval (short-term memory and every
+store at once under a shared deadline, merged with reciprocal-rank fusion).
+
+Stores are fakes with fixed latencies; one of them is slower than the deadline to show
+that a late store is skipped instead of awaited.
+
+    python -m benchmarks.bench_fused_retrieval [--store-ms 30] [--slow-ms 1000] [--deadline-ms 300]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.memory.retrieval import reciprocal_rank_fusion, search_concurrently
+from app.memory.store.memory_store_interface import hits_from_texts
+
+
+class FakeStore:
+    def __init__(self, name, latency, hit_rate, rng):
+        self.name = name
+        self.latency = latency
+        self.hit_rate = hit_rate
+        self.rng = rng
+
+    def search(self, query_text, n_results=5):
+        time.sleep(self.latency)
+        if self.rng.random() > self.hit_rate:
+            return []
+        return hits_from_texts([f"{self.name} {query_text} {i}" for i in range(n_results)], self.name)
+
+
+def routed(stores, query):
+    hits = stores["chroma"].search(query)
+    if not hits:
+        hits = stores["postgres"].search(query)
+    return hits
+
+
+def fused(stores, query, deadline):
+    searches = {name: (lambda store=store: store.search(query)) for name, store in stores.items()}
+    results, _ = search_concurrently(searches, deadline)
+    return reciprocal_rank_fusion(list(results.values()), 5)
+
+
+def measure(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store-ms", type=float, default=30)
+    parser.add_argument("--slow-ms", type=float, default=1000)
+    parser.add_argument("--deadline-ms", type=float, default=300)
+    parser.add_argument("--queries", type=int, default=40)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    latency = args.store_ms / 1000
+    stores = {
+        "short_term": FakeStore("short_term", latency / 3, 0.5, rng),
+        "chroma": FakeStore("chroma", latency, 0.5, rng),
+        "postgres": FakeStore("postgres", latency, 0.9, rng),
+        "mongo": FakeStore("mongo", latency, 0.9, rng),
+    }
+    queries = [f"pregunta {i}" for i in range(args.queries)]
+
+    print(f"{'mode':>22} | {'p50':>8} | {'p95':>8}")
+    p50, p95 = measure(lambda q: routed(stores, q), queries)
+    print(f"{'routed + fallback':>22} | {p50:>5.1f} ms | {p95:>5.1f} ms")
+    p50, p95 = measure(lambda q: fused(stores, q, args.deadline_ms / 1000), queries)
+    print(f"{'fused':>22} | {p50:>5.1f} ms | {p95:>5.1f} ms")
+    stores["weaviate"] = FakeStore("weaviate", args.slow_ms / 1000, 1.0, rng)
+    p50, p95 = measure(lambda q: fused(stores, q, args.deadline_ms / 1000), queries)
+    print(f"{'fused + 1 slow store':>22} | {p50:>5.1f} ms | {p95:>5.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
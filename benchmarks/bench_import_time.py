@@ -0,0 +1,104 @@
+"""
+Import time of `app.main` (from `python -X importtime`) and, optionally, the time to
+build the application container. Each run appends one JSON line to
+benchmarks/results/import_time.jsonl, so regressions show up across commits.
+
+Also reports whether any heavy library got imported eagerly; none of them should be
+imported by `import app.main`.
+
+    python -m benchmarks.bench_import_time [--repeat 5] [--top 15] [--startup] [--no-record]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["torch", "sentence_transformers", "faiss", "chromadb", "weaviate", "psycopg2", "pymongo"]
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "results", "import_time.jsonl")
+
+STARTUP_PROBE = """
+import time
+start = time.perf_counter()
+from app.core.container import AppContainer
+container = AppContainer.build()
+print(time.perf_counter() - start)
+"""
+
+
+def parse_importtime(stderr):
+    """Returns {module: (self_us, cumulative_us)} from `-X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def import_run():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                            capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def startup_run():
+    result = subprocess.run([sys.executable, "-c", STARTUP_PROBE], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--startup", action="store_true",
+                        help="also time AppContainer.build() (needs models and reachable stores)")
+    parser.add_argument("--no-record", action="store_true")
+    args = parser.parse_args()
+
+    runs = [import_run() for _ in range(args.repeat)]
+    import_ms = statistics.median(run["app.main"][1] for run in runs) / 1000
+    last = runs[-1]
+
+    print(f"import app.main: {import_ms:.0f} ms (median of {args.repeat})\n")
+    print(f"{'module':<50} | {'self':>8} | {'cumulative':>10}")
+    for name, (self_us, cumulative_us) in sorted(last.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{name:<50} | {self_us / 1000:>5.1f} ms | {cumulative_us / 1000:>7.1f} ms")
+
+    heavy = [name for name in HEAVY_MODULES if name in last]
+    print(f"\nheavy modules imported eagerly: {', '.join(heavy) or 'none'}")
+
+    startup_s = None
+    if args.startup:
+        startup_s = statistics.median(startup_run() for _ in range(args.repeat))
+        print(f"AppContainer.build(): {startup_s:.2f} s")
+
+    if not args.no_record:
+        os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "import_ms": round(import_ms, 1),
+            "heavy_imported": heavy,
+            "startup_s": startup_s,
+        }
+        with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"recorded in {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Query latency and documents examined in MongoMemoryStore at growing collection sizes:
+the old unanchored `$regex` (collection scan) vs `$text` over the text index.
+
+Queries look for rare terms (about one document in a thousand has one), the case
+where a scan hurts most; a term in half the collection lets the regex stop after a few
+documents, while $text must score every match.
+
+Needs a reachable MongoDB (MONGO_* env vars). Uses the `bench_search` collection,
+dropped at the end.
+
+    python -m benchmarks.bench_mongo_search [--sizes 10000 100000 1000000] [--queries 50]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.memory.store.mongo_memory_store import MongoMemoryStore
+
+COLLECTION = "bench_search"
+VOCABULARY = [
+    "memoria", "modelo", "vector", "consulta", "usuario", "asistente", "respuesta", "contexto",
+    "servidor", "embedding", "latencia", "documento", "python", "mongo", "indice", "cache",
+    "sesion", "mensaje", "prompt", "ranking", "lote", "conexion", "tiempo", "error",
+]
+
+
+def fill_to(store, rows, rng):
+    current = store.collection.estimated_document_count()
+    batch = []
+    for i in range(current, rows):
+        words = rng.choices(VOCABULARY, k=12 + i % 5)
+        if i % 1000 == 0:
+            words.append(f"raro{i // 1000 % 100}")
+        batch.append({"id": f"bench-{i}", "content": " ".join(words), "metadata": {"source": "bench"}})
+        if len(batch) == 10_000:
+            store.add_many(batch)
+            batch = []
+    store.add_many(batch)
+
+
+def regex_query(store, text, n_results):
+    return list(store.collection.find(
+        {"content": {"$regex": text, "$options": "i"}}, {"_id": 0, "content": 1}).limit(n_results))
+
+
+def examined(store, query):
+    """(regex docs examined, $text docs examined) from explain()."""
+    regex = store.collection.find({"content": {"$regex": query, "$options": "i"}}).limit(5).explain()
+    text = store.collection.find({"$text": {"$search": query}}).limit(5).explain()
+    return (regex["executionStats"]["totalDocsExamined"] if "executionStats" in regex else None,
+            text["executionStats"]["totalDocsExamined"] if "executionStats" in text else None)
+
+
+def latencies(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    store = MongoMemoryStore(collection_name=COLLECTION)
+    store.collection.drop()
+    store.ensure_indexes()
+    rng = random.Random(0)
+    queries = [f"raro{rng.randrange(10)}" for _ in range(args.queries)]
+
+    print(f"{'docs':>9} | {'$regex p50':>10} | {'$regex p95':>10} | {'$text p50':>9} | {'$text p95':>9}")
+    try:
+        for rows in sorted(args.sizes):
+            fill_to(store, rows, rng)
+            regex_p50, regex_p95 = latencies(lambda q: regex_query(store, q, 5), queries)
+            text_p50, text_p95 = latencies(lambda q: store.query(q, 5), queries)
+            print(f"{rows:>9} | {regex_p50:>7.1f} ms | {regex_p95:>7.1f} ms | {text_p50:>6.1f} ms | {text_p95:>6.1f} ms")
+        print(f"\ndocs examined for '{queries[0]}' ($regex, $text): {examined(store, queries[0])}")
+    finally:
+        store.collection.drop()
+
+
+if __name__ == "__main__":
+    main()
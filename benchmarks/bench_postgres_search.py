@@ -0,0 +1,104 @@
+"""
+Query latency of PostgresMemoryStore at growing table sizes: the old
+`content LIKE '%text%'` scan vs the ranked full-text search over the GIN index.
+
+Needs a reachable PostgreSQL (POSTGRES_* env vars). Everything happens in the
+`bench_ltm` schema, dropped at the end; rows are generated server-side.
+
+    python -m benchmarks.bench_postgres_search [--sizes 10000 1000000 10000000] [--queries 50]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.memory.store.postgres_memory_store import PostgresMemoryStore
+
+SCHEMA = "bench_ltm"
+VOCABULARY = [
+    "memoria", "modelo", "vector", "consulta", "usuario", "asistente", "respuesta", "contexto",
+    "servidor", "embedding", "latencia", "documento", "python", "postgres", "indice", "cache",
+    "sesion", "mensaje", "prompt", "ranking", "lote", "conexion", "tiempo", "error",
+]
+
+
+def fill_to(store, rows):
+    """Inserts generated rows until the table holds `rows` documents."""
+    with store._connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM documents")
+            current = cursor.fetchone()[0]
+            if current >= rows:
+                return
+            cursor.execute(
+                """
+                INSERT INTO documents (id, content)
+                SELECT 'bench-' || i,
+                       (SELECT string_agg(w, ' ') FROM (
+                            SELECT (%(vocabulary)s::text[])[1 + floor(random() * %(size)s)::int] AS w
+                            FROM generate_series(1, 12 + (i %% 5))
+                       ) words)
+                FROM generate_series(%(start)s, %(end)s) AS i
+                """,
+                {"vocabulary": VOCABULARY, "size": len(VOCABULARY), "start": current + 1, "end": rows},
+            )
+        connection.commit()
+    with store._connection() as connection:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE documents")
+        connection.autocommit = False
+
+
+def like_query(store, text, n_results):
+    with store._connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT content FROM documents WHERE content LIKE %s LIMIT %s", (f"%{text}%", n_results))
+            return cursor.fetchall()
+
+
+def latencies(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    setup = PostgresMemoryStore()
+    with setup._connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    setup.close()
+
+    store = PostgresMemoryStore(options=f"-c search_path={SCHEMA}")
+    rng = random.Random(0)
+    # Multi-word, as user messages are; LIKE only ever matches the exact phrase
+    queries = [" ".join(rng.sample(VOCABULARY, 3)) for _ in range(args.queries)]
+
+    print(f"{'rows':>10} | {'LIKE p50':>9} | {'LIKE p95':>9} | {'FTS p50':>9} | {'FTS p95':>9}")
+    try:
+        for rows in sorted(args.sizes):
+            fill_to(store, rows)
+            like_p50, like_p95 = latencies(lambda q: like_query(store, q, 5), queries)
+            fts_p50, fts_p95 = latencies(lambda q: store.query(q, 5), queries)
+            print(f"{rows:>10} | {like_p50:>6.1f} ms | {like_p95:>6.1f} ms | {fts_p50:>6.1f} ms | {fts_p95:>6.1f} ms")
+    finally:
+        store.close()
+        cleanup = PostgresMemoryStore()
+        with cleanup._connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cleanup.close()
+
+
+if __name__ == "__main__":
+    main()
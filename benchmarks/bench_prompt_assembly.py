@@ -0,0 +1,82 @@
+"""
+Prompt construction cost and size: the old path (template file read and a new
+`jinja2.Template` compiled per request, retrieved snippets joined unbounded) vs the
+prompt registry plus the token-budgeted context assembler.
+
+Retrieved snippets are synthetic chat turns of varying length, with the duplicates that
+short-term and long-term memory return for the same interaction.
+
+    python -m benchmarks.bench_prompt_assembly [--requests 2000] [--hits 10] [--budget 1024]
+"""
+import argparse
+import random
+import time
+
+from jinja2 import Template
+
+from app.core.context_assembler import ContextAssembler, estimate_tokens
+from app.llm_clients.prompt_registry import PROMPTS_DIR, get_prompt_registry
+from app.memory.store.memory_store_interface import hits_from_texts
+
+WORDS = "memoria contexto usuario respuesta modelo pregunta datos sistema vector búsqueda".split()
+
+
+def snippet(rng):
+    length = rng.choice([20, 60, 200, 600])
+    user = " ".join(rng.choice(WORDS) for _ in range(length // 4))
+    assistant = " ".join(rng.choice(WORDS) for _ in range(length))
+    return f"user: {user}\nassistant: {assistant}"
+
+
+def retrieved(rng, n_hits):
+    texts = [snippet(rng) for _ in range(n_hits)]
+    # Half of the long-term hits repeat what short-term memory already returned
+    repeated = texts[: n_hits // 2]
+    return hits_from_texts(texts, "short_term") + hits_from_texts(repeated + [snippet(rng)], "long_term")
+
+
+def old_prompt(message, hits):
+    with open(f"{PROMPTS_DIR}/enriched_prompt.j2", encoding="utf-8") as f:
+        template = Template(f.read())
+    return template.render(short_context="", long_context="\n".join(hit["text"] for hit in hits), question=message)
+
+
+def new_prompt(assembler, message, hits, budget):
+    assembled = assembler.assemble(hits, budget)
+    prompt = get_prompt_registry().render(
+        "enriched_prompt.j2",
+        short_context=assembled["short_context"],
+        long_context=assembled["long_context"],
+        question=message,
+    )
+    assembler.record(estimate_tokens(prompt), assembled)
+    return prompt
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--hits", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=1024)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    workload = [(f"pregunta {i}", retrieved(rng, args.hits)) for i in range(args.requests)]
+    assembler = ContextAssembler()
+
+    print(f"{'path':>20} | {'build / req':>11} | {'avg prompt tok':>14} | {'max prompt tok':>14}")
+    for name, build in (("old (unbounded)", lambda m, h: old_prompt(m, h)),
+                        ("registry + budget", lambda m, h: new_prompt(assembler, m, h, args.budget))):
+        sizes = []
+        start = time.perf_counter()
+        for message, hits in workload:
+            sizes.append(build(message, hits))
+        elapsed = (time.perf_counter() - start) / args.requests * 1000
+        tokens = [estimate_tokens(prompt) for prompt in sizes]
+        print(f"{name:>20} | {elapsed:>8.3f} ms | {sum(tokens) / len(tokens):>14.0f} | {max(tokens):>14}")
+    stats = assembler.stats()
+    print(f"duplicates dropped: {stats['duplicates_dropped']}, over budget: {stats['over_budget_dropped']}, "
+          f"truncated: {stats['truncated']}")
+
+
+if __name__ == "__main__":
+    main()
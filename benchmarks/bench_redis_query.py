@@ -0,0 +1,93 @@
+"""
+Query cost of RedisMemoryStore as the database grows: the previous `KEYS *text*` +
+one GET/pickle per key vs the inverted token index (SCARD, weighted ZUNIONSTORE, MGET).
+
+Needs a reachable Redis (REDIS_* env vars). Writes under the `bench_redis` namespace
+and `bench_legacy:` keys, both removed at the end.
+
+    python -m benchmarks.bench_redis_query [--sizes 10000 100000 1000000] [--queries 50]
+"""
+import argparse
+import pickle
+import random
+import statistics
+import time
+
+from app.memory.store.redis_memory_store import RedisMemoryStore
+
+NAMESPACE = "bench_redis"
+LEGACY_PREFIX = "bench_legacy:"
+VOCABULARY = [
+    "memoria", "modelo", "vector", "consulta", "usuario", "asistente", "respuesta", "contexto",
+    "servidor", "embedding", "latencia", "documento", "python", "redis", "indice", "cache",
+    "sesion", "mensaje", "prompt", "ranking", "lote", "conexion", "tiempo", "error",
+]
+
+
+def fill_to(store, current, rows, rng):
+    for start in range(current, rows, 10_000):
+        batch = []
+        for i in range(start, min(start + 10_000, rows)):
+            words = rng.choices(VOCABULARY, k=12 + i % 5)
+            if i % 1000 == 0:
+                words.append(f"raro{i // 1000 % 100}")
+            batch.append({"id": f"doc-{i}", "content": " ".join(words)})
+        store.add_many(batch)
+        pipeline = store.client.pipeline(transaction=False)
+        for item in batch:
+            pipeline.set(LEGACY_PREFIX + item["id"], pickle.dumps({"content": item["content"], "metadata": None}))
+        pipeline.execute()
+
+
+def legacy_query(client, query_text, n_results):
+    # The old RedisMemoryStore.query apart from the key prefix. KEYS walks the whole
+    # keyspace whatever the pattern, and it matches key names, so it rarely finds anything.
+    keys = client.keys(f"{LEGACY_PREFIX}*{query_text}*")
+    results = []
+    for key in keys:
+        data = pickle.loads(client.get(key))
+        if query_text in data["content"]:
+            results.append(data["content"])
+            if len(results) >= n_results:
+                break
+    return results
+
+
+def latencies(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    store = RedisMemoryStore(namespace=NAMESPACE)
+    rng = random.Random(0)
+    queries = [f"raro{rng.randrange(10)}" for _ in range(args.queries)]
+
+    print(f"{'docs':>9} | {'KEYS p50':>9} | {'KEYS p95':>9} | {'index p50':>9} | {'index p95':>9}")
+    current = 0
+    try:
+        for rows in sorted(args.sizes):
+            fill_to(store, current, rows, rng)
+            current = rows
+            keys_p50, keys_p95 = latencies(lambda q: legacy_query(store.client, q, 5), queries)
+            index_p50, index_p95 = latencies(lambda q: store.query(q, 5), queries)
+            print(f"{rows:>9} | {keys_p50:>6.1f} ms | {keys_p95:>6.1f} ms | {index_p50:>6.1f} ms | {index_p95:>6.1f} ms")
+    finally:
+        store.clear()
+        batch = list(store.client.scan_iter(match=LEGACY_PREFIX + "*", count=1000))
+        for start in range(0, len(batch), 1000):
+            store.client.unlink(*batch[start:start + 1000])
+
+
+if __name__ == "__main__":
+    main()
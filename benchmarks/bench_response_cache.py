@@ -0,0 +1,65 @@
+"""
+Semantic response cache on a synthetic question stream: hit rate, simulated mean
+response latency with and without the cache, and lookup cost as the cache grows.
+
+Questions are random embeddings; a share of them (`--repeat`) are paraphrases, i.e. an
+earlier question plus small noise. LLM latency is simulated, not slept.
+
+    python -m benchmarks.bench_response_cache [--questions 5000] [--repeat 0.4] [--llm-ms 1500]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.llm_clients.response_cache import SemanticResponseCache
+
+NAMESPACE = "deepseek:deepseek-chat+ollama:mistral"
+
+
+def question_stream(count, dim, repeat, rng):
+    asked = []
+    for _ in range(count):
+        if asked and rng.random() < repeat:
+            base = asked[rng.integers(len(asked))]
+            vector = base + rng.normal(0, 0.01, dim).astype(np.float32)
+        else:
+            vector = rng.standard_normal(dim).astype(np.float32)
+            asked.append(vector)
+        yield vector
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=5000)
+    parser.add_argument("--repeat", type=float, default=0.4)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--llm-ms", type=float, default=1500)
+    parser.add_argument("--max-entries", type=int, nargs="+", default=[1000, 10_000])
+    args = parser.parse_args()
+
+    print(f"{'max entries':>11} | {'hit rate':>8} | {'mean no cache':>13} | {'mean cache':>10} | {'lookup p50':>10} | {'lookup p99':>10}")
+    for max_entries in args.max_entries:
+        rng = np.random.default_rng(0)
+        cache = SemanticResponseCache(max_entries=max_entries, config_path=None)
+        lookups = []
+        total_ms = 0.0
+        for i, vector in enumerate(question_stream(args.questions, args.dim, args.repeat, rng)):
+            start = time.perf_counter()
+            cached = cache.get(NAMESPACE, vector)
+            lookup_ms = (time.perf_counter() - start) * 1000
+            lookups.append(lookup_ms)
+            if cached is None:
+                cache.put(NAMESPACE, vector, f"respuesta {i}", latency=args.llm_ms / 1000)
+                total_ms += lookup_ms + args.llm_ms
+            else:
+                total_ms += lookup_ms
+        stats = cache.stats()
+        lookups.sort()
+        print(f"{max_entries:>11} | {stats['hit_rate']:>8.1%} | {args.llm_ms:>10.0f} ms | "
+              f"{total_ms / args.questions:>7.0f} ms | {lookups[len(lookups) // 2]:>7.3f} ms | "
+              f"{lookups[int(len(lookups) * 0.99)]:>7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Request latency through a provider outage: fixed priority order (every request first
+waits out the primary's timeout) vs circuit breakers, and breakers plus adaptive ordering.
+
+Time is simulated, not slept: requests arrive every `--interval` seconds for
+`--minutes`; the primary is down between 20% and 60% of the run and answers slower
+than the fallback afterwards (`--primary-slow-ms`), which only adaptive routing notices.
+
+    python -m benchmarks.bench_router_outage [--minutes 10] [--interval 0.5] [--timeout 15]
+"""
+import argparse
+import random
+
+from app.llm_clients.model_router import ModelRouter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(router, clock, args, rng):
+    models = [("deepseek", {"timeout_seconds": args.timeout}), ("ollama", {"timeout_seconds": args.timeout})]
+    duration = args.minutes * 60
+    latencies, timeouts, failed = [], 0, 0
+    for i in range(int(duration / args.interval)):
+        clock.now = i * args.interval
+        down = 0.2 * duration <= clock.now < 0.6 * duration
+        elapsed = 0.0
+        answered = False
+        for model_key, _ in router.route(models):
+            if not router.acquire(model_key):
+                continue
+            if model_key == "deepseek" and down:
+                elapsed += args.timeout
+                timeouts += 1
+                router.record_failure(model_key, TimeoutError())
+                continue
+            if model_key == "deepseek":
+                base = args.primary_ms if clock.now < 0.6 * duration else args.primary_slow_ms
+            else:
+                base = args.fallback_ms
+            seconds = rng.gauss(base, base * 0.1) / 1000
+            elapsed += seconds
+            router.record_success(model_key, seconds)
+            answered = True
+            break
+        failed += not answered
+        latencies.append(elapsed)
+    latencies.sort()
+    return sum(latencies) / len(latencies), latencies[int(len(latencies) * 0.95)], timeouts, failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=15)
+    parser.add_argument("--primary-ms", type=float, default=800)
+    parser.add_argument("--primary-slow-ms", type=float, default=2500)
+    parser.add_argument("--fallback-ms", type=float, default=1200)
+    args = parser.parse_args()
+
+    print(f"{'routing':>22} | {'mean':>8} | {'p95':>8} | {'timeouts paid':>13} | {'failed':>6}")
+    for name, kwargs in (("fixed priority", {"failure_threshold": 10**9}),
+                         ("circuit breaker", {}),
+                         ("breaker + adaptive", {"adaptive": True})):
+        clock = Clock()
+        router = ModelRouter(clock=clock, **kwargs)
+        mean, p95, timeouts, failed = run(router, clock, args, random.Random(0))
+        print(f"{name:>22} | {mean:>6.2f} s | {p95:>6.2f} s | {timeouts:>13} | {failed:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Routing cost of the session-similarity check as the session grows: the old per-entry
+`scipy.spatial.distance.cosine` loop vs SessionIndex (one float32 mat-vec).
+
+    python -m benchmarks.bench_session_similarity [--dim 1024] [--sizes 100 1000 10000 50000]
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy.spatial.distance import cosine
+
+from app.memory.session_index import SessionIndex
+
+
+def loop_is_semantic(query, history, threshold=0.8):
+    # Worst case for the old code: nothing similar, so every entry is visited.
+    for embedding in history:
+        if 1 - cosine(query, embedding) > threshold:
+            return True
+    return False
+
+
+def time_per_call(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--loop-max", type=int, default=10000,
+                        help="skip the scipy loop above this size (it is linear and slow)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'entries':>8} | {'scipy loop':>12} | {'SessionIndex':>12}")
+    for size in args.sizes:
+        history = rng.standard_normal((size, args.dim)).astype(np.float32)
+        query = rng.standard_normal(args.dim).astype(np.float32)
+
+        index = SessionIndex(capacity=size)
+        for embedding in history:
+            index.add(embedding)
+
+        vectorized = time_per_call(lambda: index.is_similar(query, 0.8), repeats=50)
+        if size <= args.loop_max:
+            looped = time_per_call(lambda: loop_is_semantic(query, history), repeats=3)
+            looped_str = f"{looped * 1000:>9.2f} ms"
+        else:
+            looped_str = f"{'skipped':>12}"
+        print(f"{size:>8} | {looped_str} | {vectorized * 1000:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Steady-state insert cost of ShortTermMemory once the buffer is full: the previous
+evict-and-re-embed design vs the ring buffer.
+
+The encoder is a counting fake, so measured times are index work only; the projected
+column adds `--encode-ms` per encode (about what all-MiniLM-L6-v2 costs on CPU).
+
+    python -m benchmarks.bench_short_term_memory [--sizes 100 10000 100000] [--encode-ms 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from app.memory.short_term_memory import ShortTermMemory
+
+# Sequential inserts have nothing to coalesce; the batch window would only add wait time
+os.environ.setdefault("EMBEDDING_BATCH_WINDOW_MS", "0")
+
+
+class CountingEncoder:
+    def __init__(self, dim):
+        self.dim = dim
+        self.calls = 0
+        self._rng = np.random.default_rng(0)
+
+    def encode(self, text):
+        self.calls += 1
+        if isinstance(text, list):
+            return self._rng.standard_normal((len(text), self.dim)).astype(np.float32)
+        return self._rng.standard_normal(self.dim).astype(np.float32)
+
+
+class LegacyShortTermMemory:
+    """The pre-ring-buffer insert path: pop the oldest text, re-embed and rebuild the rest."""
+
+    def __init__(self, dim, max_items, model):
+        self.dim = dim
+        self.max_items = max_items
+        self.model = model
+        self.texts = []
+        self.index = faiss.IndexFlatL2(dim)
+
+    def add_interaction(self, user_message, assistant_response):
+        combined = f"Usuario: {user_message}\nAsistente: {assistant_response}"
+        embedding = self.model.encode(combined)
+        if len(self.texts) >= self.max_items:
+            self.texts.pop(0)
+            embeddings = np.array([self.model.encode(t) for t in self.texts])
+            self.index = faiss.IndexFlatL2(self.dim)
+            self.index.add(embeddings)
+        self.index.add(np.array([embedding]))
+        self.texts.append(combined)
+
+
+def steady_state(memory, encoder, inserts):
+    encoder.calls = 0
+    start = time.perf_counter()
+    for i in range(inserts):
+        memory.add_interaction(f"pregunta {i}", "respuesta")
+    elapsed = (time.perf_counter() - start) / inserts
+    return elapsed, encoder.calls / inserts
+
+
+def fill(memory, max_items):
+    for i in range(max_items):
+        memory.add_interaction(f"relleno {i}", "respuesta")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--encode-ms", type=float, default=5.0)
+    parser.add_argument("--legacy-max", type=int, default=10000,
+                        help="skip the legacy design above this size")
+    args = parser.parse_args()
+
+    print(f"{'max_items':>9} | {'design':>6} | {'encodes/insert':>14} | {'index work':>10} | {'projected':>10}")
+    for size in args.sizes:
+        encoder = CountingEncoder(args.dim)
+        with tempfile.TemporaryDirectory() as snapshot:
+            ring = ShortTermMemory(dim=args.dim, max_items=size, snapshot_path=snapshot, model=encoder)
+            fill(ring, size)
+            elapsed, encodes = steady_state(ring, encoder, inserts=1000)
+        projected = elapsed + encodes * args.encode_ms / 1000
+        print(f"{size:>9} | {'ring':>6} | {encodes:>14.0f} | {elapsed * 1e6:>7.1f} us | {projected * 1000:>7.2f} ms")
+
+        if size <= args.legacy_max:
+            legacy = LegacyShortTermMemory(args.dim, size, encoder)
+            fill(legacy, size)
+            elapsed, encodes = steady_state(legacy, encoder, inserts=3)
+            projected = elapsed + encodes * args.encode_ms / 1000
+            print(f"{size:>9} | {'legacy':>6} | {encodes:>14.0f} | {elapsed * 1e3:>7.1f} ms | {projected * 1000:>7.0f} ms")
+        else:
+            print(f"{size:>9} | {'legacy':>6} | {size:>14} | {'skipped':>10} | {size * args.encode_ms:>7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Startup time and process RSS of the chat stack: one ChatCore per router (the old
+import-time behaviour, three stacks) vs the single AppContainer built in the lifespan.
+
+Each layout runs in a fresh interpreter so model loads, store connections and RSS do
+not leak between measurements. Needs the real dependencies and reachable stores.
+
+    python -m benchmarks.bench_startup [--repeat 3]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+LAYOUTS = {
+    "per-router": (
+        "from app.core.chat_core import ChatCore\n"
+        "cores = [ChatCore() for _ in range(3)]\n"
+    ),
+    "container": (
+        "from app.core.container import AppContainer\n"
+        "container = AppContainer.build()\n"
+    ),
+}
+
+PROBE = """
+import json, resource, time
+start = time.perf_counter()
+{build}
+elapsed = time.perf_counter() - start
+with open("/proc/self/status") as f:
+    rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+print(json.dumps({{"startup_s": elapsed, "rss_mb": rss_kb / 1024,
+                  "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def measure(build):
+    result = subprocess.run([sys.executable, "-c", PROBE.format(build=build)],
+                            capture_output=True, text=True, check=True)
+    # Components print progress; the probe's JSON is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'layout':>10} | {'startup':>9} | {'rss':>9} | {'peak rss':>9}")
+    for name, build in LAYOUTS.items():
+        runs = [measure(build) for _ in range(args.repeat)]
+        startup = statistics.median(r["startup_s"] for r in runs)
+        rss = statistics.median(r["rss_mb"] for r in runs)
+        peak = statistics.median(r["peak_rss_mb"] for r in runs)
+        print(f"{name:>10} | {startup:>7.2f} s | {rss:>6.0f} MB | {peak:>6.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
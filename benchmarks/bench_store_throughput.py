@@ -0,0 +1,142 @@
+"""
+Write throughput per MemoryStore backend, in documents/sec: one `add_with_vector` per
+document vs a single `add_many`.
+
+Vectors are precomputed (random, `--dim`), so the numbers measure the write path only.
+Each backend writes to a scratch collection/schema that is removed afterwards; a
+backend that cannot be reached is reported as skipped.
+
+    python -m benchmarks.bench_store_throughput [--docs 5000] [--single-docs 500]
+        [--backends postgres mongo chroma weaviate redis sqlite faiss]
+"""
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+SCRATCH = "bench_throughput"
+
+
+def postgres():
+    from app.memory.store.postgres_memory_store import PostgresMemoryStore
+    setup = PostgresMemoryStore()
+    with setup._connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCRATCH} CASCADE; CREATE SCHEMA {SCRATCH}")
+    store = PostgresMemoryStore(options=f"-c search_path={SCRATCH}")
+
+    def cleanup(ids):
+        store.close()
+        with setup._connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCRATCH} CASCADE")
+        setup.close()
+    return store, cleanup
+
+
+def mongo():
+    from app.memory.store.mongo_memory_store import MongoMemoryStore
+    store = MongoMemoryStore(collection_name=SCRATCH)
+    return store, lambda ids: store.collection.drop()
+
+
+def chroma():
+    from app.memory.store.chroma_memory_store import ChromaMemoryStore
+    store = ChromaMemoryStore(collection_name=SCRATCH)
+    return store, lambda ids: store.client.delete_collection(SCRATCH)
+
+
+def weaviate():
+    from app.memory.store.weaviate_memory_store import WeaviateMemoryStore
+    store = WeaviateMemoryStore(context_name=SCRATCH)
+    return store, lambda ids: store.client.schema.delete_class(store.class_name)
+
+
+def redis():
+    from app.memory.store.redis_memory_store import RedisMemoryStore
+    store = RedisMemoryStore(namespace=SCRATCH)
+    return store, lambda ids: store.clear()
+
+
+def sqlite():
+    import tempfile
+    from app.memory.store.SQLite_memory_store import SQLiteMemoryStore
+    scratch = tempfile.TemporaryDirectory()
+    store = SQLiteMemoryStore(path=f"{scratch.name}/{SCRATCH}.sqlite3")
+
+    def cleanup(ids):
+        store.close()
+        scratch.cleanup()
+    return store, cleanup
+
+
+def faiss():
+    from app.memory.store.faiss_memory_store import FaissMemoryStore
+    store = FaissMemoryStore()
+    return store, lambda ids: store.clear()
+
+
+BACKENDS = {
+    "postgres": postgres,
+    "mongo": mongo,
+    "chroma": chroma,
+    "weaviate": weaviate,
+    "redis": redis,
+    "sqlite": sqlite,
+    "faiss": faiss,
+}
+
+
+def make_items(count, dim, rng):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return [
+        {
+            # Weaviate only accepts UUIDs as ids
+            "id": str(uuid.uuid4()),
+            "content": f"User: pregunta {i}\nAssistant: respuesta {i}",
+            "metadata": {"source": SCRATCH},
+            "vector": vector.tolist(),
+        }
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--single-docs", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'backend':>9} | {'add (docs/s)':>12} | {'add_many (docs/s)':>17} | {'speedup':>7}")
+    for name in args.backends:
+        try:
+            store, cleanup = BACKENDS[name]()
+        except Exception as e:
+            print(f"{name:>9} | skipped: {e}")
+            continue
+        written = []
+        try:
+            single = make_items(args.single_docs, args.dim, rng)
+            start = time.perf_counter()
+            for item in single:
+                store.add_with_vector(item["id"], item["content"], item["vector"], item["metadata"])
+            single_rate = len(single) / (time.perf_counter() - start)
+            written += [item["id"] for item in single]
+
+            bulk = make_items(args.docs, args.dim, rng)
+            start = time.perf_counter()
+            store.add_many(bulk)
+            bulk_rate = len(bulk) / (time.perf_counter() - start)
+            written += [item["id"] for item in bulk]
+
+            print(f"{name:>9} | {single_rate:>12.0f} | {bulk_rate:>17.0f} | {bulk_rate / single_rate:>6.1f}x")
+        finally:
+            cleanup(written)
+
+
+if __name__ == "__main__":
+    main()
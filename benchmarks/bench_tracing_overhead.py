@@ -0,0 +1,62 @@
+"""
+Cost of one `span()` around a request stage: tracing disabled (TRACING=false, shared
+no-op span), enabled outside a request (histogram only) and enabled inside a request
+(histogram plus the Server-Timing list). A bare loop is the baseline subtracted.
+
+A chat request opens a few dozen spans (stages, stores, models, embeddings), so even the
+enabled path stays far below the milliseconds each of those stages takes.
+
+    python -m benchmarks.bench_tracing_overhead [--spans 200000]
+"""
+import argparse
+import time
+
+from app.utils import tracing
+
+
+def loop(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    return time.perf_counter() - start
+
+
+def spans(n):
+    span = tracing.span
+    start = time.perf_counter()
+    for _ in range(n):
+        with span("retrieval"):
+            pass
+    return time.perf_counter() - start
+
+
+def per_span_ns(n, fn, baseline):
+    return max(0.0, min(fn(n) for _ in range(3)) - baseline) / n * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spans", type=int, default=200000)
+    args = parser.parse_args()
+
+    baseline = min(loop(args.spans) for _ in range(3))
+
+    enabled = tracing.TRACING_ENABLED
+    tracing.TRACING_ENABLED = False
+    disabled_ns = per_span_ns(args.spans, spans, baseline)
+    tracing.TRACING_ENABLED = True
+    outside_ns = per_span_ns(args.spans, spans, baseline)
+    token = tracing.start_request()
+    # Reset the request list between runs so it does not grow across them
+    inside_ns = per_span_ns(args.spans, lambda n: (tracing._request_timings.get().clear(), spans(n))[1], baseline)
+    tracing.finish_request(token)
+    tracing.TRACING_ENABLED = enabled
+
+    print(f"spans: {args.spans}")
+    print(f"disabled:               {disabled_ns:8.0f} ns/span")
+    print(f"enabled, no request:    {outside_ns:8.0f} ns/span")
+    print(f"enabled, in a request:  {inside_ns:8.0f} ns/span")
+
+
+if __name__ == "__main__":
+    main()
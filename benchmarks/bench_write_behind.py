@@ -0,0 +1,113 @@
+"""
+Response latency of ChatCore.handle_message_async when the interaction is persisted
+inline (the old behaviour: embedding call, `get_stats()` round trip for the `msg-N` id,
+insert) vs through the write-behind queue (one embedding call and one `add_many` per batch).
+
+The LLM and the store are fakes with fixed latencies; the numbers reflect what the user
+waits for and how many store round trips the writes cost.
+
+    python -m benchmarks.bench_write_behind [--llm-ms 100] [--embed-ms 20] [--store-ms 10]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.chat_core import ChatCore
+from app.memory.write_behind import WriteBehindQueue
+from app.memory.store.memory_store_interface import hits_from_texts
+from app.utils.utils import run_blocking
+
+
+class FakeStore:
+    def __init__(self, embed_latency, store_latency):
+        self.embed_latency = embed_latency
+        self.store_latency = store_latency
+        self.round_trips = 0
+        self.documents = 0
+
+    def _round_trip(self, seconds):
+        self.round_trips += 1
+        time.sleep(seconds)
+
+    def add_interaction(self):
+        self._round_trip(self.embed_latency)
+        self._round_trip(self.store_latency)  # get_stats() for the id
+        self._round_trip(self.store_latency)
+        self.documents += 1
+
+    def add_many(self, count):
+        self._round_trip(self.embed_latency)
+        self._round_trip(self.store_latency)
+        self.documents += count
+
+
+class FakeMemoryOrchestrator:
+    def __init__(self, store, write_behind):
+        self.store = store
+        self.write_queue = WriteBehindQueue.from_env(self._persist) if write_behind else None
+
+    async def search_async(self, query_text, top_k=5, context=None):
+        return hits_from_texts(["contexto"], "long_term")
+
+    def _persist(self, interactions):
+        self.store.add_many(len(interactions))
+
+    def add_interaction(self, user_message, assistant_response, context=None):
+        self.store.add_interaction()
+
+    async def add_interaction_async(self, user_message, assistant_response, context=None):
+        if self.write_queue is not None and self.write_queue.submit((user_message, assistant_response, context)):
+            return
+        await run_blocking(self.add_interaction, user_message, assistant_response, context)
+
+
+class FakeLLMOrchestrator:
+    def __init__(self, llm_latency):
+        self.llm_latency = llm_latency
+
+    def context_budget(self, default):
+        return default
+
+    async def respond_async(self, prompt, query=None):
+        await asyncio.sleep(self.llm_latency)
+        return "respuesta"
+
+
+async def run(core, requests, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await core.handle_message_async(f"pregunta {i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-ms", type=float, default=100)
+    parser.add_argument("--embed-ms", type=float, default=20)
+    parser.add_argument("--store-ms", type=float, default=10)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'mode':>12} | {'p50':>8} | {'p95':>8} | {'round trips':>11} | {'stored':>6}")
+    for mode in ("inline", "write-behind"):
+        store = FakeStore(args.embed_ms / 1000, args.store_ms / 1000)
+        memory = FakeMemoryOrchestrator(store, write_behind=mode == "write-behind")
+        core = ChatCore(memory_orchestrator=memory, llm_orchestrator=FakeLLMOrchestrator(args.llm_ms / 1000))
+        p50, p95 = asyncio.run(run(core, args.requests, args.concurrency))
+        if memory.write_queue is not None:
+            memory.write_queue.close()
+        print(f"{mode:>12} | {p50:>5.1f} ms | {p95:>5.1f} ms | {store.round_trips:>11} | {store.documents:>6}")
+
+
+if __name__ == "__main__":
+    main()